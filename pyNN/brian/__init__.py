@@ -51,6 +51,8 @@ def setup(timestep=DEFAULT_TIMESTEP, min_delay=DEFAULT_MIN_DELAY,
 
 def end(compatible_output=True):
     """Do any necessary cleaning up before exiting."""
+    for recorder in simulator.state.recorders:
+        recorder.close_stream()
     for (population, variables, filename) in simulator.state.write_on_end:
         io = get_io(filename)
         population.write_data(io, variables)
@@ -59,8 +59,7 @@ class Population(common.Population):
     def _create_cells(self):
         id_range = numpy.arange(simulator.state.id_counter,
                                 simulator.state.id_counter + self.size)
-        self.all_cells = numpy.array([simulator.ID(id) for id in id_range],
-                                     dtype=simulator.ID)
+        self.all_cells = common.IDArray(id_range, simulator.ID, self)
         self._mask_local = numpy.ones((self.size,), bool)  # all cells are local. This doesn't seem very efficient.
         
         if isinstance(self.celltype, StandardCellType):
@@ -73,8 +72,6 @@ class Population(common.Population):
         self.brian_group = self.celltype.brian_model(self.size,
                                                      self.celltype.eqs,
                                                      **parameter_space)
-        for id in self.all_cells:
-            id.parent = self
         simulator.state.id_counter += self.size
         simulator.state.network.add(self.brian_group)
     
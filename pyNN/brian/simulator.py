@@ -59,6 +59,7 @@ class State(common.control.BaseState):
         
     def clear(self):
         self.recorders = set([])
+        self.pending_updates = set([])
         self.id_counter = 0
         self.current_sources = []
         self.segment_counter = -1
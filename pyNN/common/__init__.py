@@ -13,6 +13,7 @@ Utility functions and classes:
 
 Base classes to be sub-classed by individual backends:
     IDMixin
+    IDArray
     Population
     PopulationView
     Assembly
@@ -44,7 +45,7 @@ Global constants:
 
 """
 
-from .populations import IDMixin, BasePopulation, Population, PopulationView, Assembly, is_conductance
+from .populations import IDMixin, IDArray, BasePopulation, Population, PopulationView, Assembly, is_conductance
 from .projections import Projection, Connection
 from .procedural_api import build_create, build_connect, set, build_record, initialize
 from .control import setup, end, build_run, build_reset, build_state_queries
@@ -28,6 +28,7 @@ class BaseState(object):
         self.t_start = 0
         self.write_on_end = []  # a list of (population, variable, filename) combinations that should be written to file on end()
         self.recorders = set([])
+        self.pending_updates = set([])  # populations with changes deferred by batch_updates()
 
 
 def setup(timestep=DEFAULT_TIMESTEP, min_delay=DEFAULT_MIN_DELAY,
@@ -73,6 +74,12 @@ def build_run(simulator):
         now = simulator.state.t
         if time_point - now < -simulator.state.dt / 2.0:  # allow for floating point error
             raise ValueError("Time %g is in the past (current time %g)" % (time_point, now))
+        for population in list(simulator.state.pending_updates):
+            population._apply_pending_updates()
+        # recorders which stream their data to disk need to be flushed periodically
+        callbacks = list(callbacks or []) + [recorder._stream_callback
+                                             for recorder in simulator.state.recorders
+                                             if getattr(recorder, "stream", None) is not None]
         if callbacks:
             callback_events = [(callback(simulator.state.t), callback)
                                for callback in callbacks]
@@ -12,6 +12,7 @@ import numpy
 import logging
 import operator
 from itertools import chain
+from contextlib import contextmanager
 try:
     basestring
     reduce
@@ -146,8 +147,91 @@ class IDMixin(object):
         return self.parent[index:index + 1]
 
 
+class IDArray(numpy.ndarray):
+    """
+    An array of cell IDs, stored as plain integers.
+
+    ID objects (instances of `id_class`, with their `parent` attribute set to
+    `parent`) are created only on demand, when a single element is accessed
+    or when iterating over the array. Slicing or indexing with an array gives
+    another `IDArray`; the results of arithmetic are plain integer arrays.
+    """
+
+    def __new__(cls, ids, id_class, parent):
+        obj = numpy.asarray(ids, dtype=numpy.int64).view(cls)
+        obj.id_class = id_class
+        obj.parent = parent
+        return obj
+
+    def __array_finalize__(self, obj):
+        self.id_class = getattr(obj, "id_class", None)
+        self.parent = getattr(obj, "parent", None)
+
+    def __array_wrap__(self, obj, context=None, return_scalar=False):
+        # the results of ufuncs are numbers, not cell IDs. numpy >= 2 passes
+        # `return_scalar`, which is only accepted by its own __array_wrap__
+        obj = obj.view(numpy.ndarray)
+        if return_scalar:
+            return numpy.ndarray.__array_wrap__(obj, obj, context, return_scalar)
+        if obj.ndim == 0:
+            return obj[()]
+        return obj
+
+    def __getitem__(self, index):
+        value = numpy.ndarray.__getitem__(self, index)
+        if isinstance(value, numpy.ndarray) or self.id_class is None:
+            return value
+        id = self.id_class(value)
+        id.parent = self._get_parent(value)
+        return id
+
+    def _get_parent(self, value):
+        return self.parent
+
+    def astype(self, *args, **kwargs):
+        return self.view(numpy.ndarray).astype(*args, **kwargs)
+
+    def argsort(self, *args, **kwargs):
+        return self.view(numpy.ndarray).argsort(*args, **kwargs)
+
+    def __reduce__(self):
+        reconstruct, arguments, state = numpy.ndarray.__reduce__(self)
+        return reconstruct, arguments, (state, self.__dict__)
+
+    def __setstate__(self, state):
+        array_state, attributes = state
+        numpy.ndarray.__setstate__(self, array_state)
+        self.__dict__.update(attributes)
+
+
+class AssemblyIDArray(IDArray):
+    """
+    An array of the IDs of cells belonging to several Populations, stored as
+    plain integers. The parent of each ID is found from its value, using the
+    ranges of IDs of the `parents`, so ID objects are again created only on
+    demand.
+    """
+
+    def __new__(cls, ids, id_class, parents):
+        obj = IDArray.__new__(cls, ids, id_class, None)
+        parents = sorted(parents, key=lambda p: p.first_id)
+        obj.parents = parents
+        obj.first_ids = numpy.array([p.first_id for p in parents])
+        return obj
+
+    def __array_finalize__(self, obj):
+        IDArray.__array_finalize__(self, obj)
+        self.parents = getattr(obj, "parents", [])
+        self.first_ids = getattr(obj, "first_ids", None)
+
+    def _get_parent(self, value):
+        return self.parents[numpy.searchsorted(self.first_ids, value, side='right') - 1]
+
+
 class BasePopulation(object):
     _record_filter = None
+    _batch_depth = 0
+    _pending_updates = None
 
     def __getitem__(self, index):
         """
@@ -274,6 +358,8 @@ class BasePopulation(object):
         Values will be expressed in the standard PyNN units (i.e. millivolts,
         nanoamps, milliseconds, microsiemens, nanofarads, event per second).
         """
+        if self._pending_updates:
+            self._apply_pending_updates()
         # if all the cells have the same value for a parameter, should
         # we return just the number, rather than an array?
         if isinstance(parameter_names, basestring):
@@ -294,21 +380,7 @@ class BasePopulation(object):
                                                      # this also causes problems if the population size matches the number of MPI nodes
         parameters = dict(parameter_space.items())
         if gather == True and self._simulator.state.num_processes > 1:
-            # seems inefficient to do it in a loop - should do as single operation
-            for name in parameter_names:
-                values = parameters[name]
-                if isinstance(values, numpy.ndarray):
-                    all_values = {self._simulator.state.mpi_rank: values.tolist()}
-                    local_indices = numpy.arange(self.size)[self._mask_local].tolist()
-                    all_indices = {self._simulator.state.mpi_rank: local_indices}
-                    all_values = recording.gather_dict(all_values)
-                    all_indices = recording.gather_dict(all_indices)
-                    if self._simulator.state.mpi_rank == 0:
-                        values = reduce(operator.add, all_values.values())
-                        indices = reduce(operator.add, all_indices.values())
-                        idx = numpy.argsort(indices)
-                        values = numpy.array(values)[idx]
-                parameters[name] = values
+            self._gather_parameters(parameters, parameter_names, simplify)
         try:
             values = [parameters[name] for name in parameter_names]
         except KeyError as err:
@@ -320,6 +392,56 @@ class BasePopulation(object):
             assert len(parameter_names) == 1
             return values[0]
 
+    def _gather_parameters(self, parameters, parameter_names, simplify):
+        """
+        Replace the local values in the `parameters` dict by the values for
+        all cells in the population, on the root MPI node.
+
+        All numerical parameters are sent in a single collective operation,
+        as the columns of a 2D array whose first column contains the indices
+        of the local cells; the root node then puts the rows in place by
+        index. Other parameters (e.g. spike time Sequences) are gathered
+        together as Python objects.
+        """
+        names = [name for name in parameter_names if name in parameters]
+        local_indices = numpy.arange(self.size)[self._mask_local]
+        local_values = {}
+        for name in names:
+            # a parameter may be homogeneous on some nodes but not on others
+            values = parameters[name]
+            if not isinstance(values, numpy.ndarray) or values.shape != local_indices.shape:
+                if isinstance(values, (int, float, numpy.number)):
+                    values = numpy.full(local_indices.shape, values)
+                else:
+                    value = values
+                    values = numpy.empty(local_indices.shape, dtype=object)
+                    values.fill(value)
+            local_values[name] = values
+        numeric = [name for name in names if local_values[name].dtype.kind in "biuf"]
+        others = [name for name in names if name not in numeric]
+        is_root = self._simulator.state.mpi_rank == 0
+        if numeric:
+            local_data = numpy.column_stack([local_indices] + [local_values[name] for name in numeric])
+            data = recording.gather_array(local_data)
+            if is_root:
+                all_data = numpy.empty((self.size, len(numeric)))
+                all_data[data[:, 0].astype(int)] = data[:, 1:]
+                for i, name in enumerate(numeric):
+                    parameters[name] = all_data[:, i].astype(local_values[name].dtype)
+        if others:
+            local_data = {self._simulator.state.mpi_rank: (local_indices,
+                                                           [local_values[name] for name in others])}
+            gathered = recording.gather_dict(local_data)
+            if is_root:
+                indices = numpy.hstack([indices for indices, _ in gathered.values()])
+                for i, name in enumerate(others):
+                    all_values = numpy.empty((self.size,), dtype=object)
+                    all_values[indices] = numpy.hstack([values[i] for _, values in gathered.values()])
+                    parameters[name] = all_values
+        if is_root and simplify:
+            for name in numeric:
+                parameters[name] = simplify_parameter_array(parameters[name])
+
     def set(self, **parameters):
         """
         Set one or more parameters for every cell in the population.
@@ -341,9 +463,19 @@ class BasePopulation(object):
             p.set(tau_m=20.0, v_rest=-65).
             p.set(spike_times=[0.3, 0.7, 0.9, 1.4])
             p.set(cm=rand_distr, tau_m=lambda i: 10 + i/10.0)
+
+        Within a :meth:`batch_updates` block, the new values are not passed
+        on to the simulator immediately.
         """
         # TODO: add example using of function of (x,y,z) and Population.position_generator
-        if self.local_size > 0:
+        if self._batch_depth > 0:
+            schema = self.celltype.get_schema()
+            for name in parameters:
+                if name not in schema:
+                    raise errors.NonExistentParameterError(name, self.celltype.__class__.__name__,
+                                                           valid_parameter_names=schema.keys())
+            self._defer_update("parameters", parameters)
+        elif self.local_size > 0:
             if (isinstance(self.celltype, standardmodels.StandardCellType)
                 and any(name in self.celltype.computed_parameters() for name in parameters)):
                 # need to get existing parameter space of models so we can perform calculations
@@ -401,13 +533,68 @@ class BasePopulation(object):
             p.initialize(v=-70.0)
             p.initialize(v=rand_distr, gsyn_exc=0.0)
             p.initialize(v=lambda i: -65 + i/10.0)
+
+        Within a :meth:`batch_updates` block, the new values are not passed
+        on to the simulator immediately.
         """
+        if self._batch_depth > 0:
+            self._defer_update("initial_values", initial_values)
+            return
         for variable, value in initial_values.items():
             logger.debug("In Population '%s', initialising %s to %s" % (self.label, variable, value))
             initial_value = LazyArray(value, shape=(self.size,), dtype=float)
             self._set_initial_value_array(variable, initial_value)
             self.initial_values[variable] = initial_value
 
+    @contextmanager
+    def batch_updates(self):
+        """
+        Context manager which collects the changes made by :meth:`set` and
+        :meth:`initialize` and passes them on to the simulator in one go, on
+        leaving the block or at the next call to `run()`, whichever comes
+        first. Where a parameter or variable is set several times, only the
+        last value is used. If the block raises an exception, the pending
+        changes are discarded. Example::
+
+            with p.batch_updates():
+                p.set(tau_m=20.0)
+                p.set(cm=rand_distr)
+                p.initialize(v=-65.0)
+        """
+        self._batch_depth += 1
+        completed = False
+        try:
+            yield self
+            completed = True
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and not completed:
+                self._pending_updates = None
+                self._simulator.state.pending_updates.discard(self)
+        if self._batch_depth == 0:
+            self._apply_pending_updates()
+
+    def _defer_update(self, kind, values):
+        if self._pending_updates is None:
+            self._pending_updates = {"parameters": {}, "initial_values": {}}
+            self._simulator.state.pending_updates.add(self)
+        self._pending_updates[kind].update(values)
+
+    def _apply_pending_updates(self):
+        """Pass the changes collected by :meth:`batch_updates` on to the simulator."""
+        pending = self._pending_updates
+        self._pending_updates = None
+        self._simulator.state.pending_updates.discard(self)
+        if pending:
+            batch_depth, self._batch_depth = self._batch_depth, 0
+            try:
+                if pending["parameters"]:
+                    self.set(**pending["parameters"])
+                if pending["initial_values"]:
+                    self.initialize(**pending["initial_values"])
+            finally:
+                self._batch_depth = batch_depth
+
     def find_units(self, variable):
         """
         Returns units of the specified variable or parameter, as a string.
@@ -426,7 +613,7 @@ class BasePopulation(object):
     def injectable(self):
         return self.celltype.injectable
 
-    def record(self, variables, to_file=None, sampling_interval=None):
+    def record(self, variables, to_file=None, sampling_interval=None, flush_interval=None):
         """
         Record the specified variable or variables for all cells in the
         Population or view.
@@ -440,6 +627,14 @@ class BasePopulation(object):
 
         `sampling_interval` should be a value in milliseconds, and an integer
         multiple of the simulation timestep.
+
+        If `flush_interval` (in ms) is given, `to_file` must be a filename, and
+        the recorded data are streamed to that file (in HDF5 format, see
+        :mod:`pyNN.recording.streaming`) every `flush_interval` ms during the
+        simulation, rather than being kept in memory. Data which have already
+        been streamed are no longer returned by `get_data()`. Streaming is not
+        yet supported by all backends: for those that do not support it,
+        `NotImplementedError` is raised.
         """
         if variables is None:  # reset the list of things to record
                                # note that if record(None) is called on a view of a population
@@ -451,7 +646,11 @@ class BasePopulation(object):
                 self.recorder.record(variables, self.all_cells, sampling_interval)
             else:
                 self.recorder.record(variables, self._record_filter, sampling_interval)
-        if isinstance(to_file, basestring):
+        if flush_interval is not None:
+            if not isinstance(to_file, basestring):
+                raise ValueError("Streaming recorded data requires `to_file` to be a filename")
+            self.recorder.stream_to(to_file, flush_interval)
+        elif isinstance(to_file, basestring):
             self.recorder.file = to_file
             self._simulator.state.write_on_end.append((self, variables, self.recorder.file))
 
@@ -514,6 +713,20 @@ class BasePopulation(object):
         """
         return self.recorder.get(variables, gather, self._record_filter, clear)
 
+    def get_spikes_columnar(self, gather=True, clear=False):
+        """
+        Return the spikes recorded from the Population in a compact form: a
+        list containing, for each segment, a
+        :class:`~pyNN.recording.ColumnarSpikes` object with one array of spike
+        times and one array of the indices of the neurons which emitted them.
+
+        This avoids creating a Neo `SpikeTrain` for every recorded neuron; use
+        the `to_spiketrains()` method to obtain these when needed.
+
+        `gather` and `clear` have the same meaning as for :meth:`get_data`.
+        """
+        return self.recorder.get_spikes_columnar(gather, self._record_filter, clear)
+
     @deprecated("write_data(file, 'spikes')")
     def printSpikes(self, file, gather=True, compatible_output=True):
         self.write_data(file, 'spikes', gather)
@@ -582,7 +795,7 @@ class BasePopulation(object):
             file = recording.files.StandardTextFile(file, mode='w')
         cells = self.all_cells
         result = numpy.empty((len(cells), 4))
-        result[:, 0] = numpy.array([self.id_to_index(id) for id in cells])
+        result[:, 0] = self.id_to_index(cells)
         result[:, 1:4] = self.positions.T
         if self._simulator.state.mpi_rank == 0:
             file.write(result, {'population': self.label})
@@ -665,9 +878,9 @@ class Population(BasePopulation):
         self.annotations = {}
         self.recorder = self._recorder_class(self)
         # Build the arrays of cell ids
-        # Cells on the local node are represented as ID objects, other cells by integers
-        # All are stored in a single numpy array for easy lookup by address
-        # The local cells are also stored in a list, for easy iteration
+        # All cell ids are stored in a single numpy array for easy lookup by address.
+        # Backends may use an IDArray, which stores the ids as integers and creates
+        # ID objects only when individual cells are accessed
         self._create_cells()
         self.first_id = self.all_cells[0]
         self.last_id = self.all_cells[-1]
@@ -712,9 +925,14 @@ class Population(BasePopulation):
         (order in the Population), counting only cells on the local MPI node.
         """
         if self._simulator.state.num_processes > 1:
-            return self.local_cells.tolist().index(id)          # probably very slow
-            #return numpy.nonzero(self.local_cells == id)[0][0] # possibly faster?
-            # another idea - get global index, use idx-sum(mask_local[:idx])?
+            if getattr(self, "_local_index_mask", None) is not self._mask_local:
+                # cache the local index of each cell, as a function of its global index
+                self._local_indices = numpy.cumsum(self._mask_local) - 1
+                self._local_index_mask = self._mask_local
+            index = self.id_to_index(id)
+            if not numpy.all(self._mask_local[index]):
+                raise ValueError("ID %s does not exist on the local node" % id)
+            return self._local_indices[index]
         else:
             return self.id_to_index(id)
 
@@ -872,31 +1090,34 @@ class PopulationView(BasePopulation):
 
             >>> assert pv.id_to_index(pv[3]) == 3
         """
-        if not numpy.iterable(id):
-            if self._is_sorted:
-                if id not in self.all_cells:
-                    raise IndexError("ID %s not present in the View" % id)
-                return numpy.searchsorted(self.all_cells, id)
-            else:
-                result = numpy.where(self.all_cells == id)[0]
-            if len(result) == 0:
-                raise IndexError("ID %s not present in the View" % id)
-            else:
-                return result
-        else:
-            if self._is_sorted:
-                return numpy.searchsorted(self.all_cells, id)
-            else:
-                result = numpy.array([], dtype=numpy.int)
-                for item in id:
-                    data = numpy.where(self.all_cells == item)[0]
-                    if len(data) == 0:
-                        raise IndexError("ID %s not present in the View" % item)
-                    elif len(data) > 1:
-                        raise Exception("ID %s is duplicated in the View" % item)
-                    else:
-                        result = numpy.append(result, data)
-                return result
+        lookup = self._get_index_lookup()
+        ids = numpy.asarray(id, dtype=numpy.int64) - self.first_id
+        in_range = (ids >= 0) & (ids < lookup.size)
+        indices = numpy.where(in_range, lookup[numpy.where(in_range, ids, 0)], -1)
+        if numpy.any(indices < 0):
+            missing = numpy.asarray(id)[indices < 0]
+            raise IndexError("ID %s not present in the View" % missing.reshape(-1)[0])
+        if indices.ndim == 0:
+            return int(indices)
+        return indices
+
+    def _get_index_lookup(self):
+        """
+        Return an array giving, for each id from `first_id` to `last_id`, the
+        index of that cell in the view, or -1 if it is not in the view. The
+        array is built on first use and rebuilt if `all_cells` changes.
+        """
+        if getattr(self, "_index_lookup_ids", None) is not self.all_cells:
+            ids = numpy.asarray(self.all_cells)
+            sorted_ids = numpy.sort(ids)
+            duplicated = sorted_ids[1:][sorted_ids[1:] == sorted_ids[:-1]]
+            if duplicated.size > 0:
+                raise Exception("ID %s is duplicated in the View" % duplicated[0])
+            lookup = -numpy.ones(self.last_id - self.first_id + 1, dtype=int)
+            lookup[ids - self.first_id] = numpy.arange(self.size)
+            self._index_lookup = lookup
+            self._index_lookup_ids = self.all_cells
+        return self._index_lookup
 
     @property
     def grandparent(self):
@@ -985,6 +1206,7 @@ class Assembly(object):
         if kwargs:
             assert list(kwargs.keys()) == ['label']
         self.populations = []
+        self._cache = {}
         for p in populations:
             self._insert(p)
         self.label = kwargs.get('label', 'assembly%d' % Assembly._count)
@@ -1009,36 +1231,73 @@ class Assembly(object):
                         break
                 if not double:
                     self.populations.append(element)
+                    self._cache = {}
             else:
                 logging.warning('Adding a PopulationView to an Assembly when parent Population is there is not possible')
         elif isinstance(element, BasePopulation):
             if not element in self.populations:
                 self.populations.append(element)
+                self._cache = {}
             else:
                 logging.warning('Adding a Population twice in an Assembly is not possible')
 
+    def _cached(self, name, func):
+        """
+        Return the value of `func()`, which is calculated only once for a
+        given set of member populations (the cache is cleared by `_insert()`).
+        """
+        if name not in self._cache:
+            self._cache[name] = func()
+        return self._cache[name]
+
+    def _concatenate(self, attribute_name):
+        if len(self.populations) == 1:
+            return getattr(self.populations[0], attribute_name)
+        arrays = [getattr(p, attribute_name) for p in self.populations]
+        result = numpy.concatenate(arrays)
+        if all(isinstance(arr, IDArray) for arr in arrays):
+            # keep creating ID objects on demand, with the right parent
+            parents = []
+            for p in self.populations:
+                if not any(p.all_cells.parent is parent for parent in parents):
+                    parents.append(p.all_cells.parent)
+            result = AssemblyIDArray(result, arrays[0].id_class, parents)
+        return result
+
+    @property
+    def _boundaries(self):
+        """The index of the first cell of each population, followed by the size."""
+        return self._cached("boundaries",
+                            lambda: numpy.cumsum([0] + [p.size for p in self.populations]))
+
+    @property
+    def _id_table(self):
+        """
+        The ids of all cells in the Assembly in increasing order, together with
+        the corresponding indices.
+        """
+        def build_table():
+            all_cells = numpy.asarray(self.all_cells)
+            order = numpy.argsort(all_cells, kind="mergesort")
+            return all_cells[order], order
+        return self._cached("id_table", build_table)
+
     @property
     def local_cells(self):
-        result = self.populations[0].local_cells
-        for p in self.populations[1:]:
-            result = numpy.concatenate((result, p.local_cells))
-        return result
+        return self._cached("local_cells", lambda: self._concatenate("local_cells"))
 
     @property
     def all_cells(self):
-        result = self.populations[0].all_cells
-        for p in self.populations[1:]:
-            result = numpy.concatenate((result, p.all_cells))
-        return result
+        return self._cached("all_cells", lambda: self._concatenate("all_cells"))
 
     def all(self):
         """Iterator over cell ids on all nodes."""
-        return iter(self.all_cells)
+        return chain(*(p.all() for p in self.populations))
 
     @property
     def _is_sorted(self):
-        idx = numpy.argsort(self.all_cells)
-        return numpy.all(idx == numpy.arange(len(self.all_cells)))
+        sorted_ids, order = self._id_table
+        return bool(numpy.all(order == numpy.arange(order.size)))
 
     @property
     def _homogeneous_synapses(self):
@@ -1077,18 +1336,15 @@ class Assembly(object):
 
     @property
     def _mask_local(self):
-        result = self.populations[0]._mask_local
-        for p in self.populations[1:]:
-            result = numpy.concatenate((result, p._mask_local))
-        return result
+        return self._cached("mask_local", lambda: self._concatenate("_mask_local"))
 
     @property
     def first_id(self):
-        return numpy.min(self.all_cells)
+        return self._id_table[0][0]
 
     @property
     def last_id(self):
-        return numpy.max(self.all_cells)
+        return self._id_table[0][-1]
 
     def id_to_index(self, id):
         """
@@ -1098,30 +1354,17 @@ class Assembly(object):
             >>> assert p.id_to_index(p[5]) == 5
             >>> assert p.id_to_index(p.index([1, 2, 3])) == [1, 2, 3]
         """
-        all_cells = self.all_cells
-        if not numpy.iterable(id):
-            if self._is_sorted:
-                return numpy.searchsorted(all_cells, id)
-            else:
-                result = numpy.where(all_cells == id)[0]
-            if len(result) == 0:
-                raise IndexError("ID %s not present in the View" % id)
-            else:
-                return result
-        else:
-            if self._is_sorted:
-                return numpy.searchsorted(all_cells, id)
-            else:
-                result = numpy.array([], dtype=numpy.int)
-                for item in id:
-                    data = numpy.where(all_cells == item)[0]
-                    if len(data) == 0:
-                        raise IndexError("ID %s not present in the Assembly" % item)
-                    elif len(data) > 1:
-                        raise Exception("ID %s is duplicated in the Assembly" % item)
-                    else:
-                        result = numpy.append(result, data)
-                return result
+        sorted_ids, order = self._id_table
+        ids = numpy.asarray(id, dtype=numpy.int64)
+        positions = numpy.minimum(numpy.searchsorted(sorted_ids, ids), sorted_ids.size - 1)
+        found = sorted_ids[positions] == ids
+        if not numpy.all(found):
+            missing = ids[~found] if ids.ndim else ids
+            raise IndexError("ID %s not present in the Assembly" % missing.reshape(-1)[0])
+        indices = order[positions]
+        if indices.ndim == 0:
+            return int(indices)
+        return indices
 
     @property
     def positions(self):
@@ -1132,7 +1375,7 @@ class Assembly(object):
 
     @property
     def size(self):
-        return sum(p.size for p in self.populations)
+        return int(self._boundaries[-1])
 
     def __iter__(self):
         """
@@ -1153,12 +1396,7 @@ class Assembly(object):
         consisting of appropriate populations and (possibly newly created)
         population views.
         """
-        count = 0; boundaries = [0]
-        for p in self.populations:
-            count += p.size
-            boundaries.append(count)
-        boundaries = numpy.array(boundaries, dtype=numpy.int)
-
+        boundaries = self._boundaries
         if isinstance(index, (int, numpy.integer)):  # return an ID
             pindex = boundaries[1:].searchsorted(index, side='right')
             return self.populations[pindex][index - boundaries[pindex]]
@@ -1271,7 +1509,7 @@ class Assembly(object):
     def rset(self, parametername, rand_distr):
         self.set(parametername=rand_distr)
 
-    def record(self, variables, to_file=None, sampling_interval=None):
+    def record(self, variables, to_file=None, sampling_interval=None, flush_interval=None):
         """
         Record the specified variable or variables for all cells in the Assembly.
 
@@ -1281,9 +1519,12 @@ class Assembly(object):
 
         If specified, `to_file` should be either a filename or a Neo IO instance and `write_data()`
         will be automatically called when `end()` is called.
+
+        If `flush_interval` is given, the data are streamed to `to_file` during
+        the simulation (see :meth:`Population.record`).
         """
         for p in self.populations:
-            p.record(variables, to_file, sampling_interval)
+            p.record(variables, to_file, sampling_interval, flush_interval)
 
     @deprecated("record('v')")
     def record_v(self, to_file=True):
@@ -1313,7 +1554,7 @@ class Assembly(object):
             file = files.StandardTextFile(file, mode='w')
         cells = self.all_cells
         result = numpy.empty((len(cells), 4))
-        result[:, 0] = numpy.array([self.id_to_index(id) for id in cells])
+        result[:, 0] = self.id_to_index(cells)
         result[:, 1:4] = self.positions.T
         if self._simulator.state.mpi_rank == 0:
             file.write(result, {'assembly': self.label})
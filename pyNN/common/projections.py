@@ -9,15 +9,14 @@ backend-specific Projection classes.
 
 try:
     basestring
-    reduce
     xrange
 except NameError:
     basestring = str
-    from functools import reduce
     xrange = range
 import numpy
 import logging
 import operator
+import os
 from pyNN import recording, errors, models, core, descriptions
 from pyNN.parameters import ParameterSpace, LazyArray
 from pyNN.space import Space
@@ -27,6 +26,71 @@ from .populations import BasePopulation, Assembly
 logger = logging.getLogger("PyNN")
 deprecated = core.deprecated
 
+try:
+    import scipy.sparse
+    have_scipy = True
+except ImportError:
+    have_scipy = False
+
+
+def _combine_multiple_synapses(flat_indices, values, multiple_synapses):
+    """
+    Combine the values of connections which have the same (flattened) address
+    using the operation named by `multiple_synapses` (see
+    :meth:`Projection.get`). Returns the sorted unique addresses and the
+    combined values.
+    """
+    if multiple_synapses in ('first', 'last'):
+        if multiple_synapses == 'last':
+            flat_indices = flat_indices[::-1]
+            values = values[::-1]
+        unique_indices, positions = numpy.unique(flat_indices, return_index=True)
+        return unique_indices, values[positions]
+    else:
+        reduction, initial = {
+            'sum': (numpy.add, 0.0),
+            'min': (numpy.minimum, numpy.inf),
+            'max': (numpy.maximum, -numpy.inf),
+        }[multiple_synapses]
+        unique_indices, positions = numpy.unique(flat_indices, return_inverse=True)
+        combined = initial * numpy.ones(unique_indices.shape)
+        reduction.at(combined, positions, values)
+        return unique_indices, combined
+
+
+class SparseConnectionMatrix(object):
+    """
+    Minimal coordinate-format sparse matrix, used for `Projection.get(...,
+    format='sparse')` when SciPy is not available.
+    """
+
+    def __init__(self, data, row, col, shape):
+        self.data = data
+        self.row = row
+        self.col = col
+        self.shape = shape
+
+    @property
+    def nnz(self):
+        return self.data.size
+
+    def toarray(self):
+        """Return a dense array, with zeros where there is no connection."""
+        matrix = numpy.zeros(self.shape)
+        matrix[self.row, self.col] = self.data
+        return matrix
+
+
+def sparse_matrix(data, row, col, shape):
+    """
+    Return a sparse matrix: a SciPy CSR matrix if SciPy is available,
+    otherwise a :class:`SparseConnectionMatrix`.
+    """
+    if have_scipy:
+        return scipy.sparse.csr_matrix((data, (row, col)), shape=shape)
+    else:
+        return SparseConnectionMatrix(data, row, col, shape)
+
 
 class Projection(object):
     """
@@ -271,7 +335,7 @@ class Projection(object):
             name of the attributes whose values are wanted, or a list of such
             names.
         `format`:
-            "list" or "array".
+            "list", "array" or "sparse".
         `gather`:
             If True, node 0 gets connection information from all MPI nodes,
             other nodes get information only from connections that exist in this node.
@@ -310,6 +374,14 @@ class Projection(object):
         controlled by the `multiple_synapses` argument, which must be one of
         {'last', 'first', 'sum', 'min', 'max'}.
 
+        With sparse format, returns a tuple of sparse matrices, one for each
+        name in `attribute_names`, containing only the elements for which a
+        connection exists (with the same treatment of multiple connections as
+        for array format). If SciPy is available these are
+        :class:`scipy.sparse.csr_matrix` objects, otherwise
+        :class:`SparseConnectionMatrix` objects, which hold the data in
+        coordinate format. The dense matrix is never constructed.
+
         Values will be expressed in the standard PyNN units (i.e. millivolts,
         nanoamps, milliseconds, microsiemens, nanofarads, event per second).
         """
@@ -326,10 +398,8 @@ class Projection(object):
                 names = ["presynaptic_index", "postsynaptic_index"] + names
             values = self._get_attributes_as_list(names)
             if gather and self._simulator.state.num_processes > 1:
-                all_values = {self._simulator.state.mpi_rank: values}
-                all_values = recording.gather_dict(all_values, all=(gather == 'all'))
-                if gather == 'all' or self._simulator.state.mpi_rank == 0:
-                    values = reduce(operator.add, all_values.values())
+                values = self._gather_attribute_values(values, len(names), gather)
+                values = [tuple(row) for row in values.tolist()]
             if not with_address and return_single:
                 values = [val[0] for val in values]
             return values
@@ -342,15 +412,13 @@ class Projection(object):
                 names = list(attribute_names)
                 names = ["presynaptic_index", "postsynaptic_index"] + names
                 values = self._get_attributes_as_list(names)
-                all_values = {self._simulator.state.mpi_rank: values}
-                all_values = recording.gather_dict(all_values, all=(gather == 'all'))
+                tmp_values = self._gather_attribute_values(values, len(names), gather)
                 if gather == 'all' or self._simulator.state.mpi_rank == 0:
-                    tmp_values = reduce(operator.add, all_values.values())
-                    values = self._get_attributes_as_arrays(attribute_names,
-                                                            multiple_synapses=multiple_synapses)
-                    tmp_values = numpy.array(tmp_values)
-                    for i in xrange(len(values)):
-                        values[i][tmp_values[:, 0].astype(int), tmp_values[:, 1].astype(int)] = tmp_values[:, 2 + i]
+                    values = [self._connection_matrix(tmp_values[:, 0].astype(int),
+                                                      tmp_values[:, 1].astype(int),
+                                                      tmp_values[:, 2 + i],
+                                                      multiple_synapses)
+                              for i in xrange(len(names) - 2)]
             else:
                 values = self._get_attributes_as_arrays(attribute_names,
                                                         multiple_synapses=multiple_synapses)
@@ -360,28 +428,86 @@ class Projection(object):
                 return values[0]
             else:
                 return values
+        elif format == 'sparse':
+            if multiple_synapses not in Projection.MULTI_SYNAPSE_OPERATIONS:
+                raise ValueError("`multiple_synapses` argument must be one of {}".format(list(Projection.MULTI_SYNAPSE_OPERATIONS)))
+            values = self._get_attributes_as_sparse(attribute_names, gather=gather,
+                                                    multiple_synapses=multiple_synapses)
+            if return_single:
+                return values[0]
+            else:
+                return values
         else:
-            raise Exception("format must be 'list' or 'array'")
+            raise Exception("format must be 'list', 'array' or 'sparse'")
 
     def _get_attributes_as_list(self, names):
         return [c.as_tuple(*names) for c in self.connections]
 
     def _get_attributes_as_arrays(self, names, multiple_synapses='sum'):
-        multi_synapse_operation = Projection.MULTI_SYNAPSE_OPERATIONS[multiple_synapses]
-        all_values = []
-        for attribute_name in names:
-            values = numpy.nan * numpy.ones((self.pre.size, self.post.size))
-            if attribute_name[-1] == "s":  # weights --> weight, delays --> delay
-                attribute_name = attribute_name[:-1]
-            for c in self.connections:
-                value = getattr(c, attribute_name)
-                addr = (c.presynaptic_index, c.postsynaptic_index)
-                if numpy.isnan(values[addr]):
-                    values[addr] = value
-                else:
-                    values[addr] = multi_synapse_operation(values[addr], value)
-            all_values.append(values)
-        return all_values
+        names = [name[:-1] if name[-1] == "s" else name  # weights --> weight, delays --> delay
+                 for name in names]
+        values = self._get_attributes_as_list(["presynaptic_index", "postsynaptic_index"] + names)
+        values = numpy.array(values, dtype=float).reshape((-1, 2 + len(names)))
+        presynaptic_indices = values[:, 0].astype(int)
+        postsynaptic_indices = values[:, 1].astype(int)
+        return [self._connection_matrix(presynaptic_indices, postsynaptic_indices,
+                                        values[:, 2 + i], multiple_synapses)
+                for i in range(len(names))]
+
+    def _connection_matrix(self, presynaptic_indices, postsynaptic_indices, values,
+                           multiple_synapses='sum'):
+        """
+        Return a 2D array with the same dimensions as the connectivity matrix,
+        containing `values` at the positions given by the index arrays, and NaN
+        where there is no connection. Where there are several connections
+        between the same pair of neurons, the values are combined according to
+        `multiple_synapses` (see :meth:`get`).
+        """
+        flat_indices = numpy.ravel_multi_index((presynaptic_indices, postsynaptic_indices), self.shape)
+        flat_indices, values = _combine_multiple_synapses(flat_indices, values, multiple_synapses)
+        matrix = numpy.nan * numpy.ones(self.shape)
+        matrix.reshape(-1)[flat_indices] = values
+        return matrix
+
+    def _gather_attribute_values(self, values, n_columns, gather=True):
+        """
+        Convert a list of connection attribute tuples, as returned by
+        `_get_attributes_as_list()`, into a 2D array with `n_columns` columns
+        and, if `gather` is set and this is a distributed simulation, gather
+        the arrays from all MPI nodes. When `gather` is True (rather than
+        'all'), only the root node receives the connections from the other
+        nodes; the other nodes get back their local connections.
+        """
+        values = numpy.array(values, dtype=float).reshape((-1, n_columns))
+        if gather and self._simulator.state.num_processes > 1:
+            all_values = recording.gather_array(values, all=(gather == 'all'))
+            if gather == 'all' or self._simulator.state.mpi_rank == 0:
+                values = all_values
+        return values
+
+    def _get_attributes_as_triplets(self, names, gather=True, multiple_synapses='sum'):
+        """
+        Return the addresses of all connections, as arrays of pre- and
+        post-synaptic indices, together with a list containing an array of
+        values for each attribute in `names`. Multiple connections between the
+        same pair of neurons are combined according to `multiple_synapses`.
+        """
+        values = self._get_attributes_as_list(["presynaptic_index", "postsynaptic_index"] + list(names))
+        values = self._gather_attribute_values(values, 2 + len(names), gather)
+        flat_indices = numpy.ravel_multi_index((values[:, 0].astype(int), values[:, 1].astype(int)),
+                                               self.shape)
+        combined_values = [_combine_multiple_synapses(flat_indices, values[:, 2 + i],
+                                                      multiple_synapses)[1]
+                           for i in range(len(names))]
+        presynaptic_indices, postsynaptic_indices = numpy.unravel_index(numpy.unique(flat_indices),
+                                                                        self.shape)
+        return presynaptic_indices, postsynaptic_indices, combined_values
+
+    def _get_attributes_as_sparse(self, names, gather=True, multiple_synapses='sum'):
+        presynaptic_indices, postsynaptic_indices, all_values = \
+            self._get_attributes_as_triplets(names, gather, multiple_synapses)
+        return [sparse_matrix(values, presynaptic_indices, postsynaptic_indices, self.shape)
+                for values in all_values]
 
     @deprecated("get('weight', format, gather)")
     def getWeights(self, format='list', gather=True):
@@ -400,11 +526,24 @@ class Projection(object):
         Print synaptic attributes (weights, delays, etc.) to file. In the array
         format, zeros are printed for non-existent connections.
 
+        In the sparse format, `file` should be a filename or a file object, and
+        the connections are written in NumPy .npz format, with arrays "i" and
+        "j" containing the pre- and post-synaptic indices, one array of values
+        for each attribute, and the "shape" of the connectivity matrix.
+        Multiple connections between the same pair of neurons are saved as
+        separate elements, in the order in which they were created. In a
+        distributed simulation with gather=False, each MPI process writes its
+        own connections, to a filename with the rank inserted before the
+        extension.
+
         Values will be expressed in the standard PyNN units (i.e. millivolts,
         nanoamps, milliseconds, microsiemens, nanofarads, event per second).
         """
         if attribute_names in ('all', 'connections'):
             attribute_names = self.synapse_type.get_parameter_names()
+        if format == 'sparse':
+            self._save_sparse(attribute_names, file, gather)
+            return
         if isinstance(file, basestring):
             file = recording.files.StandardTextFile(file, mode='wb')
         all_values = self.get(attribute_names, format=format, gather=gather, with_address=with_address)
@@ -418,6 +557,32 @@ class Projection(object):
             file.write(all_values, metadata)
             file.close()
 
+    def _save_sparse(self, attribute_names, file, gather=True):
+        if isinstance(attribute_names, basestring):
+            attribute_names = (attribute_names,)
+        names = list(attribute_names)
+        if isinstance(self.synapse_type, StandardSynapseType):
+            names = self.synapse_type.get_native_names(*names)
+        # multiple connections between the same pair of neurons are saved
+        # separately, so the file can be used to recreate the projection
+        values = self._get_attributes_as_list(["presynaptic_index", "postsynaptic_index"] + names)
+        values = self._gather_attribute_values(values, 2 + len(names), gather)
+        presynaptic_indices = values[:, 0].astype(int)
+        postsynaptic_indices = values[:, 1].astype(int)
+        order = numpy.lexsort((postsynaptic_indices, presynaptic_indices))
+        all_values = [values[order, 2 + i] for i in range(len(names))]
+        presynaptic_indices = presynaptic_indices[order]
+        postsynaptic_indices = postsynaptic_indices[order]
+        state = self._simulator.state
+        if gather and state.mpi_rank != 0:
+            return
+        if not gather and state.num_processes > 1 and isinstance(file, basestring):
+            root, extension = os.path.splitext(file)
+            file = "%s.%d%s" % (root, state.mpi_rank, extension)
+        arrays = dict(zip(attribute_names, all_values))
+        numpy.savez(file, i=presynaptic_indices, j=postsynaptic_indices,
+                    shape=numpy.array(self.shape), **arrays)
+
     @deprecated("save('all', file, format='list', gather=gather)")
     def saveConnections(self, file, gather=True, compatible_output=True):
         self.save('all', file, format='list', gather=gather)
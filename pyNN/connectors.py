@@ -17,6 +17,8 @@ from pyNN.parameters import LazyArray
 from pyNN.standardmodels import StandardSynapseType
 from pyNN.common import Population
 import numpy
+import os
+import re
 try:
     from itertools import izip
 except ImportError:  # python3.x
@@ -34,6 +36,16 @@ from lazyarray import arccos, arcsin, arctan, arctan2, ceil, cos, cosh, exp, \
                       sin, sinh, sqrt, tan, tanh, maximum, minimum
 from numpy import e, pi
 
+try:
+    import scipy.sparse
+    have_scipy = True
+except ImportError:
+    have_scipy = False
+try:
+    import numexpr
+    have_numexpr = True
+except ImportError:
+    have_numexpr = False
 try:
     import csa
     haveCSA = True
@@ -64,6 +76,7 @@ class Connector(object):
             a function that will be called with the fractional progress of the
             connection routine. An example would be `progress_bar.set_level`.
     """
+    chunk_size = 100000
 
     def __init__(self, safe=True, callback=None):
         """
@@ -120,6 +133,46 @@ class Connector(object):
                     parameter_space[name] = map(distance_map)
         return parameter_space
 
+    def _connect_with_values(self, projection, presynaptic_indices, postsynaptic_indices,
+                             connection_parameters):
+        """
+        Create the connections given by the arrays of pre- and post-synaptic
+        indices, which should contain only local post-synaptic neurons, sorted
+        by post-synaptic index.
+
+        `connection_parameters` is a dict containing, for some of the synaptic
+        parameters, an array with one value per connection. Other parameters
+        are taken from the synapse type. The parameters are translated and
+        evaluated for chunks of approximately `chunk_size` connections.
+        """
+        n = presynaptic_indices.size
+        start = 0
+        while start < n:
+            # chunks always contain all the connections to a given post-synaptic neuron
+            stop = min(start + self.chunk_size, n)
+            stop = numpy.searchsorted(postsynaptic_indices, postsynaptic_indices[stop - 1], 'right')
+            parameters = deepcopy(projection.synapse_type.parameter_space)
+            parameters.shape = (stop - start,)
+            parameters.update(**dict((name, value[start:stop])
+                                     for name, value in connection_parameters.items()))
+            if isinstance(projection.synapse_type, StandardSynapseType):
+                parameters = projection.synapse_type.translate(parameters)
+            parameters.evaluate()
+            sources = presynaptic_indices[start:stop]
+            targets = postsynaptic_indices[start:stop]
+            if hasattr(projection, "_bulk_connect"):
+                projection._bulk_connect(sources, targets, **parameters)
+            else:
+                local_targets, first = numpy.unique(targets, return_index=True)
+                bounds = numpy.append(first, stop - start)
+                for tgt, l, r in zip(local_targets, bounds[:-1], bounds[1:]):
+                    projection._convergent_connect(sources[l:r], tgt,
+                                                   **dict((name, value[l:r])
+                                                          for name, value in parameters.items()))
+            start = stop
+            if self.callback:
+                self.callback(start / n)
+
     def describe(self, template='connector_default.txt', engine='default'):
         """
         Returns a human-readable description of the connection method.
@@ -140,6 +193,10 @@ class MapConnector(Connector):
     Abstract base class for Connectors based on connection maps, where a map is a 2D lazy array
     containing either the (boolean) connectivity matrix (aka adjacency matrix, connection set mask, etc.)
     or the values of a synaptic connection parameter.
+
+    If the backend `Projection` provides a `_bulk_connect()` method, connections
+    are accumulated over blocks of post-synaptic neurons and passed to the
+    backend in chunks of approximately `chunk_size` connections.
     """
 
     def _standard_connect(self, projection, connection_map_generator, distance_map=None):
@@ -188,6 +245,10 @@ class MapConnector(Connector):
 
         parameter_space = self._parameters_from_synapse_type(projection, distance_map)
 
+        if hasattr(projection, "_bulk_connect"):
+            self._chunked_connect(projection, components, parameter_space)
+            return
+
         # Loop over columns of the connection_map array (equivalent to looping over post-synaptic neurons)
         for count, (col, postsynaptic_index, local, source_mask) in enumerate(izip(*components)):
             # `col`: column index
@@ -236,6 +297,110 @@ class MapConnector(Connector):
                     if self.callback:
                         self.callback(count / projection.post.local_size)
 
+    def _chunked_connect(self, projection, components, parameter_space):
+        """
+        Variant of the column-by-column loop in `_standard_connect()`, which
+        gathers the connections for blocks of post-synaptic neurons into flat
+        arrays of (pre, post) indices and passes them to
+        `projection._bulk_connect()`.
+
+        Parameter values are evaluated once per chunk, for the connections
+        that exist, in the same (column-major) order as in the per-column loop,
+        so random numbers are drawn in the same sequence.
+        """
+        n_columns = len(components[0])
+        pending = []
+        n_pending = 0
+        for count, (col, postsynaptic_index, local, source_mask) in enumerate(izip(*components), 1):
+            if source_mask is True:
+                sources = numpy.arange(projection.pre.size, dtype=int)
+            elif source_mask is False:
+                continue
+            elif source_mask.dtype == bool:
+                sources = source_mask.nonzero()[0]
+            else:
+                sources = numpy.asarray(source_mask, dtype=int)
+            if sources.size == 0:
+                continue
+            pending.append((col, postsynaptic_index, local, sources))
+            n_pending += sources.size
+            if n_pending >= self.chunk_size:
+                self._connect_chunk(projection, pending, parameter_space)
+                pending = []
+                n_pending = 0
+                if self.callback:
+                    self.callback(count / n_columns)
+        if pending:
+            self._connect_chunk(projection, pending, parameter_space)
+        if self.callback:
+            self.callback(1.0)
+
+    def _connect_chunk(self, projection, pending, parameter_space):
+        columns, postsynaptic_indices, local, sources = zip(*pending)
+        counts = [s.size for s in sources]
+        presynaptic_indices = numpy.concatenate(sources)
+        column_indices = numpy.repeat(columns, counts)
+        postsynaptic_indices = numpy.repeat(postsynaptic_indices, counts)
+
+        # Evaluate the lazy arrays containing the synaptic parameters
+        connection_parameters = {}
+        for name, map in parameter_space.items():
+            if map.is_homogeneous:
+                connection_parameters[name] = map.evaluate(simplify=True)
+            else:
+                connection_parameters[name] = map[presynaptic_indices, column_indices]
+
+        # If iterating over all columns (parallel-safe RNGs) keep only the local connections
+        if not all(local):
+            local_mask = numpy.repeat(local, counts).astype(bool)
+            if not local_mask.any():
+                return
+            n = presynaptic_indices.size
+            presynaptic_indices = presynaptic_indices[local_mask]
+            postsynaptic_indices = postsynaptic_indices[local_mask]
+            for name, value in connection_parameters.items():
+                if isinstance(value, numpy.ndarray) and value.shape == (n,):
+                    connection_parameters[name] = value[local_mask]
+        projection._bulk_connect(presynaptic_indices, postsynaptic_indices, **connection_parameters)
+
+    def _tiled_connection_map_generator(self, projection, probability_function):
+        """
+        Return a connection map generator, for use with `_standard_connect()`,
+        which evaluates the connection probabilities for tiles of the
+        connectivity matrix at a time, and compares them with uniform random
+        numbers drawn from `self.rng`.
+
+        `probability_function(i, j)` is called with two 2D arrays, of the same
+        shape, containing the pre- and post-synaptic indices of the tile.
+
+        Tiles contain approximately `chunk_size` elements. The random numbers
+        are drawn in the same (column-major) order as when evaluating a
+        connection map column by column.
+        """
+        source_filter = self._get_source_filter(projection)
+        n_rows = projection.pre.size
+        rows_per_tile = max(1, min(n_rows, self.chunk_size))
+        columns_per_tile = max(1, self.chunk_size // max(n_rows, 1))
+
+        def connection_map_generator(mask=None):
+            columns = numpy.arange(projection.post.size)
+            if mask is not None:
+                columns = columns[mask]
+            for start in range(0, columns.size, columns_per_tile):
+                tile_columns = columns[start:start + columns_per_tile]
+                connected = numpy.empty((n_rows, tile_columns.size), dtype=bool)
+                for row_start in range(0, n_rows, rows_per_tile):
+                    rows = numpy.arange(row_start, min(row_start + rows_per_tile, n_rows))
+                    i, j = numpy.meshgrid(rows, tile_columns, indexing='ij')
+                    p = numpy.empty(i.shape)
+                    p[...] = probability_function(i, j)  # the function may return a scalar
+                    random_values = self.rng.next(i.size, 'uniform', {"low": 0.0, "high": 1.0},
+                                                  mask=None).reshape((tile_columns.size, rows.size)).T
+                    connected[rows] = random_values < p
+                for k, col in enumerate(tile_columns):
+                    yield source_filter(connected[:, k].nonzero()[0], col)
+        return connection_map_generator
+
     def _connect_with_map(self, projection, connection_map, distance_map=None):
         """
         Create connections according to a connection map.
@@ -267,6 +432,30 @@ class MapConnector(Connector):
             connection_map = LazyArray(a != b, shape=projection.shape)
         return connection_map
 
+    def _get_source_filter(self, projection):
+        """
+        Return a function `f(sources, col)` which removes, from an array of
+        pre-synaptic indices `sources` for the post-synaptic neuron with index
+        `col`, the self-connections or mutual connections excluded by
+        `self.allow_self_connections`. Used by connectors which generate
+        arrays of indices rather than a connection map.
+        """
+        same_population = (isinstance(projection.pre, Population)
+                           and isinstance(projection.post, Population)
+                           and projection.pre == projection.post)
+        if self.allow_self_connections == 'NoMutual':
+            if not same_population:
+                raise NotImplementedError("todo")
+            return lambda sources, col: sources[sources > col]
+        elif not self.allow_self_connections:
+            if same_population:
+                return lambda sources, col: sources[sources != col]
+            pre_ids = numpy.asarray(projection.pre.all_cells)
+            post_ids = numpy.asarray(projection.post.all_cells)
+            return lambda sources, col: sources[pre_ids[sources] != post_ids[col]]
+        else:
+            return lambda sources, col: sources
+
     def _get_connection_map_no_mutual_connections(self, projection):
         if (isinstance(projection.pre, Population)
               and isinstance(projection.post, Population)
@@ -327,11 +516,19 @@ class FixedProbabilityConnector(MapConnector):
             or only to other neurons in the Population.
         `rng`:
             an :class:`RNG` instance used to evaluate whether connections exist
+        `sparse`:
+            if True, rather than drawing one random number per potential
+            connection, the gaps between successive connected pre-synaptic
+            neurons are drawn from a geometric distribution, so that the
+            number of random numbers drawn is proportional to the number of
+            connections created. This is much faster for small values of
+            `p_connect`, but produces a different (statistically equivalent)
+            connectivity for a given random number generator seed.
     """
     parameter_names = ('allow_self_connections', 'p_connect')
 
     def __init__(self, p_connect, allow_self_connections=True,
-                 rng=None, safe=True, callback=None):
+                 rng=None, safe=True, callback=None, sparse=False):
         """
         Create a new connector.
         """
@@ -341,8 +538,48 @@ class FixedProbabilityConnector(MapConnector):
         self.p_connect = float(p_connect)
         assert 0 <= self.p_connect
         self.rng = _get_rng(rng)
+        self.sparse = sparse
+
+    def _sample_sources(self, n):
+        """
+        Return the (sorted) indices of the pre-synaptic neurons, out of `n`,
+        connected to a single post-synaptic neuron, using geometric gap
+        sampling.
+        """
+        if self.p_connect >= 1:
+            return numpy.arange(n)
+        if self.p_connect == 0 or n == 0:
+            return numpy.array([], dtype=int)
+        log_q = numpy.log1p(-self.p_connect)
+        expected = n * self.p_connect
+        batch_size = int(expected + 4 * numpy.sqrt(expected)) + 10
+        positions = []
+        last = -1
+        while last < n:
+            u = self.rng.next(batch_size, 'uniform', {"low": 0.0, "high": 1.0}, mask=None)
+            gaps = numpy.floor(numpy.log1p(-u) / log_q).astype(int) + 1
+            batch = last + numpy.cumsum(gaps)
+            positions.append(batch)
+            last = batch[-1]
+        sources = numpy.concatenate(positions)
+        return sources[sources < n]
+
+    def _sparse_connection_map_generator(self, projection):
+        source_filter = self._get_source_filter(projection)
+
+        def connection_map_generator(mask=None):
+            columns = numpy.arange(projection.post.size)
+            if mask is not None:
+                columns = columns[mask]
+            for col in columns:
+                yield source_filter(self._sample_sources(projection.pre.size), col)
+        return connection_map_generator
 
     def connect(self, projection):
+        if self.sparse:
+            self._standard_connect(projection,
+                                   self._sparse_connection_map_generator(projection))
+            return
         random_map = LazyArray(RandomDistribution('uniform', (0, 1), rng=self.rng),
                                projection.shape)
         connection_map = random_map < self.p_connect
@@ -371,11 +608,24 @@ class DistanceDependentProbabilityConnector(MapConnector):
             or only to other neurons in the Population.
         `rng`:
             an :class:`RNG` instance used to evaluate whether connections exist
+        `max_distance`:
+            if given, the connection probability is assumed to be zero for
+            distances greater than `max_distance`. Only pairs of neurons closer
+            than this are then considered, found using a spatial index, so
+            that for local connectivity the time taken scales approximately
+            linearly with the number of neurons. If `max_distance` is "auto",
+            it is determined from `d_expression`, which must be of the form
+            "d<3" or "exp(-d)*(d<3)". Note that this draws fewer random numbers
+            than the default method, and so produces a different (statistically
+            equivalent) connectivity for a given random number generator seed.
+
+    If the numexpr package is installed, string expressions are evaluated with
+    it where possible.
     """
     parameter_names = ('allow_self_connections', 'd_expression')
 
     def __init__(self, d_expression, allow_self_connections=True,
-                 rng=None, safe=True, callback=None):
+                 rng=None, safe=True, callback=None, max_distance=None):
         """
         Create a new connector.
         """
@@ -391,21 +641,86 @@ class DistanceDependentProbabilityConnector(MapConnector):
         self.d_expression = d_expression
         self.allow_self_connections = allow_self_connections
         self.distance_function = eval("lambda d: %s" % self.d_expression)
+        self._use_numexpr = False
+        if have_numexpr and isinstance(d_expression, str):
+            try:
+                numexpr.evaluate(d_expression, local_dict={"d": numpy.ones(2), "pi": pi, "e": e})
+                self._use_numexpr = True
+            except Exception:  # expression uses functions not supported by numexpr
+                pass
         self.rng = _get_rng(rng)
+        if max_distance == "auto":
+            max_distance = self._find_max_distance()
+        self.max_distance = max_distance
+
+    def _find_max_distance(self):
+        """
+        Find the distance beyond which `d_expression` is zero, for expressions
+        containing a cut-off such as "d<3" or "d <= 3".
+        """
+        errmsg = "Unable to determine the maximum distance from %s, please specify max_distance" % self.d_expression
+        if not isinstance(self.d_expression, str):
+            raise ValueError(errmsg)
+        cutoffs = re.findall(r"\bd\s*<=?\s*([0-9.]+(?:[eE][-+]?[0-9]+)?)", self.d_expression)
+        if not cutoffs:
+            raise ValueError(errmsg)
+        max_distance = max(float(x) for x in cutoffs)
+        # check that the probability really is zero beyond the cut-off
+        d = max_distance * (1 + numpy.logspace(-9, 12, 100)) + numpy.logspace(-9, 12, 100)
+        if numpy.any(numpy.asarray(self.distance_function(d))):
+            raise ValueError(errmsg)
+        return max_distance
+
+    def _probability(self, d):
+        """Evaluate the connection probability for an array of distances."""
+        if self._use_numexpr:
+            return numexpr.evaluate(self.d_expression, local_dict={"d": d, "pi": pi, "e": e})
+        return self.distance_function(d)
+
+    def _local_connection_map_generator(self, projection):
+        """
+        Generate the pre-synaptic indices for each post-synaptic neuron,
+        considering only those pre-synaptic neurons within `max_distance`.
+        """
+        source_filter = self._get_source_filter(projection)
+        pre_positions = projection.pre.positions.T
+        post_positions = projection.post.positions.T
+
+        def connection_map_generator(mask=None):
+            columns = numpy.arange(projection.post.size)
+            if mask is not None:
+                columns = columns[mask]
+            neighbours = projection.space.neighbours(pre_positions, post_positions[columns],
+                                                     self.max_distance)
+            for col, sources in izip(columns, neighbours):
+                if sources.size > 0:
+                    d = projection.space.paired_distances(
+                            pre_positions[sources],
+                            numpy.repeat(post_positions[col:col + 1], sources.size, axis=0))
+                    sources, d = sources[d <= self.max_distance], d[d <= self.max_distance]
+                if sources.size > 0:
+                    random_values = self.rng.next(sources.size, 'uniform', {"low": 0.0, "high": 1.0}, mask=None)
+                    sources = sources[random_values < self._probability(d)]
+                yield source_filter(sources, col)
+        return connection_map_generator
 
     def connect(self, projection):
         distance_map = self._generate_distance_map(projection)
-        probability_map = self.distance_function(distance_map)
-        random_map = LazyArray(RandomDistribution('uniform', (0, 1), rng=self.rng),
-                               projection.shape)
-        connection_map = random_map < probability_map
-        if not self.allow_self_connections:
-            mask = self._get_connection_map_no_self_connections(projection)
-            connection_map *= mask
-        elif self.allow_self_connections == 'NoMutual':
-            mask = self._get_connection_map_no_mutual_connections(projection)
-            connection_map *= mask
-        self._connect_with_map(projection, connection_map, distance_map)
+        if self.max_distance is not None:
+            self._standard_connect(projection,
+                                   self._local_connection_map_generator(projection),
+                                   distance_map)
+            return
+        pre_positions = projection.pre.positions.T
+        post_positions = projection.post.positions.T
+
+        def probability(i, j):
+            d = projection.space.paired_distances(pre_positions[i.reshape(-1)],
+                                                  post_positions[j.reshape(-1)])
+            return self._probability(d).reshape(i.shape)
+        self._standard_connect(projection,
+                               self._tiled_connection_map_generator(projection, probability),
+                               distance_map)
 
 
 class IndexBasedProbabilityConnector(MapConnector):
@@ -413,6 +728,9 @@ class IndexBasedProbabilityConnector(MapConnector):
     For each pair of pre-post cells, the connection probability depends on an arbitrary functions
     that takes the indices of the pre and post populations.
 
+    The function is evaluated for tiles of the connectivity matrix at a time,
+    i.e. it is called with two 2D arrays of pre- and post-synaptic indices.
+
     Takes any of the standard :class:`Connector` optional arguments and, in
     addition:
 
@@ -446,17 +764,8 @@ class IndexBasedProbabilityConnector(MapConnector):
         # function, which is probably unexpected behaviour.
         index_expression = copy(self.index_expression)
         index_expression.projection = projection
-        probability_map = LazyArray(index_expression, projection.shape)
-        random_map = LazyArray(RandomDistribution('uniform', (0, 1), rng=self.rng),
-                               projection.shape)
-        connection_map = random_map < probability_map
-        if not self.allow_self_connections:
-            mask = self._get_connection_map_no_self_connections(projection)
-            connection_map *= mask
-        elif self.allow_self_connections == 'NoMutual':
-            mask = self._get_connection_map_no_mutual_connections(projection)
-            connection_map *= mask
-        self._connect_with_map(projection, connection_map)
+        self._standard_connect(projection,
+                               self._tiled_connection_map_generator(projection, index_expression))
 
 
 class DisplacementDependentProbabilityConnector(IndexBasedProbabilityConnector):
@@ -470,12 +779,24 @@ class DisplacementDependentProbabilityConnector(IndexBasedProbabilityConnector):
         def __init__(self, disp_function):
             """
             `disp_function`: a function that takes a 3xN numpy position matrix and maps each row
-                             (displacement) to a probability between 0 and 1
+                             (displacement) to a probability between 0 and 1. It
+                             may also be called with a 3xMxN array, for a tile of
+                             the connectivity matrix.
             """
             self._disp_function = disp_function
 
+        def _positions(self):
+            # positions are cached, since for views and assemblies they are
+            # recalculated on each access
+            if getattr(self, "_positions_projection", None) is not self.projection:
+                self._pre_positions = self.projection.pre.positions.T
+                self._post_positions = self.projection.post.positions.T
+                self._positions_projection = self.projection
+            return self._pre_positions, self._post_positions
+
         def __call__(self, i, j):
-            disp = (self.projection.post.positions.T[j] - self.projection.pre.positions.T[i]).T
+            pre_positions, post_positions = self._positions()
+            disp = numpy.rollaxis(post_positions[j] - pre_positions[i], -1)
             return self._disp_function(disp)
 
     def __init__(self, disp_function, allow_self_connections=True,
@@ -516,66 +837,67 @@ class FromListConnector(Connector):
         Connector.__init__(self, safe=safe, callback=callback)
         self.conn_list = numpy.array(conn_list)
         if len(conn_list) > 0:
-            n_columns = self.conn_list.shape[1]
-            if column_names is None:
-                if n_columns == 2:
-                    self.column_names = ()
-                elif n_columns == 4:
-                    self.column_names = ('weight', 'delay')
-                else:
-                    raise TypeError("Argument 'column_names' is required.")
-            else:
-                self.column_names = column_names
-                if n_columns != len(self.column_names) + 2:
-                    raise ValueError("connection list has %d parameter columns, but %d column names provided." % (
-                                    n_columns - 2, len(self.column_names)))
+            self.column_names = self._get_column_names(self.conn_list.shape[1], column_names)
         else:
             self.column_names = ()
 
+    def _get_column_names(self, n_columns, column_names=None):
+        if column_names is None:
+            if n_columns == 2:
+                return ()
+            elif n_columns == 4:
+                return ('weight', 'delay')
+            else:
+                raise TypeError("Argument 'column_names' is required.")
+        else:
+            if n_columns != len(column_names) + 2:
+                raise ValueError("connection list has %d parameter columns, but %d column names provided." % (
+                                n_columns - 2, len(column_names)))
+            return column_names
 
-    def connect(self, projection):
-        """Connect-up a Projection."""
-        logger.debug("conn_list (original) = \n%s", self.conn_list)
+    def _check_column_names(self, projection):
         synapse_parameter_names = projection.synapse_type.get_parameter_names()
         for name in self.column_names:
             if name not in synapse_parameter_names:
                 raise ValueError("%s is not a valid parameter for %s" % (
                                  name, projection.synapse_type.__class__.__name__))
+
+    def _select_local(self, projection, conn_list):
+        """
+        Select the connections to local post-synaptic neurons from the 2D
+        array `conn_list` and sort them by post-synaptic index, unless they are
+        already sorted.
+
+        Returns the arrays of pre- and post-synaptic indices and a dict
+        containing an array of values for each parameter column.
+        """
+        if numpy.any(conn_list[:, 0] >= projection.pre.size):
+            raise errors.ConnectionError("source index out of range")
+        targets = conn_list[:, 1].astype(int)
+        if numpy.any(targets >= projection.post.size):
+            raise errors.ConnectionError("target index out of range")
+        local = projection.post._mask_local[targets]
+        if not local.all():
+            conn_list = conn_list[local]
+            targets = targets[local]
+        if numpy.any(targets[1:] < targets[:-1]):
+            order = numpy.argsort(targets, kind='mergesort')
+            conn_list = conn_list[order]
+            targets = targets[order]
+        column_values = dict((name, conn_list[:, col])
+                             for col, name in enumerate(self.column_names, 2))
+        return conn_list[:, 0].astype(int), targets, column_values
+
+    def connect(self, projection):
+        """Connect-up a Projection."""
+        logger.debug("conn_list (original) = \n%s", self.conn_list)
+        self._check_column_names(projection)
         if self.conn_list.size == 0:
             return
-        if numpy.any(self.conn_list[:, 0] >= projection.pre.size):
-            raise errors.ConnectionError("source index out of range")
-        # need to do some profiling, to figure out the best way to do this:
-        #  - order of sorting/filtering by local
-        #  - use numpy.unique, or just do in1d(self.conn_list)?
-        idx = numpy.argsort(self.conn_list[:, 1])
-        targets = numpy.unique(self.conn_list[:, 1]).astype(numpy.int)
-        local = numpy.in1d(targets,
-                           numpy.arange(projection.post.size)[projection.post._mask_local],
-                           assume_unique=True)
-        local_targets = targets[local]
-        self.conn_list = self.conn_list[idx]
-        left = numpy.searchsorted(self.conn_list[:, 1], local_targets, 'left')
-        right = numpy.searchsorted(self.conn_list[:, 1], local_targets, 'right')
-        logger.debug("idx = %s", idx)
-        logger.debug("targets = %s", targets)
-        logger.debug("local_targets = %s", local_targets)
-        logger.debug("conn_list (sorted by target) = \n%s", self.conn_list)
-        logger.debug("left = %s", left)
-        logger.debug("right = %s", right)
-
-        for tgt, l, r in zip(local_targets, left, right):
-            sources = self.conn_list[l:r, 0].astype(numpy.int)
-            connection_parameters = deepcopy(projection.synapse_type.parameter_space)
-
-            connection_parameters.shape = (r - l,)
-            for col, name in enumerate(self.column_names, 2):
-                connection_parameters.update(**{name: self.conn_list[l:r, col]})
-            if isinstance(projection.synapse_type, StandardSynapseType):
-                connection_parameters = projection.synapse_type.translate(
-                                            connection_parameters)
-            connection_parameters.evaluate()
-            projection._convergent_connect(sources, tgt, **connection_parameters)
+        presynaptic_indices, postsynaptic_indices, column_values = \
+            self._select_local(projection, self.conn_list)
+        self._connect_with_values(projection, presynaptic_indices, postsynaptic_indices,
+                                  column_values)
 
 
 class FromFileConnector(FromListConnector):
@@ -586,6 +908,12 @@ class FromFileConnector(FromListConnector):
         `file`:
             either an open file object or the filename of a file containing a
             list of connections, in the format required by `FromListConnector`.
+            Files with the extension ".npy" are memory-mapped
+            (:class:`~pyNN.recording.files.NumpyArrayFile`), files with the
+            extension ".h5" or ".hdf5" are read with
+            :class:`~pyNN.recording.files.HDF5ArrayFile`, other files are
+            read as text. The file is read in chunks of `chunk_size` rows, so
+            that only the connections to local neurons are held in memory.
             Column headers, if included in the file,  must be specified using
             a list or tuple, e.g.::
 
@@ -602,30 +930,46 @@ class FromFileConnector(FromListConnector):
             this check is skipped.
         `callback`:
             if True, display a progress bar on the terminal.
+        `column_names`:
+            the names of the parameter columns, for files that do not contain
+            column headers.
     """
     parameter_names = ('file', 'distributed')
 
-    def __init__(self, file, distributed=False, safe=True, callback=None):
+    def __init__(self, file, distributed=False, safe=True, callback=None, column_names=None):
         """
         Create a new connector.
         """
         Connector.__init__(self, safe=safe, callback=callback)
         if isinstance(file, basestring):
-            file = files.StandardTextFile(file, mode='r')
+            extension = os.path.splitext(file)[1]
+            if extension == ".npy":
+                file = files.NumpyArrayFile(file, mode='rb')
+            elif extension in (".h5", ".hdf5"):
+                if not files.have_hdf5:
+                    raise ImportError("Reading connections from HDF5 files requires PyTables")
+                file = files.HDF5ArrayFile(file, mode='r')
+            else:
+                file = files.StandardTextFile(file, mode='r')
         self.file = file
         self.distributed = distributed
+        self._column_names = column_names
 
     def connect(self, projection):
         """Connect-up a Projection."""
         if self.distributed:
             self.file.rename("%s.%d" % (self.file.name,
                                         projection._simulator.state.mpi_rank))
-        self.column_names = self.file.get_metadata().get('columns', ('weight', 'delay'))
-        for ignore in "ij":
-            if ignore in self.column_names:
-                self.column_names.remove(ignore)
-        self.conn_list = self.file.read()
-        FromListConnector.connect(self, projection)
+        column_names = self.file.get_metadata().get('columns', self._column_names)
+        if column_names is not None:
+            column_names = [name for name in column_names if name not in ("i", "j")]
+        for chunk in self.file.read_chunks(self.chunk_size):
+            self.column_names = self._get_column_names(chunk.shape[1], column_names)
+            self._check_column_names(projection)
+            presynaptic_indices, postsynaptic_indices, column_values = \
+                self._select_local(projection, chunk)
+            self._connect_with_values(projection, presynaptic_indices, postsynaptic_indices,
+                                      column_values)
 
 
 class FixedNumberConnector(MapConnector):
@@ -651,17 +995,86 @@ class FixedNumberConnector(MapConnector):
             raise TypeError("n must be an integer or a RandomDistribution object")
         self.rng = _get_rng(rng)
 
-    def _rng_uniform_int_exclude(self, n, size, exclude):
-        res = self.rng.next(n, 'uniform_int', {"low": 0, "high": size}, mask=None)
-        logger.debug("RNG0 res=%s" % res)
-        idx = numpy.where(res == exclude)[0]
-        logger.debug("RNG1 exclude=%d, res=%s idx=%s" % (exclude, res, idx))
-        while idx.size > 0:
-            redrawn = self.rng.next(idx.size, 'uniform_int', {"low": 0, "high": size}, mask=None)
-            res[idx] = redrawn
-            idx = idx[numpy.where(res == exclude)[0]]
-            logger.debug("RNG2 exclude=%d redrawn=%s res=%s idx=%s" % (exclude, redrawn, res, idx))
-        return res
+    def _get_counts(self, size, mask=None):
+        """
+        Return an array containing the number of connections for each of
+        `size` neurons (or for those selected by `mask`).
+        """
+        if mask is not None and not (isinstance(self.n, RandomDistribution)
+                                     and self.n.rng.parallel_safe):
+            size = mask.sum()
+            mask = None
+        if isinstance(self.n, int):
+            counts = numpy.repeat(self.n, size)
+        else:
+            counts = numpy.asarray(self.n.next(size)).reshape((-1,))
+            if mask is not None:
+                counts = counts[mask]
+        return counts.astype(int)
+
+    def _sample_without_replacement(self, k, size, rows):
+        """
+        Return an array of shape (rows, k), each row of which contains `k`
+        distinct integers drawn at random from range(size).
+        """
+        if k == 0 or rows == 0:
+            return numpy.zeros((rows, k), dtype=int)
+        if 2 * k > size:
+            # cheaper to choose the values to be left out
+            left_out = self._sample_without_replacement(size - k, size, rows)
+            keep = numpy.ones((rows, size), dtype=bool)
+            keep[numpy.arange(rows)[:, numpy.newaxis], left_out] = False
+            return numpy.nonzero(keep)[1].reshape((rows, k))
+        sample = self.rng.next(rows * k, 'uniform_int', {"low": 0, "high": size},
+                               mask=None).astype(int).reshape((rows, k))
+        row_indices = numpy.arange(rows)[:, numpy.newaxis]
+        while True:
+            # redraw duplicated values until all values in each row are distinct
+            order = numpy.argsort(sample, axis=1, kind='mergesort')
+            sorted_sample = sample[row_indices, order]
+            duplicated = numpy.zeros_like(sample, dtype=bool)
+            duplicated[:, 1:] = sorted_sample[:, 1:] == sorted_sample[:, :-1]
+            n_duplicates = duplicated.sum()
+            if n_duplicates == 0:
+                return sample
+            redraw = numpy.zeros_like(duplicated)
+            redraw[row_indices, order] = duplicated
+            sample[redraw] = self.rng.next(n_duplicates, 'uniform_int',
+                                           {"low": 0, "high": size}, mask=None)
+
+    def _sample(self, counts, size, exclude=None):
+        """
+        For each element of `counts`, choose `counts[i]` integers from
+        range(`size`), according to `self.with_replacement`. If `exclude` is
+        given, the value `exclude[i]` is never chosen for element `i`.
+
+        Returns a flat array containing the chosen values for each element of
+        `counts` in turn.
+        """
+        total = counts.sum()
+        n_allowed = size if exclude is None else size - 1
+        owners = numpy.repeat(numpy.arange(counts.size), counts)
+        if self.with_replacement:
+            chosen = self.rng.next(total, 'uniform_int', {"low": 0, "high": n_allowed},
+                                   mask=None).astype(int)
+        else:
+            # where n > size, first all values are chosen one or more times,
+            # then the remainder are chosen randomly
+            chosen = numpy.empty(total, dtype=int)
+            position = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            full = position < numpy.repeat(counts // n_allowed * n_allowed, counts)
+            chosen[full] = position[full] % n_allowed
+            remainders = counts % n_allowed
+            for k in numpy.unique(remainders[remainders > 0]):
+                rows = numpy.nonzero(remainders == k)[0]
+                row_mask = numpy.zeros(counts.size, dtype=bool)
+                row_mask[rows] = True
+                chosen[~full & row_mask[owners]] = \
+                    self._sample_without_replacement(k, n_allowed, rows.size).flatten()
+        if exclude is not None:
+            # shift values to skip over the excluded value
+            chosen[chosen >= exclude[owners]] += 1
+        return chosen
 
 
 class FixedNumberPostConnector(FixedNumberConnector):
@@ -703,43 +1116,24 @@ class FixedNumberPostConnector(FixedNumberConnector):
             are created.
     """
 
-    def _get_num_post(self):
-        if isinstance(self.n, int):
-            n_post = self.n
-        else:
-            n_post = self.n.next()
-        return n_post
-
     def connect(self, projection):
-        connections = [[] for i in range(projection.post.size)]
-        for source_index in range(projection.pre.size):
-            n = self._get_num_post()
-            if self.with_replacement:
-                if not self.allow_self_connections and projection.pre == projection.post:
-                    targets = self._rng_uniform_int_exclude(n, projection.post.size, source_index)
-                else:
-                    targets = self.rng.next(n, 'uniform_int', {"low": 0, "high": projection.post.size}, mask=None)
-            else:
-                all_cells = numpy.arange(projection.post.size)
-                if not self.allow_self_connections and projection.pre == projection.post:
-                    all_cells = all_cells[all_cells != source_index]
-                full_sets = n // all_cells.size
-                remainder = n % all_cells.size
-                target_sets = []
-                if full_sets > 0:
-                    target_sets = [all_cells] * full_sets
-                if remainder > 0:
-                    target_sets.append(self.rng.permutation(all_cells)[:remainder])
-                targets = numpy.hstack(target_sets)
-            assert targets.size == n
-            for target_index in targets:
-                connections[target_index].append(source_index)
+        # draw the targets of all pre-synaptic neurons in one go, then sort
+        # the connections by target to obtain the sources of each target
+        counts = self._get_counts(projection.pre.size)
+        exclude = None
+        if not self.allow_self_connections and projection.pre == projection.post:
+            exclude = numpy.arange(projection.pre.size)
+        targets = self._sample(counts, projection.post.size, exclude)
+        sources = numpy.repeat(numpy.arange(projection.pre.size), counts)
+        order = numpy.argsort(targets, kind='mergesort')
+        boundaries = numpy.cumsum(numpy.bincount(targets, minlength=projection.post.size))[:-1]
+        connections = numpy.split(sources[order], boundaries)
 
         def build_source_masks(mask=None):
             if mask is None:
-                return [numpy.array(x) for x in connections]
+                return connections
             else:
-                return [numpy.array(x) for x in numpy.array(connections)[mask]]
+                return [x for x, local in izip(connections, mask) if local]
         self._standard_connect(projection, build_source_masks)
 
 
@@ -782,83 +1176,17 @@ class FixedNumberPreConnector(FixedNumberConnector):
             are created.
     """
 
-    def _get_num_pre(self, size, mask=None):
-        if isinstance(self.n, int):
-            if mask is None:
-                n_pre = repeat(self.n, size)
-            else:
-                n_pre = repeat(self.n, mask.sum())
-        else:
-            if mask is None:
-                n_pre = self.n.next(size)
-            else:
-                if self.n.rng.parallel_safe:
-                    n_pre = self.n.next(size)[mask]
-                else:
-                    n_pre = self.n.next(mask.sum())
-        return n_pre
-
     def connect(self, projection):
-        if self.with_replacement:
-            if self.allow_self_connections or projection.pre != projection.post:
-                def build_source_masks(mask=None):
-                    n_pre = self._get_num_pre(projection.post.size, mask)
-                    for n in n_pre:
-                        sources = self.rng.next(n, 'uniform_int', {"low": 0, "high": projection.pre.size}, mask=None)
-                        assert sources.size == n
-                        yield sources
-            else:
-                def build_source_masks(mask=None):
-                    n_pre = self._get_num_pre(projection.post.size, mask)
-                    if self.rng.parallel_safe or mask is None:
-                        for i, n in enumerate(n_pre):
-                            sources = self._rng_uniform_int_exclude(n, projection.pre.size, i)
-                            assert sources.size == n
-                            yield sources
-                    else:
-                        # TODO: use mask to obtain indices i
-                        raise NotImplementedError("allow_self_connections=False currently requires a parallel safe RNG.")
-        else:
-            if self.allow_self_connections or projection.pre != projection.post:
-                def build_source_masks(mask=None):
-                    # where n > projection.pre.size, first all pre-synaptic cells
-                    # are connected one or more times, then the remainder
-                    # are chosen randomly
-                    n_pre = self._get_num_pre(projection.post.size, mask)
-                    all_cells = numpy.arange(projection.pre.size)
-                    for n in n_pre:
-                        full_sets = n // projection.pre.size
-                        remainder = n % projection.pre.size
-                        source_sets = []
-                        if full_sets > 0:
-                            source_sets = [all_cells] * full_sets
-                        if remainder > 0:
-                            source_sets.append(self.rng.permutation(all_cells)[:remainder])
-                        sources = numpy.hstack(source_sets)
-                        assert sources.size == n
-                        yield sources
-            else:
-                def build_source_masks(mask=None):
-                    # where n > projection.pre.size, first all pre-synaptic cells
-                    # are connected one or more times, then the remainder
-                    # are chosen randomly
-                    n_pre = self._get_num_pre(projection.post.size, mask)
-                    all_cells = numpy.arange(projection.pre.size)
-                    if self.rng.parallel_safe or mask is None:
-                        for i, n in enumerate(n_pre):
-                            full_sets = n // (projection.pre.size - 1)
-                            remainder = n % (projection.pre.size - 1)
-                            allowed_cells = all_cells[all_cells != i]
-                            source_sets = []
-                            if full_sets > 0:
-                                source_sets = [allowed_cells] * full_sets
-                            if remainder > 0:
-                                source_sets.append(self.rng.permutation(allowed_cells)[:remainder])
-                            sources = numpy.hstack(source_sets)
-                            assert sources.size == n
-                            yield sources
-                    else:
-                        raise NotImplementedError("allow_self_connections=False currently requires a parallel safe RNG.")
+        def build_source_masks(mask=None):
+            columns = numpy.arange(projection.post.size)
+            if mask is not None:
+                columns = columns[mask]
+            counts = self._get_counts(projection.post.size, mask)
+            exclude = None
+            if not self.allow_self_connections and projection.pre == projection.post:
+                exclude = columns
+            sources = self._sample(counts, projection.pre.size, exclude)
+            return numpy.split(sources, numpy.cumsum(counts)[:-1])
 
         self._standard_connect(projection, build_source_masks)
 
@@ -879,10 +1207,16 @@ class OneToOneConnector(MapConnector):
         self._connect_with_map(projection, connection_map)
 
 
-class SmallWorldConnector(Connector):
+class SmallWorldConnector(MapConnector):
     """
     Connect cells so as to create a small-world network.
 
+    Each pre-synaptic neuron is first connected to all the post-synaptic
+    neurons within distance `degree` (a "lattice", defined by the cell
+    positions and the projection's `space`), then each of these connections
+    is rewired, with probability `rewiring`, to a post-synaptic neuron chosen
+    at random from the whole population (Watts and Strogatz, 1998).
+
     Takes any of the standard :class:`Connector` optional arguments and, in
     addition:
 
@@ -896,11 +1230,14 @@ class SmallWorldConnector(Connector):
             or only to other neurons in the Population.
         `n_connections`:
             if specified, the number of efferent synaptic connections per neuron.
+            These are chosen at random from the local connections before
+            rewiring (neurons with fewer local neighbours keep all of them).
         `rng`:
             an :class:`RNG` instance used to evaluate which connections
             are created.
     """
     parameter_names = ('allow_self_connections', 'degree', 'rewiring', 'n_connections')
+    max_redraws = 100
 
     def __init__(self, degree, rewiring, allow_self_connections=True,
                  n_connections=None, rng=None, safe=True, callback=None):
@@ -910,65 +1247,244 @@ class SmallWorldConnector(Connector):
         Connector.__init__(self, safe, callback)
         assert 0 <= rewiring <= 1
         assert isinstance(allow_self_connections, bool) or allow_self_connections == 'NoMutual'
+        self.degree = degree
         self.rewiring = rewiring
         self.d_expression = "d < %g" % degree
         self.allow_self_connections = allow_self_connections
         self.n_connections = n_connections
         self.rng = _get_rng(rng)
 
+    def _index_maps(self, projection):
+        """
+        Return two arrays, giving for each pre-synaptic neuron the index of the
+        same cell in the post-synaptic population, and for each post-synaptic
+        neuron the index of the same cell in the pre-synaptic population, or
+        -1 if there is no such cell. The cells are compared by ID, so that
+        views and assemblies containing the same cells are handled.
+        """
+        pre_ids = numpy.asarray(projection.pre.all_cells)
+        post_ids = numpy.asarray(projection.post.all_cells)
+
+        def find(ids, target_ids):
+            order = numpy.argsort(target_ids)
+            sorted_ids = target_ids[order]
+            index = numpy.minimum(numpy.searchsorted(sorted_ids, ids), sorted_ids.size - 1)
+            return numpy.where(sorted_ids[index] == ids, order[index], -1)
+        return find(pre_ids, post_ids), find(post_ids, pre_ids)
+
+    def _lattice(self, projection, post_index_of_pre, pre_index_of_post):
+        """
+        Return arrays of pre- and post-synaptic indices of all pairs of neurons
+        closer than `degree`, using a spatial index rather than the full
+        distance matrix.
+        """
+        pre_positions = projection.pre.positions.T
+        post_positions = projection.post.positions.T
+        presynaptic_indices, postsynaptic_indices = \
+            projection.space.neighbour_pairs(pre_positions, post_positions, self.degree)
+        d = projection.space.paired_distances(pre_positions[presynaptic_indices],
+                                              post_positions[postsynaptic_indices])
+        keep = d < self.degree
+        if self.allow_self_connections is not True:
+            keep &= post_index_of_pre[presynaptic_indices] != postsynaptic_indices
+        if self.allow_self_connections == 'NoMutual':
+            # of two cells which are both pre- and post-synaptic, only the
+            # one with the higher ID may connect to the other
+            shared = ((post_index_of_pre[presynaptic_indices] >= 0)
+                      & (pre_index_of_post[postsynaptic_indices] >= 0))
+            pre_ids = numpy.asarray(projection.pre.all_cells)
+            post_ids = numpy.asarray(projection.post.all_cells)
+            keep &= ~shared | (pre_ids[presynaptic_indices] > post_ids[postsynaptic_indices])
+        return presynaptic_indices[keep], postsynaptic_indices[keep]
+
+    def _select(self, presynaptic_indices, n_pre):
+        """
+        Return a boolean mask selecting at most `n_connections` connections,
+        chosen at random, for each pre-synaptic neuron.
+        """
+        keys = self.rng.next(presynaptic_indices.size, 'uniform', {"low": 0.0, "high": 1.0}, mask=None)
+        order = numpy.lexsort((keys, presynaptic_indices))
+        counts = numpy.bincount(presynaptic_indices, minlength=n_pre)
+        rank = numpy.arange(order.size) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        selected = numpy.zeros(presynaptic_indices.size, dtype=bool)
+        selected[order[rank < self.n_connections]] = True
+        return selected
+
+    def _rewire(self, projection, presynaptic_indices, postsynaptic_indices,
+                post_index_of_pre, pre_index_of_post):
+        """
+        Move each connection, with probability `rewiring`, to a randomly
+        chosen post-synaptic neuron, avoiding duplicate connections, and
+        self-connections or mutual connections if these are not allowed.
+        """
+        n_post = projection.post.size
+        exclude_self = self.allow_self_connections is not True
+        exclude_mutual = self.allow_self_connections == 'NoMutual'
+
+        def contains(sorted_keys, keys):
+            if sorted_keys.size == 0:
+                return numpy.zeros(keys.shape, dtype=bool)
+            index = numpy.minimum(numpy.searchsorted(sorted_keys, keys), sorted_keys.size - 1)
+            return sorted_keys[index] == keys
+
+        rewired = self.rng.next(presynaptic_indices.size, 'uniform', {"low": 0.0, "high": 1.0},
+                                mask=None) < self.rewiring
+        # keys of the connections which are not (or no longer) to be rewired
+        fixed_keys = numpy.sort(presynaptic_indices[~rewired] * n_post + postsynaptic_indices[~rewired])
+        accepted_keys = numpy.array([], dtype=int)
+        to_draw = numpy.nonzero(rewired)[0]
+        for i in range(self.max_redraws):
+            if to_draw.size == 0:
+                break
+            targets = self.rng.next(to_draw.size, 'uniform_int', {"low": 0, "high": n_post},
+                                    mask=None).astype(int)
+            postsynaptic_indices[to_draw] = targets
+            # redraw rewired connections which duplicate another connection,
+            # or which are self-connections or mutual connections if excluded
+            sources = presynaptic_indices[to_draw]
+            keys = sources * n_post + targets
+            duplicated = numpy.ones(keys.size, dtype=bool)
+            duplicated[numpy.unique(keys, return_index=True)[1]] = False
+            duplicated |= contains(fixed_keys, keys) | contains(accepted_keys, keys)
+            if exclude_self:
+                duplicated |= post_index_of_pre[sources] == targets
+            if exclude_mutual:
+                reverse_pre = pre_index_of_post[targets]
+                reverse_post = post_index_of_pre[sources]
+                has_reverse = (reverse_pre >= 0) & (reverse_post >= 0)
+                reverse_keys = reverse_pre * n_post + reverse_post
+                batch_keys = numpy.sort(keys)
+                duplicated |= has_reverse & (contains(fixed_keys, reverse_keys)
+                                             | contains(accepted_keys, reverse_keys)
+                                             | (contains(batch_keys, reverse_keys)
+                                                & (keys > reverse_keys)))
+            accepted_keys = numpy.sort(numpy.hstack((accepted_keys, keys[~duplicated])))
+            to_draw = to_draw[duplicated]
+        else:
+            if to_draw.size > 0:
+                logger.warning("SmallWorldConnector: %d duplicate connections remain after rewiring" % to_draw.size)
+        return postsynaptic_indices
+
     def connect(self, projection):
         """Connect-up a Projection."""
-        raise NotImplementedError
+        index_maps = self._index_maps(projection)
+        presynaptic_indices, postsynaptic_indices = self._lattice(projection, *index_maps)
+        if self.n_connections is not None:
+            selected = self._select(presynaptic_indices, projection.pre.size)
+            presynaptic_indices = presynaptic_indices[selected]
+            postsynaptic_indices = postsynaptic_indices[selected]
+        if self.rewiring > 0:
+            postsynaptic_indices = self._rewire(projection, presynaptic_indices, postsynaptic_indices,
+                                                *index_maps)
+        order = numpy.argsort(postsynaptic_indices, kind='mergesort')
+        boundaries = numpy.cumsum(numpy.bincount(postsynaptic_indices,
+                                                 minlength=projection.post.size))[:-1]
+        connections = numpy.split(presynaptic_indices[order], boundaries)
+
+        def build_source_masks(mask=None):
+            if mask is None:
+                return connections
+            else:
+                return [x for x, local in izip(connections, mask) if local]
+        self._standard_connect(projection, build_source_masks)
 
 
 class CSAConnector(MapConnector):
     """
     Use the Connection Set Algebra (Djurfeldt, 2012) to connect cells.
 
+    The connection set is evaluated for blocks of `block_size` post-synaptic
+    neurons at a time, so that memory use is proportional to the number of
+    local connections.
+
     Takes any of the standard :class:`Connector` optional arguments and, in
     addition:
 
         `cset`:
             a connection set object.
+        `block_size`:
+            the number of post-synaptic neurons for which the connection set
+            is evaluated at once.
     """
     parameter_names = ('cset',)
 
-    if haveCSA:
-        def __init__(self, cset, safe=True, callback=None):
-            """
-            """
-            Connector.__init__(self, safe=safe, callback=callback)
-            self.cset = cset
-            if csa.arity(cset) == 0:
-                pass
-            else:
-                assert csa.arity(cset) == 2, 'must specify mask or connection-set with arity 2'
-    else:
-        def __init__(self, cset, safe=True, callback=None):
+    def __init__(self, cset, block_size=1000, safe=True, callback=None):
+        """
+        """
+        if not haveCSA:
             raise RuntimeError("CSAConnector not available---couldn't import csa module")
+        Connector.__init__(self, safe=safe, callback=callback)
+        self.cset = cset
+        self.block_size = block_size
+        if csa.arity(cset) == 0:
+            pass
+        else:
+            assert csa.arity(cset) == 2, 'must specify mask or connection-set with arity 2'
+
+    def _evaluate_blocks(self, projection, columns):
+        """
+        Evaluate the connection set for successive blocks of `block_size` of
+        the post-synaptic `columns`, cutting out just the corresponding part of
+        the connection set.
+
+        Yields, for each block, the block of columns and an array with one row
+        per connection, containing the pre- and post-synaptic indices and, for
+        connection sets with arity 2, the weight and delay.
+        """
+        selected = numpy.zeros(projection.post.size, dtype=bool)
+        selected[columns] = True
+        n_columns = 2 + csa.arity(self.cset)
+        for start in range(0, columns.size, self.block_size):
+            block = columns[start:start + self.block_size]
+            c = csa.cross((0, projection.pre.size - 1), (int(block[0]), int(block[-1]))) * self.cset
+            values = numpy.array([tuple(x) for x in c], dtype=float).reshape((-1, n_columns))
+            # the block range may include columns which are not wanted (e.g. non-local)
+            values = values[selected[values[:, 1].astype(int)]]
+            yield block, values
 
     def connect(self, projection):
         """Connect-up a Projection."""
-        # Cut out finite part
-        c = csa.cross((0, projection.pre.size - 1), (0, projection.post.size - 1)) * self.cset  # can't we cut out just the columns we want?
-
         if csa.arity(self.cset) == 2:
-            # Connection-set with arity 2
-            for (i, j, weight, delay) in c:
-                projection._convergent_connect([projection.pre[i]], projection.post[j], weight, delay)
+            # Connection-set with arity 2: weights and delays are taken from the
+            # connection set, and translated to native units with the other
+            # parameters of the synapse type
+            columns = numpy.arange(projection.post.size)[projection.post._mask_local]
+            for block, values in self._evaluate_blocks(projection, columns):
+                order = numpy.argsort(values[:, 1], kind='mergesort')
+                values = values[order]
+                self._connect_with_values(projection,
+                                          values[:, 0].astype(int),
+                                          values[:, 1].astype(int),
+                                          {'weight': values[:, 2], 'delay': values[:, 3]})
         elif csa.arity(self.cset) == 0:
-            # inefficient implementation as a starting point
-            connection_map = numpy.zeros((projection.pre.size, projection.post.size), dtype=bool)
-            for addr in c:
-                connection_map[addr] = True
-            self._connect_with_map(projection, LazyArray(connection_map))
+            # Mask: the synaptic parameters are taken from the synapse type
+            def connection_map_generator(mask=None):
+                columns = numpy.arange(projection.post.size)
+                if mask is not None:
+                    columns = columns[mask]
+                for block, values in self._evaluate_blocks(projection, columns):
+                    postsynaptic_indices = values[:, 1].astype(int)
+                    order = numpy.argsort(postsynaptic_indices, kind='mergesort')
+                    presynaptic_indices = values[order, 0].astype(int)
+                    counts = numpy.bincount(postsynaptic_indices - block[0],
+                                            minlength=block[-1] - block[0] + 1)
+                    sources = numpy.split(presynaptic_indices, numpy.cumsum(counts)[:-1])
+                    for col in block:
+                        yield sources[col - block[0]]
+            self._standard_connect(projection, connection_map_generator)
         else:
             raise NotImplementedError
 
 
 class CloneConnector(MapConnector):
     """
-    Connects cells with the same connectivity pattern as a previous projection.
+    Connects cells with the same connectivity pattern as a previous projection,
+    including any multiple connections between the same pair of neurons.
+    Normally only the local connections of the reference projection are used,
+    so no communication between MPI nodes is needed. If any of the synapse
+    parameters use a parallel-safe random number generator, the connections
+    are gathered from all nodes, so that the same random numbers are drawn
+    whatever the number of MPI processes.
     """
     parameter_names = ('reference_projection',)
 
@@ -990,33 +1506,123 @@ class CloneConnector(MapConnector):
                                          .format(self.reference_projection.pre,
                                                  self.reference_projection.post,
                                                  projection.pre, projection.post))
-        connection_map = LazyArray(~numpy.isnan(self.reference_projection.get(['weight'], 'array',
-                                                                              gather='all')[0]))
-        self._connect_with_map(projection, connection_map)
+        # The clone has the same post-synaptic population as the reference projection,
+        # so the local connections of the reference are exactly those we need to create.
+        # With parallel-safe synapse parameters, random numbers are also drawn for the
+        # non-local columns, so we need the connections from all nodes.
+        gather = projection.synapse_type.native_parameters.parallel_safe and 'all'
+        values = self.reference_projection._get_attributes_as_list(["presynaptic_index",
+                                                                    "postsynaptic_index"])
+        values = self.reference_projection._gather_attribute_values(values, 2, gather)
+        values = values.astype(int)
+        order = numpy.lexsort((values[:, 0], values[:, 1]))
+        presynaptic_indices = values[order, 0]
+        counts = numpy.bincount(values[:, 1], minlength=projection.post.size)
+        sources = numpy.split(presynaptic_indices, numpy.cumsum(counts)[:-1])
+
+        def connection_map_generator(mask=None):
+            # multiple connections between the same pair of neurons are preserved
+            if mask is None:
+                return iter(sources)
+            else:
+                return (sources[col] for col in mask.nonzero()[0])
+        self._standard_connect(projection, connection_map_generator)
 
 
 class ArrayConnector(MapConnector):
     """
-    Provide an explicit boolean connection matrix, with shape (m, n) where m is
-    the size of the presynaptic population and n that of the postsynaptic
+    Provide an explicit connection matrix, with shape (m, n) where m is the
+    size of the presynaptic population and n that of the postsynaptic
     population.
+
+    The matrix may be given as:
+        - a dense boolean array;
+        - a SciPy sparse matrix, in which the non-zero elements are the
+          connections;
+        - a tuple of two integer arrays `(rows, cols)`, containing the pre-
+          and post-synaptic indices of the connections. Repeated pairs give
+          multiple connections between the same neurons.
+
+    For the last two forms, and optionally, `connection_parameters` is a dict
+    containing, for some of the synaptic parameters (e.g. "weight", "delay"),
+    an array with one value per connection, in the same order as `rows` and
+    `cols` or, for a sparse matrix, as the elements of `array.tocoo()`.
+    Only the non-zero elements for local post-synaptic neurons are processed;
+    a sparse matrix is never made dense.
     """
     parameter_names = ('array',)
 
-    def __init__(self, array, safe=True, callback=None):
+    def __init__(self, array, safe=True, callback=None, connection_parameters=None):
         """
         Create a new connector.
         """
         Connector.__init__(self, safe, callback)
         self.array = array
+        self.connection_parameters = connection_parameters or {}
+
+    def _get_indices(self, projection):
+        """
+        Return the pre- and post-synaptic indices of the connections, together
+        with the per-connection parameter values, if any.
+        """
+        connection_parameters = dict((name, numpy.asarray(value))
+                                     for name, value in self.connection_parameters.items())
+        if have_scipy and scipy.sparse.issparse(self.array):
+            if self.array.shape != projection.shape:
+                raise errors.ConnectionError("Connection matrix has shape %s, projection has shape %s"
+                                             % (self.array.shape, projection.shape))
+            matrix = self.array.tocoo()
+            rows, cols = matrix.row, matrix.col
+            nonzero = matrix.data != 0
+            if not nonzero.all():  # explicitly-stored zeros are not connections
+                rows, cols = rows[nonzero], cols[nonzero]
+                connection_parameters = dict((name, value[nonzero])
+                                             for name, value in connection_parameters.items())
+        else:
+            rows, cols = (numpy.asarray(x, dtype=int) for x in self.array)
+            if rows.size > 0 and (rows.min() < 0 or rows.max() >= projection.pre.size):
+                raise errors.ConnectionError("source index out of range")
+            if cols.size > 0 and (cols.min() < 0 or cols.max() >= projection.post.size):
+                raise errors.ConnectionError("target index out of range")
+        for name, value in connection_parameters.items():
+            if value.shape != rows.shape:
+                raise ValueError("%d values given for '%s', but there are %d connections"
+                                 % (value.size, name, rows.size))
+        return rows.astype(int), cols.astype(int), connection_parameters
 
     def connect(self, projection):
-        connection_map = LazyArray(self.array, projection.shape)
-        self._connect_with_map(projection, connection_map)
+        if not (isinstance(self.array, tuple) or have_scipy and scipy.sparse.issparse(self.array)):
+            if self.connection_parameters:
+                raise ValueError("Per-connection parameter values can only be given with "
+                                 "a sparse matrix or (rows, cols) index arrays")
+            connection_map = LazyArray(self.array, projection.shape)
+            self._connect_with_map(projection, connection_map)
+            return
+        presynaptic_indices, postsynaptic_indices, connection_parameters = self._get_indices(projection)
+        local = projection.post._mask_local[postsynaptic_indices]
+        order = numpy.lexsort((presynaptic_indices, postsynaptic_indices))
+        order = order[local[order]]
+        presynaptic_indices = presynaptic_indices[order]
+        postsynaptic_indices = postsynaptic_indices[order]
+        if connection_parameters:
+            self._connect_with_values(projection, presynaptic_indices, postsynaptic_indices,
+                                      dict((name, value[order])
+                                           for name, value in connection_parameters.items()))
+        else:
+            counts = numpy.bincount(postsynaptic_indices, minlength=projection.post.size)
+            sources = numpy.split(presynaptic_indices, numpy.cumsum(counts)[:-1])
+
+            def connection_map_generator(mask=None):
+                if mask is None:
+                    return iter(sources)
+                else:
+                    return (sources[col] for col in mask.nonzero()[0])
+            self._standard_connect(projection, connection_map_generator)
 
 
 class FixedTotalNumberConnector(FixedNumberConnector):
     parameter_names = ('allow_self_connections', 'n')
+    batch_size = 100000  # maximum number of random numbers drawn at once when distributing connections
 
     def __init__(self, n, allow_self_connections=True, with_replacement=True,
                  rng=None, safe=True, callback=None):
@@ -1025,6 +1631,9 @@ class FixedTotalNumberConnector(FixedNumberConnector):
         """
         Connector.__init__(self, safe, callback)
         assert isinstance(allow_self_connections, bool) or allow_self_connections == 'NoMutual'
+        if allow_self_connections == 'NoMutual':
+            raise NotImplementedError("FixedTotalNumberConnector does not support "
+                                      "allow_self_connections='NoMutual'")
         self.allow_self_connections = allow_self_connections
         self.with_replacement = with_replacement
         self.n = n
@@ -1037,45 +1646,90 @@ class FixedTotalNumberConnector(FixedNumberConnector):
             raise TypeError("n must be an integer or a RandomDistribution object")
         self.rng = _get_rng(rng)
 
+    def _multinomial(self, n, size):
+        """
+        Distribute `n` connections uniformly at random among `size` neurons,
+        returning the number of connections for each neuron.
+        """
+        if isinstance(self.rng, NumpyRNG):
+            return self.rng.multinomial(n, numpy.ones(size) / size)
+        # for other RNGs, drawing the neuron for each connection is equivalent,
+        # though the cost is proportional to `n` rather than to `size`
+        counts = numpy.zeros(size, dtype=int)
+        while n > 0:
+            batch = min(n, self.batch_size)
+            counts += numpy.bincount(self.rng.next(batch, 'uniform_int', {"low": 0, "high": size},
+                                                   mask=None).astype(int),
+                                     minlength=size)
+            n -= batch
+        return counts
+
+    def _multivariate_hypergeometric(self, n, n_allowed, size):
+        """
+        Distribute `n` distinct connections uniformly at random among `size`
+        neurons, each of which can receive at most `n_allowed` connections,
+        returning the number of connections for each neuron.
+        """
+        if n > n_allowed * size:
+            raise ValueError("Cannot make %d connections without replacement: "
+                             "only %d distinct connections are possible" % (n, n_allowed * size))
+        if size == 0:
+            return numpy.zeros((0,), dtype=int)
+        counts = numpy.zeros(size, dtype=int)
+        if not isinstance(self.rng, NumpyRNG):
+            # for other RNGs, choose `n` distinct (pre, post) pairs
+            flat = self._sample_without_replacement(n, n_allowed * size, 1).flatten()
+            counts += numpy.bincount(flat // n_allowed, minlength=size)
+            return counts
+        # split each range of neurons in two, and the connections between the
+        # halves with a hypergeometric draw, until each range contains one neuron
+        starts = numpy.zeros(1, dtype=int)
+        widths = numpy.array([size])
+        totals = numpy.array([n])
+        while starts.size > 0:
+            done = (widths == 1) | (totals == 0)
+            counts[starts[done & (widths == 1)]] = totals[done & (widths == 1)]
+            starts, widths, totals = starts[~done], widths[~done], totals[~done]
+            left_widths = widths // 2
+            left_totals = self.rng.hypergeometric(left_widths * n_allowed,
+                                                  (widths - left_widths) * n_allowed,
+                                                  totals)
+            starts = numpy.hstack((starts, starts + left_widths))
+            widths = numpy.hstack((left_widths, widths - left_widths))
+            totals = numpy.hstack((left_totals, totals - left_totals))
+        return counts
+
     def connect(self, projection):
-        # This implementation is not "parallel safe" for random numbers.
-        # todo: support the `parallel_safe` flag.
-
-        # Determine number of processes and current rank
-        rank = projection._simulator.state.mpi_rank
-        num_processes = projection._simulator.state.num_processes
-
-        # Assume that targets are equally distributed over processes
-        targets_per_process = int(len(projection.post) / num_processes)
-
-        # Calculate the number of synapses on each process
-        bino = RandomDistribution('binomial',
-                                  [self.n, targets_per_process / len(projection.post)],
-                                  rng=self.rng)
-        num_conns_on_vp = numpy.zeros(num_processes, dtype=int)
-        sum_dist = 0
-        sum_partitions = 0
-        for k in range(num_processes):
-            p_local = targets_per_process / (len(projection.post) - sum_dist)
-            bino.parameters['p'] = p_local
-            bino.parameters['n'] = self.n - sum_partitions
-            num_conns_on_vp[k] = bino.next()
-            sum_dist += targets_per_process
-            sum_partitions += num_conns_on_vp[k]
-
-        # Draw random sources and targets
-        connections = [[] for i in range(projection.post.size)]
-        possible_targets = numpy.arange(projection.post.size)[projection.post._mask_local]
-        for i in range(num_conns_on_vp[rank]):
-            source_index = self.rng.next(1, 'uniform_int',
-                                         {"low": 0, "high": projection.pre.size},
-                                         mask=None)[0]
-            target_index = self.rng.choice(possible_targets, size=1)[0]
-            connections[target_index].append(source_index)
+        # The total number of connections is split among the post-synaptic
+        # neurons with a single multinomial draw (multivariate hypergeometric
+        # without replacement). For the connections to be consistent between
+        # MPI nodes, this requires a parallel-safe RNG. The sources are then
+        # drawn only for the local post-synaptic neurons.
+        if isinstance(self.n, int):
+            n = self.n
+        else:
+            n = int(self.n.next())
+        local_columns = numpy.arange(projection.post.size)[projection.post._mask_local]
+        if not self.allow_self_connections and projection.pre == projection.post:
+            exclude = local_columns
+            n_allowed = projection.pre.size - 1
+        else:
+            exclude = None
+            n_allowed = projection.pre.size
+        if self.with_replacement:
+            counts = self._multinomial(n, projection.post.size)
+        else:
+            counts = self._multivariate_hypergeometric(n, n_allowed, projection.post.size)
+        local_counts = counts[local_columns]
+        sources = self._sample(local_counts, projection.pre.size, exclude)
+        sources = numpy.split(sources, numpy.cumsum(local_counts)[:-1])
+        connections = [numpy.zeros((0,), dtype=int)] * projection.post.size
+        for col, col_sources in zip(local_columns, sources):
+            connections[col] = col_sources
 
         def build_source_masks(mask=None):
             if mask is None:
-                return [numpy.array(x) for x in connections]
+                return iter(connections)
             else:
-                return [numpy.array(x) for x in numpy.array(connections)[mask]]
+                return (connections[col] for col in mask.nonzero()[0])
         self._standard_connect(projection, build_source_masks)
@@ -47,8 +47,7 @@ class Population(common.Population):
     def _create_cells(self):
         id_range = numpy.arange(simulator.state.id_counter,
                                 simulator.state.id_counter + self.size)
-        self.all_cells = numpy.array([simulator.ID(id) for id in id_range],
-                                     dtype=simulator.ID)
+        self.all_cells = common.IDArray(id_range, simulator.ID, self)
 
         def is_local(id):
             return (id % simulator.state.num_processes) == simulator.state.mpi_rank
@@ -62,8 +61,6 @@ class Population(common.Population):
         parameter_space.evaluate(mask=self._mask_local, simplify=False)
         self._parameters = parameter_space.as_dict()
         
-        for id in self.all_cells:
-            id.parent = self
         simulator.state.id_counter += self.size
 
     def _set_initial_value_array(self, variable, initial_values):
@@ -58,3 +58,18 @@ class Projection(common.Projection):
             self.connections.append(
                 Connection(pre_idx, postsynaptic_index, **other_attributes)
             )
+
+    def _bulk_connect(self, presynaptic_indices, postsynaptic_indices,
+                      **connection_parameters):
+        for name, value in connection_parameters.items():
+            if isinstance(value, float):
+                connection_parameters[name] = repeat(value)
+        if connection_parameters:
+            values = izip(*connection_parameters.values())
+        else:
+            values = repeat(())
+        for pre_idx, post_idx, other in izip(presynaptic_indices, postsynaptic_indices, values):
+            other_attributes = dict(zip(connection_parameters.keys(), other))
+            self.connections.append(
+                Connection(pre_idx, post_idx, **other_attributes)
+            )
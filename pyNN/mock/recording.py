@@ -5,6 +5,7 @@ from . import simulator
 
 class Recorder(recording.Recorder):
     _simulator = simulator
+    _supports_streaming = True
 
     def _record(self, variable, new_ids, sampling_interval=None):
         pass
@@ -20,7 +21,8 @@ class Recorder(recording.Recorder):
 
     def _get_all_signals(self, variable, ids, clear=False):
         # assuming not using cvode, otherwise need to get times as well and use IrregularlySampledAnalogSignal
-        n_samples = int(round(self._simulator.state.t / self._simulator.state.dt)) + 1
+        t_start = float(self._recording_start_time)
+        n_samples = int(round((self._simulator.state.t - t_start) / self._simulator.state.dt)) + 1
         return numpy.vstack((numpy.random.uniform(size=n_samples) for id in ids)).T
 
     def _local_count(self, variable, filter_ids=None):
@@ -30,6 +30,7 @@ class State(common.control.BaseState):
 
     def clear(self):
         self.recorders = set([])
+        self.pending_updates = set([])
         self.id_counter = 42
         self.segment_counter = -1
         self.reset()
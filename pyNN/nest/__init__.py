@@ -141,6 +141,8 @@ def setup(timestep=DEFAULT_TIMESTEP, min_delay=DEFAULT_MIN_DELAY,
 
 def end():
     """Do any necessary cleaning up before exiting."""
+    for recorder in simulator.state.recorders:
+        recorder.close_stream()
     for (population, variables, filename) in simulator.state.write_on_end:
         logger.debug("%s%s --> %s" % (population.label, variables, filename))
         io = recording.get_io(filename)
@@ -32,7 +32,7 @@ class PopulationMixin(object):
         param_dict = _build_params(parameter_space, numpy.where(self._mask_local)[0])
         ids = self.local_cells.tolist()
         if hasattr(self.celltype, "uses_parrot") and self.celltype.uses_parrot:
-            ids = [id.source for id in ids]
+            ids = [id.source for id in self.local_cells]
         nest.SetStatus(ids, param_dict)
 
     def _get_parameters(self, *names):
@@ -41,7 +41,7 @@ class PopulationMixin(object):
         """
         ids = self.local_cells.tolist()
         if hasattr(self.celltype, "uses_parrot") and self.celltype.uses_parrot:
-            ids = [id.source for id in ids]
+            ids = [id.source for id in self.local_cells]
 
         if "spike_times" in names:
             parameter_dict = {"spike_times": [Sequence(value) for value in nest.GetStatus(ids, names)]}
@@ -149,12 +149,7 @@ class Population(common.Population, PopulationMixin):
             # connecting up the parrot neurons is deferred until we know the value of min_delay
             # which could be 'auto' at this point.
         self._mask_local = numpy.array(nest.GetStatus(self.all_cells, 'local'))
-        self.all_cells = numpy.array([simulator.ID(gid) for gid in self.all_cells], simulator.ID)
-        for gid in self.all_cells:
-            gid.parent = self
-        if hasattr(self.celltype, "uses_parrot") and self.celltype.uses_parrot:
-            for gid, source in zip(self.all_cells, self.all_cells_source):
-                gid.source = source
+        self.all_cells = common.IDArray(self.all_cells, simulator.ID, self)
 
     def _connect_parrot_neurons(self):
         nest.Connect(self.all_cells_source, numpy.array(self.all_cells, int), 'one_to_one',
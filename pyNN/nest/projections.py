@@ -33,6 +33,11 @@ def listify(obj):
         return obj
 
 
+def _is_per_connection(value, n):
+    """Does `value` contain one entry for each of `n` connections?"""
+    return isinstance(value, numpy.ndarray) and value.ndim == 1 and value.size == n
+
+
 class Projection(common.Projection):
     __doc__ = common.Projection.__doc__
     _simulator = simulator
@@ -231,6 +236,116 @@ class Projection(common.Projection):
                 else:
                     self._set_common_synapse_property(name, value)
 
+    def _bulk_connect(self, presynaptic_indices, postsynaptic_indices,
+                      **connection_parameters):
+        """
+        Create many connections at once, with a single call to `nest.Connect()`
+        using the 'one_to_one' rule.
+
+        `presynaptic_indices`   -- a 1D array of pre-synaptic cell indices
+        `postsynaptic_indices`  -- a 1D array, of the same length, of
+                                   post-synaptic cell indices
+        `connection_parameters` -- each parameter should be either a 1D array
+                                   of the same length as the index arrays, or
+                                   a single value.
+
+        All synapse parameters are passed to NEST when the connections are
+        created, so no further `GetConnections()`/`SetStatus()` calls are needed.
+        """
+        if not hasattr(self.post, "celltype"):
+            # the post-synaptic neurons may have different receptor types, so
+            # we connect to each post-synaptic neuron separately
+            self._bulk_connect_by_target(presynaptic_indices, postsynaptic_indices,
+                                         **connection_parameters)
+            return
+        n = presynaptic_indices.size
+        if self._common_synapse_property_names is None:
+            # we need an existing connection to be able to distinguish between
+            # common synapse properties and local ones, so we create the first
+            # connection on its own
+            first_parameters = dict((name, value[:1] if _is_per_connection(value, n) else value)
+                                    for name, value in connection_parameters.items())
+            self._convergent_connect(presynaptic_indices[:1], postsynaptic_indices[0],
+                                     **first_parameters)
+            if n == 1:
+                return
+            presynaptic_indices = presynaptic_indices[1:]
+            postsynaptic_indices = postsynaptic_indices[1:]
+            connection_parameters = dict((name, value[1:] if _is_per_connection(value, n) else value)
+                                         for name, value in connection_parameters.items())
+            n -= 1
+
+        presynaptic_cells = self.pre.all_cells[presynaptic_indices].astype(int)
+        postsynaptic_cells = self.post.all_cells[postsynaptic_indices].astype(int)
+        syn_dict = {
+            'model': self.nest_synapse_model,
+            'synapse_label': self.nest_synapse_label,
+        }
+
+        weights = connection_parameters.pop('weight')
+        if self.receptor_type == 'inhibitory' and self.post.conductance_based:
+            weights = -1 * weights  # NEST wants negative values for inhibitory weights, even if these are conductances
+            if "stdp" in self.nest_synapse_model:
+                connection_parameters["Wmax"] = -1 * connection_parameters["Wmax"]
+        if hasattr(self.post.celltype, "receptor_scale"):  # this is a bit of a hack
+            weights = weights * self.post.celltype.receptor_scale  # needed for the Izhikevich model
+        syn_dict['weight'] = weights
+        syn_dict['delay'] = connection_parameters.pop('delay')
+        if not self.post.celltype.standard_receptor_type:
+            syn_dict['receptor_type'] = self.post.celltype.get_receptor_type(self.receptor_type)
+        if 'tsodyks' in self.nest_synapse_model:
+            if self.receptor_type == 'inhibitory':
+                param_name = self.post.celltype.translations['tau_syn_I']['translated_name']
+            elif self.receptor_type == 'excitatory':
+                param_name = self.post.celltype.translations['tau_syn_E']['translated_name']
+            else:
+                raise NotImplementedError()
+            targets, target_positions = numpy.unique(postsynaptic_cells, return_inverse=True)
+            tau_syn = numpy.array(nest.GetStatus(targets.tolist(), param_name), dtype=float)
+            syn_dict['tau_psc'] = tau_syn[target_positions]
+
+        # Clean the connection parameters
+        connection_parameters.pop('tau_minus', None)  # TODO: set tau_minus on the post-synaptic cells
+        connection_parameters.pop('dendritic_delay_fraction', None)
+        connection_parameters.pop('w_min_always_zero_in_NEST', None)
+
+        for name, value in connection_parameters.items():
+            if name in self._common_synapse_property_names:
+                self._set_common_synapse_property(name, value)
+            else:
+                syn_dict[name] = value
+        for name, value in syn_dict.items():
+            if _is_per_connection(value, n):
+                syn_dict[name] = numpy.asarray(value, dtype=float)
+            elif name not in ('model', 'synapse_label'):
+                syn_dict[name] = make_sli_compatible(value)
+                if isinstance(syn_dict[name], numpy.number):
+                    syn_dict[name] = syn_dict[name].item()  # NEST chokes on numpy's scalar types
+
+        try:
+            nest.Connect(presynaptic_cells.tolist(),
+                         postsynaptic_cells.tolist(),
+                         'one_to_one',
+                         syn_dict)
+        except nest.kernel.NESTError as e:
+            errmsg = "%s. presynaptic_cells=%s, postsynaptic_cells=%s, synapse model='%s'" % (
+                        e, presynaptic_cells, postsynaptic_cells, self.nest_synapse_model)
+            raise errors.ConnectionError(errmsg)
+
+        # Book-keeping
+        self._connections = None  # reset the caching of the connection list, since this will have to be recalculated
+        self._sources.extend(presynaptic_cells)
+
+    def _bulk_connect_by_target(self, presynaptic_indices, postsynaptic_indices,
+                                **connection_parameters):
+        n = presynaptic_indices.size
+        order = numpy.argsort(postsynaptic_indices, kind='mergesort')
+        targets, first = numpy.unique(postsynaptic_indices[order], return_index=True)
+        for target, block in zip(targets, numpy.split(order, first[1:])):
+            parameters = dict((name, value[block] if _is_per_connection(value, n) else value)
+                              for name, value in connection_parameters.items())
+            self._convergent_connect(presynaptic_indices[block], target, **parameters)
+
     def _identify_common_synapse_properties(self):
         """
             Use the connection between the sample indices to distinguish
@@ -361,22 +476,19 @@ class Projection(common.Projection):
         return values
 
     def _get_attributes_as_arrays(self, names, multiple_synapses='sum'):
-        multi_synapse_operation = Projection.MULTI_SYNAPSE_OPERATIONS[multiple_synapses]
         all_values = []
         for attribute_name in names:
             if attribute_name[-1] == "s":  # weights --> weight, delays --> delay
                 attribute_name = attribute_name[:-1]
-            value_arr = numpy.nan * numpy.ones((self.pre.size, self.post.size))
             connection_attributes = nest.GetStatus(self.nest_connections,
                                                    ('source', 'target', attribute_name))
-            for conn in connection_attributes:
-                # (offset is always 0,0 for connections created with connect())
-                src, tgt, value = conn
-                addr = self.pre.id_to_index(src), self.post.id_to_index(tgt)
-                if numpy.isnan(value_arr[addr]):
-                    value_arr[addr] = value
-                else:
-                    value_arr[addr] = multi_synapse_operation(value_arr[addr], value)
+            # (offset is always 0,0 for connections created with connect())
+            connection_attributes = numpy.array(connection_attributes, dtype=float).reshape((-1, 3))
+            value_arr = self._connection_matrix(
+                            self.pre.id_to_index(connection_attributes[:, 0].astype(int)),
+                            self.post.id_to_index(connection_attributes[:, 1].astype(int)),
+                            connection_attributes[:, 2],
+                            multiple_synapses)
             if attribute_name == 'weight':
                 value_arr *= 0.001
                 if self.receptor_type == 'inhibitory' and self.post.conductance_based:
@@ -50,38 +50,54 @@ class RecordingDevice(object):
         """
         Return recorded data as a dictionary containing one numpy array for
         each neuron, ids as keys.
+
+        The arrays are views into a single contiguous array, obtained by a
+        stable sort of the events by sender, so the values for each neuron
+        remain in time order.
         """
         scale_factor = SCALE_FACTORS.get(variable, 1)
         nest_variable = VARIABLE_MAP.get(variable, variable)
         events = nest.GetStatus(self.device, 'events')[0]
-        ids = events['senders']
-        values = events[nest_variable] * scale_factor  # I'm hoping numpy optimises for the case where scale_factor = 1, otherwise should avoid this multiplication in that case
-        data = {}
-        recorded_ids = set(ids)
-        
-        for id in recorded_ids:
-            data[id]=[]
-
-        for id,v in zip(ids,values):
-            data[id].append(v)
-
-        desired_and_existing_ids = numpy.intersect1d(numpy.array(list(recorded_ids)),numpy.array(desired_ids))
-        data = {k : data[k] for k in desired_and_existing_ids}
-
-        if variable != 'times':
+        ids = numpy.asarray(events['senders'], dtype=int)
+        values = numpy.asarray(events[nest_variable], dtype=float)
+        if scale_factor != 1:
+            values = values * scale_factor
+        order = numpy.argsort(ids, kind='mergesort')
+        ids = ids[order]
+        values = values[order]
+        recorded_ids, starts = numpy.unique(ids, return_index=True)
+        recorded_data = dict(zip(recorded_ids.tolist(), numpy.split(values, starts[1:])))
+
+        if variable == 'times':
+            desired_and_existing_ids = numpy.intersect1d(recorded_ids,
+                                                         numpy.fromiter(desired_ids, dtype=int))
+            data = dict((id, recorded_data[id]) for id in desired_and_existing_ids.tolist())
+        else:
+            # NEST does not record values at the zeroth time step, so we
+            # add them here.
+            if variable not in self._initial_values:
+                self._initial_values[variable] = {}
+            empty = numpy.array([])
+            pieces = []
+            lengths = []
             for id in desired_ids:
-                # NEST does not record values at the zeroth time step, so we
-                # add them here.
-                if variable not in self._initial_values:
-                    self._initial_values[variable] = {}
                 initial_value = self._initial_values[variable].get(int(id),
                                                                    id.get_initial_value(variable))
-                data[int(id)] = [initial_value] + data.get(int(id),[])
+                id_values = recorded_data.get(int(id), empty)
+                pieces.extend(([initial_value], id_values))
+                lengths.append(1 + id_values.size)
+            if pieces:
+                all_values = numpy.concatenate(pieces)
+                data = dict(zip([int(id) for id in desired_ids],
+                                numpy.split(all_values, numpy.cumsum(lengths)[:-1])))
+            else:
+                data = {}
+            if clear:
                 # if `get_data()` is called in the middle of a simulation, the
                 # value at the last time point will become the initial value for
                 # the next time `get_data()` is called
-                if clear:
-                    self._initial_values[variable][int(id)] = data[int(id)][-1]
+                for id, id_values in data.items():
+                    self._initial_values[variable][id] = id_values[-1]
 
         return data
 
@@ -115,13 +131,26 @@ class SpikeDetector(RecordingDevice):
         """
         return self.get_data('times', desired_ids)
 
+    def get_spike_arrays(self, desired_ids):
+        """
+        Return the spikes emitted by the given neurons as two arrays of equal
+        length, containing the IDs of the emitting neurons and the spike times.
+        """
+        events = nest.GetStatus(self.device, 'events')[0]
+        senders = numpy.asarray(events['senders'], dtype=int)
+        mask = numpy.in1d(senders, numpy.fromiter(desired_ids, dtype=int))
+        return senders[mask], numpy.asarray(events['times'], dtype=float)[mask]
+
     def get_spike_counts(self, desired_ids):
         events = nest.GetStatus(self.device, 'events')[0]
-        N = {}
-        for id in desired_ids:
-            mask = events['senders'] == int(id)
-            N[int(id)] = len(events['times'][mask])
-        return N
+        senders = numpy.asarray(events['senders'], dtype=int)
+        desired_ids = numpy.fromiter(desired_ids, dtype=int)
+        if desired_ids.size == 0:
+            return {}
+        lowest = min(desired_ids.min(), senders.min()) if senders.size else desired_ids.min()
+        highest = max(desired_ids.max(), senders.max()) if senders.size else desired_ids.max()
+        counts = numpy.bincount(senders - lowest, minlength=highest - lowest + 1)
+        return dict(zip(desired_ids.tolist(), counts[desired_ids - lowest].tolist()))
 
 
 class Multimeter(RecordingDevice):
@@ -435,12 +464,15 @@ class Recorder(recording.Recorder):
         self._spike_detector = SpikeDetector()
     
     def _get_spiketimes(self, ids):
-        return self._spike_detector.get_spiketimes(ids)  # hugely inefficient - to be optimized later
+        return self._spike_detector.get_spiketimes(ids)
+
+    def _get_spiketimes_as_arrays(self, ids):
+        return self._spike_detector.get_spike_arrays(ids)
     
     def _get_all_signals(self, variable, ids, clear=False):
         data = self._multimeter.get_data(variable, ids, clear=clear)
         if len(ids) > 0:
-            return numpy.array([data[i] for i in ids]).T #JACOMMENT: this is very expensive but not sure how to get rid of it 
+            return numpy.vstack([data[int(i)] for i in ids]).T
         else:
             return numpy.array([])
 
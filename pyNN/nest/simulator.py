@@ -156,6 +156,7 @@ class _State(common.control.BaseState):
         self.populations = []
         self.recording_devices = []
         self.recorders = set()
+        self.pending_updates = set()
         # clear the sli stack, if this is not done --> memory leak cause the stack increases
         nest.ll_api.sr('clear')
         # reset the simulation kernel
@@ -180,6 +181,14 @@ class ID(int, common.IDMixin):
         int.__init__(n)
         common.IDMixin.__init__(self)
 
+    @property
+    def source(self):
+        """
+        For cell types which use parrot neurons, the NEST id of the cell which
+        generates the spikes.
+        """
+        return self.parent.all_cells_source[self.parent.id_to_index(self)]
+
 
 # --- For implementation of connect() and Connector classes --------------------
 
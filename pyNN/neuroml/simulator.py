@@ -82,6 +82,7 @@ class State(common.control.BaseState):
         self.running = True
     def clear(self):
         self.recorders = set([])
+        self.pending_updates = set([])
         self.id_counter = 42
         self.segment_counter = -1
         self.reset()
@@ -14,8 +14,8 @@ try:
 except ImportError:
     izip = zip  # Python 3 zip returns an iterator already
 from itertools import repeat, chain
-from collections import defaultdict
 from pyNN import common, errors, core
+from pyNN.core import is_listlike
 from pyNN.random import RandomDistribution, NativeRNG
 from pyNN.space import Space
 from . import simulator
@@ -39,7 +39,12 @@ class Projection(common.Projection):
         common.Projection.__init__(self, presynaptic_population, postsynaptic_population,
                                    connector, synapse_type, source, receptor_type,
                                    space, label)
-        self._connections = dict((index, defaultdict(list)) for index in self.post._mask_local.nonzero()[0])
+        # connections are stored column-wise: a list of Connection objects,
+        # with parallel arrays of pre- and post-synaptic indices
+        self._connections = []
+        self._presynaptic_index_chunks = []
+        self._postsynaptic_index_chunks = []
+        self._index = None
         connector.connect(self)
         self._presynaptic_components = dict((index, {}) for index in 
                                             self.pre._mask_local.nonzero()[0])
@@ -48,29 +53,63 @@ class Projection(common.Projection):
         _projections.append(self)
         logger.info("--- Projection[%s].__init__() ---" % self.label)
 
+    def _build_index(self):
+        """
+        Return arrays of the pre- and post-synaptic indices of all local
+        connections, together with a CSR-style index by post-synaptic cell:
+        the connections to post-synaptic cell `j` are
+        `self._connections[indptr[j]:indptr[j + 1]]`.
+
+        Connections created since the last call are merged in, and all
+        connections are sorted by post-synaptic index. The connections to a
+        given post-synaptic cell are grouped by pre-synaptic cell, with the
+        groups in the order in which the first connection of each was created,
+        and multiple connections between the same pair of cells in the order
+        in which they were created.
+        """
+        if self._index is None:
+            if self._presynaptic_index_chunks:
+                presynaptic_indices = numpy.concatenate(self._presynaptic_index_chunks)
+                postsynaptic_indices = numpy.concatenate(self._postsynaptic_index_chunks)
+            else:
+                presynaptic_indices = numpy.array([], dtype=int)
+                postsynaptic_indices = numpy.array([], dtype=int)
+            pairs = postsynaptic_indices * self.pre.size + presynaptic_indices
+            _, first, inverse = numpy.unique(pairs, return_index=True, return_inverse=True)
+            order = numpy.lexsort((numpy.arange(pairs.size), first[inverse],
+                                   postsynaptic_indices))
+            presynaptic_indices = presynaptic_indices[order]
+            postsynaptic_indices = postsynaptic_indices[order]
+            self._connections = [self._connections[k] for k in order]
+            self._presynaptic_index_chunks = [presynaptic_indices]
+            self._postsynaptic_index_chunks = [postsynaptic_indices]
+            indptr = numpy.searchsorted(postsynaptic_indices,
+                                        numpy.arange(self.post.size + 1))
+            self._index = (presynaptic_indices, postsynaptic_indices, indptr)
+        return self._index
+
     @property
     def connections(self):
-        for x in self._connections.values():
-            for y in x.values():
-                for z in y:
-                    yield z
+        self._build_index()
+        return iter(self._connections)
 
     def __getitem__(self, i):
         __doc__ = common.Projection.__getitem__.__doc__
-        if isinstance(i, int):
+        self._build_index()
+        if isinstance(i, (int, numpy.integer)):
             if i < len(self):
-                return self.connections[i]
+                return self._connections[i]
             else:
                 raise IndexError("%d > %d" % (i, len(self) - 1))
         elif isinstance(i, slice):
             if i.stop < len(self):
-                return [self.connections[j] for j in range(*i.indices(i.stop))]
+                return self._connections[i]
             else:
                 raise IndexError("%d > %d" % (i.stop, len(self) - 1))
 
     def __len__(self):
         """Return the number of connections on the local MPI node."""
-        return len(list(self.connections))
+        return len(self._connections)
 
     def _convergent_connect(self, presynaptic_indices, postsynaptic_index,
                             **connection_parameters):
@@ -92,11 +131,16 @@ class Projection(common.Projection):
             if isinstance(value, (float, int)):
                 connection_parameters[name] = repeat(value)
         assert postsynaptic_cell.local
+        presynaptic_indices = numpy.asarray(presynaptic_indices, dtype=int)
         for pre_idx, values in core.ezip(presynaptic_indices, *connection_parameters.values()):
             parameters = dict(zip(connection_parameters.keys(), values))
             #logger.debug("Connecting neuron #%s to neuron #%s with synapse type %s, receptor type %s, parameters %s", pre_idx, postsynaptic_index, self.synapse_type, self.receptor_type, parameters)
-            self._connections[postsynaptic_index][pre_idx].append(
+            self._connections.append(
                 self.synapse_type.connection_type(self, pre_idx, postsynaptic_index, **parameters))
+        self._presynaptic_index_chunks.append(presynaptic_indices)
+        self._postsynaptic_index_chunks.append(
+            numpy.repeat(postsynaptic_index, presynaptic_indices.size))
+        self._index = None
 
     def _configure_presynaptic_components(self):
         """
@@ -131,12 +175,20 @@ class Projection(common.Projection):
                         setattr(component[index], name, value[index])
         # Evaluate the parameters for the post-synaptic components (typically the "Connection" object)
         parameter_space.evaluate(mask=(slice(None), self.post._mask_local))  # only columns for connections that exist on this machine
-        for connection_group, connection_parameters in zip(self._connections.values(),
-                                                           parameter_space.columns()):
+        presynaptic_indices, _, indptr = self._build_index()
+        for postsynaptic_index, connection_parameters in zip(self.post._mask_local.nonzero()[0],
+                                                             parameter_space.columns()):
+            start, stop = indptr[postsynaptic_index], indptr[postsynaptic_index + 1]
+            if start == stop:
+                continue
+            connection_group = self._connections[start:stop]
             for name, value in connection_parameters.items():
-                for index in connection_group:
-                    for connection in connection_group[index]:
-                        setattr(connection, name, value[index])
+                if is_listlike(value):
+                    values = value[presynaptic_indices[start:stop]]
+                else:
+                    values = repeat(value)
+                for connection, x in izip(connection_group, values):
+                    setattr(connection, name, x)
 
     def _set_initial_value_array(self, variable, value):
         raise NotImplemented
@@ -213,6 +213,7 @@ class _State(common.control.BaseState):
         self.parallel_context.gid_clear()
         self.gid_sources = []
         self.recorders = set([])
+        self.pending_updates = set([])
         self.current_sources = []
         self.gid_counter = 0
         self.vargid_offsets = dict()  # Contains the start of the available "variable"-GID range for each projection (as opposed to "cell"-GIDs)
@@ -17,6 +17,7 @@ from copy import copy
 from collections import defaultdict
 from warnings import warn
 from pyNN import errors
+from pyNN.recording import streaming
 import neo
 from datetime import datetime
 import quantities as pq
@@ -44,25 +45,41 @@ def rename_existing(filename):
         logger.warning("File %s already exists. Renaming the original file to %s_old" % (filename, filename))
 
 
-def gather_array(data):
-    # gather 1D or 2D numpy arrays
+def gather_array(data, all=False):
+    """
+    Gather 1D or 2D numpy arrays from all MPI nodes, and concatenate them, in
+    rank order, along the first axis.
+
+    The data are sent as contiguous buffers of doubles using `Gatherv`
+    (`Allgatherv` if `all` is True, in which case all nodes receive the
+    gathered array), after first exchanging the number of elements on each
+    node. With `all=False`, nodes other than the root receive an empty array.
+    """
     mpi_comm, mpi_flags = get_mpi_comm()
     assert isinstance(data, numpy.ndarray)
     assert len(data.shape) < 3
+    data = numpy.ascontiguousarray(data, dtype=float)
     # first we pass the data size
     size = data.size
-    sizes = mpi_comm.gather(size, root=MPI_ROOT) or []
+    if all:
+        sizes = mpi_comm.allgather(size)
+    else:
+        sizes = mpi_comm.gather(size, root=MPI_ROOT) or []
     # now we pass the data
-    displacements = [sum(sizes[:i]) for i in range(len(sizes))]
-    gdata = numpy.empty(sum(sizes))
-    mpi_comm.Gatherv([data.flatten(), size, mpi_flags['DOUBLE']],
-                     [gdata, (sizes, displacements), mpi_flags['DOUBLE']],
-                     root=MPI_ROOT)
+    sizes = numpy.array(sizes, dtype=int)
+    displacements = numpy.cumsum(sizes) - sizes
+    gdata = numpy.empty(sizes.sum())
+    send_buffer = [data.reshape(-1), size, mpi_flags['DOUBLE']]
+    receive_buffer = [gdata, (sizes.tolist(), displacements.tolist()), mpi_flags['DOUBLE']]
+    if all:
+        mpi_comm.Allgatherv(send_buffer, receive_buffer)
+    else:
+        mpi_comm.Gatherv(send_buffer, receive_buffer, root=MPI_ROOT)
     if len(data.shape) == 1:
         return gdata
     else:
         num_columns = data.shape[1]
-        return gdata.reshape((gdata.size / num_columns, num_columns))
+        return gdata.reshape((gdata.size // num_columns, num_columns))
 
 
 def gather_dict(D, all=False):
@@ -79,24 +96,163 @@ def gather_dict(D, all=False):
     return D
 
 
-def gather_blocks(data, ordered=True):
-    """Gather Neo Blocks"""
+def _spiketrains_as_arrays(segment):
+    """
+    Flatten the spike trains of a segment into two arrays: one with a row
+    (source_id, source_index, number of spikes) for each spike train, and one
+    containing the spike times (in ms) of all the spike trains, concatenated.
+    """
+    trains = numpy.array([(st.annotations['source_id'], st.annotations['source_index'], st.size)
+                          for st in segment.spiketrains], dtype=float).reshape((-1, 3))
+    if segment.spiketrains:
+        times = numpy.concatenate([st.rescale(pq.ms).magnitude for st in segment.spiketrains])
+    else:
+        times = numpy.array([])
+    return trains, times
+
+
+def _gather_spiketrains(segment, metadata, receives_data, ordered=True, all=False):
+    """
+    Gather the spike trains of a segment from all MPI nodes. Returns the list
+    of merged spike trains on the nodes which receive the data, otherwise None.
+    """
+    t_start, t_stop, source_population = metadata
+    trains, times = _spiketrains_as_arrays(segment)
+    trains = gather_array(trains, all=all)
+    times = gather_array(times, all=all)
+    if not receives_data:
+        return None
+    counts = trains[:, 2].astype(int)
+    spike_times = numpy.split(times, numpy.cumsum(counts)[:-1]) if counts.size else []
+    if ordered:
+        order = numpy.argsort(trains[:, 0], kind='mergesort')
+    else:
+        order = numpy.arange(counts.size)
+    return [neo.SpikeTrain(spike_times[k],
+                           t_start=t_start * pq.ms,
+                           t_stop=t_stop * pq.ms,
+                           units='ms',
+                           source_population=source_population,
+                           source_id=int(trains[k, 0]),
+                           source_index=int(trains[k, 1]))
+            for k in order]
+
+
+def _gather_analogsignal(segment, name, metadata, receives_data, all=False):
+    """
+    Gather the analog signal called `name` from all MPI nodes, as a matrix of
+    values with one row per channel, together with the source and channel ids.
+    Returns the merged signal on the nodes which receive the data, otherwise None.
+    """
+    units, t_start, sampling_period, source_population = metadata
+    local_signals = [signal for signal in segment.analogsignals if signal.name == name]
+    if local_signals:
+        signal = local_signals[0]
+        channels = numpy.vstack((signal.annotations['source_ids'],
+                                 signal.channel_index.channel_ids)).T.astype(float)
+        values = signal.magnitude.T
+    else:  # none of the recorded cells are on this MPI node
+        channels = numpy.empty((0, 2))
+        values = numpy.empty((0,))
+    channels = gather_array(channels, all=all)
+    values = gather_array(values.reshape(-1), all=all)
+    if not receives_data:
+        return None
+    num_channels = channels.shape[0]
+    values = values.reshape((num_channels, values.size // num_channels))
+    signal = neo.AnalogSignal(values.T,
+                              units=units,
+                              t_start=t_start * pq.ms,
+                              sampling_period=sampling_period * pq.ms,
+                              name=name,
+                              source_population=source_population,
+                              source_ids=channels[:, 0].astype(int))
+    signal.channel_index = neo.ChannelIndex(index=numpy.arange(num_channels),
+                                            channel_ids=channels[:, 1].astype(int))
+    return signal
+
+
+_other_segment_contents = ("irregularlysampledsignals", "events", "epochs")
+
+
+def _gather_other_contents(segment, receives_data, all=False):
+    """
+    Gather the contents of a segment other than spike trains and analog
+    signals (irregularly sampled signals, events and epochs), which are
+    exchanged as Python objects. Returns a list of the merged children for
+    each of these attributes on the nodes which receive the data, otherwise None.
+    """
+    mpi_comm, mpi_flags = get_mpi_comm()
+    local_contents = [list(getattr(segment, attr)) for attr in _other_segment_contents]
+    if all:
+        node_contents = mpi_comm.allgather(local_contents)
+    else:
+        node_contents = mpi_comm.gather(local_contents, root=MPI_ROOT)
+    if not receives_data:
+        return None
+    return [sum((contents[k] for contents in node_contents), [])
+            for k in range(len(_other_segment_contents))]
+
+
+def gather_blocks(data, ordered=True, all=False):
+    """
+    Gather Neo Blocks from all MPI nodes.
+
+    Rather than pickling the Blocks, each segment is flattened into NumPy
+    arrays (spike times together with the ids of the neurons which emitted
+    them, and signal matrices together with their channel ids), which are
+    sent with :func:`gather_array`, one variable at a time. Any other
+    contents of the segments (irregularly sampled signals, events and
+    epochs) are gathered as Python objects and concatenated. The merged Block
+    is rebuilt only on the root node, or on all nodes if `all` is True; the
+    other nodes get back their local data.
+    """
     mpi_comm, mpi_flags = get_mpi_comm()
     assert isinstance(data, neo.Block)
-    # for now, use gather_dict, which will probably be slow. Can optimize later
-    D = {mpi_comm.rank: data}
-    D = gather_dict(D)
-    blocks = list(D.values())
-    merged = data
-    if mpi_comm.rank == MPI_ROOT:
-        merged = blocks[0]
-        for block in blocks[1:]:
-            merged.merge(block)
-    if ordered:
-        for segment in merged.segments:
-            ordered_spiketrains = sorted(segment.spiketrains, key=lambda s: s.annotations['source_id'])
-            segment.spiketrains = ordered_spiketrains
-    return merged
+    receives_data = all or mpi_comm.rank == MPI_ROOT
+    merged = neo.Block(name=data.name, description=data.description,
+                       rec_datetime=data.rec_datetime, **data.annotations)
+    for segment in data.segments:
+        # exchange the (small) metadata needed to rebuild the spike trains and signals,
+        # so that all nodes agree on which variables should be gathered
+        spike_metadata = None
+        if segment.spiketrains:
+            st = segment.spiketrains[0]
+            spike_metadata = (float(st.t_start.rescale(pq.ms)), float(st.t_stop.rescale(pq.ms)),
+                              st.annotations['source_population'])
+        signal_metadata = dict((signal.name, (signal.units.dimensionality.string,
+                                              float(signal.t_start.rescale(pq.ms)),
+                                              float(signal.sampling_period.rescale(pq.ms)),
+                                              signal.annotations['source_population']))
+                               for signal in segment.analogsignals)
+        all_spike_metadata = None
+        all_signal_metadata = {}
+        for node_spike_metadata, node_signal_metadata in mpi_comm.allgather((spike_metadata, signal_metadata)):
+            all_spike_metadata = all_spike_metadata or node_spike_metadata
+            all_signal_metadata.update(node_signal_metadata)
+
+        merged_segment = neo.Segment(name=segment.name, description=segment.description,
+                                     rec_datetime=segment.rec_datetime, **segment.annotations)
+        if all_spike_metadata is not None:
+            spiketrains = _gather_spiketrains(segment, all_spike_metadata, receives_data,
+                                              ordered=ordered, all=all)
+            if receives_data:
+                merged_segment.spiketrains = spiketrains
+        for name in sorted(all_signal_metadata):
+            signal = _gather_analogsignal(segment, name, all_signal_metadata[name],
+                                          receives_data, all=all)
+            if receives_data:
+                merged_segment.analogsignals.append(signal)
+                merged.channel_indexes.append(signal.channel_index)
+        other_contents = _gather_other_contents(segment, receives_data, all=all)
+        if receives_data:
+            for attr, children in zip(_other_segment_contents, other_contents):
+                setattr(merged_segment, attr, children)
+        merged.segments.append(merged_segment)
+    if receives_data:
+        return merged
+    else:
+        return data
 
 
 def mpi_sum(x):
@@ -163,6 +319,30 @@ def filter_by_variables(segment, variables):
         return new_segment
 
 
+def _filter_signal(signal, ids):
+    """
+    Return an `AnalogSignal` containing only the channels of `signal` recorded
+    from the neurons with the given IDs, or None if there are no such channels.
+    """
+    source_ids = numpy.asarray(signal.annotations["source_ids"])
+    keep = numpy.in1d(source_ids, ids)
+    if keep.all():
+        return signal
+    elif not keep.any():
+        return None
+    annotations = dict(signal.annotations, source_ids=source_ids[keep])
+    new_signal = neo.AnalogSignal(signal.magnitude[:, keep],
+                                  units=signal.units,
+                                  t_start=signal.t_start,
+                                  sampling_period=signal.sampling_period,
+                                  name=signal.name,
+                                  **annotations)
+    new_signal.channel_index = neo.ChannelIndex(
+            index=numpy.arange(keep.sum()),
+            channel_ids=numpy.asarray(signal.channel_index.channel_ids)[keep])
+    return new_signal
+
+
 def remove_duplicate_spiketrains(data):
     for segment in data.segments:
         spiketrains = {}
@@ -175,6 +355,93 @@ def remove_duplicate_spiketrains(data):
     return data
 
 
+class ColumnarSpikes(object):
+    """
+    Compact representation of the spikes recorded from a population during a
+    single segment: one array of spike times and one array containing the
+    index (within the population) of the neuron that emitted each spike,
+    together with the IDs and indices of all the recorded neurons, including
+    those which did not spike.
+
+    Neo `SpikeTrain` objects are only created when :meth:`to_spiketrains` is
+    called.
+    """
+
+    def __init__(self, times, source_indices, recorded_ids, recorded_indices,
+                 t_start, t_stop, source_population=None):
+        self.times = numpy.asarray(times, dtype=float)  # in ms
+        self.source_indices = numpy.asarray(source_indices, dtype=int)
+        self.recorded_ids = numpy.asarray(recorded_ids, dtype=int)
+        self.recorded_indices = numpy.asarray(recorded_indices, dtype=int)
+        self.t_start = t_start  # in ms
+        self.t_stop = t_stop  # in ms
+        self.source_population = source_population
+
+    def __len__(self):
+        """Return the total number of spikes."""
+        return self.times.size
+
+    def filter(self, ids):
+        """
+        Return a new ColumnarSpikes object containing only the spikes from the
+        neurons with the given IDs.
+        """
+        ids = numpy.asarray(ids if isinstance(ids, numpy.ndarray) else list(ids), dtype=int)
+        keep = numpy.in1d(self.recorded_ids, ids)
+        recorded_indices = self.recorded_indices[keep]
+        events = numpy.in1d(self.source_indices, recorded_indices)
+        return ColumnarSpikes(self.times[events], self.source_indices[events],
+                              self.recorded_ids[keep], recorded_indices,
+                              self.t_start, self.t_stop, self.source_population)
+
+    def spike_counts(self):
+        """Return the number of spikes emitted by each recorded neuron, as a dict with IDs as keys."""
+        if self.recorded_indices.size == 0:
+            return {}
+        counts = numpy.bincount(self.source_indices,
+                                minlength=self.recorded_indices.max() + 1)
+        return dict(zip(self.recorded_ids.tolist(), counts[self.recorded_indices].tolist()))
+
+    def to_spiketrains(self):
+        """
+        Return a list of Neo `SpikeTrain` objects, one for each recorded neuron,
+        in the order of `recorded_ids`.
+        """
+        order = numpy.argsort(self.source_indices, kind='mergesort')
+        sorted_indices = self.source_indices[order]
+        sorted_times = self.times[order]
+        starts = numpy.searchsorted(sorted_indices, self.recorded_indices, 'left')
+        stops = numpy.searchsorted(sorted_indices, self.recorded_indices, 'right')
+        return [neo.SpikeTrain(sorted_times[start:stop],
+                               t_start=self.t_start * pq.ms,
+                               t_stop=self.t_stop * pq.ms,
+                               units='ms',
+                               source_population=self.source_population,
+                               source_id=id,
+                               source_index=index)
+                for id, index, start, stop in zip(self.recorded_ids.tolist(),
+                                                  self.recorded_indices.tolist(),
+                                                  starts, stops)]
+
+
+def gather_columnar_spikes(spikes, all=False):
+    """
+    Gather :class:`ColumnarSpikes` from all MPI nodes, using :func:`gather_array`.
+    Nodes which do not receive the gathered data (all nodes except the root,
+    unless `all` is True) get back their local spikes.
+    """
+    mpi_comm, mpi_flags = get_mpi_comm()
+    events = gather_array(numpy.vstack((spikes.source_indices, spikes.times)).T, all=all)
+    recorded = gather_array(numpy.vstack((spikes.recorded_ids, spikes.recorded_indices)).T, all=all)
+    if all or mpi_comm.rank == MPI_ROOT:
+        order = numpy.argsort(recorded[:, 0], kind='mergesort')
+        return ColumnarSpikes(events[:, 1], events[:, 0].astype(int),
+                              recorded[order, 0].astype(int), recorded[order, 1].astype(int),
+                              spikes.t_start, spikes.t_stop, spikes.source_population)
+    else:
+        return spikes
+
+
 class DataCache(object):
     # primitive implementation for now, storing in memory - later can consider caching to disk
 
@@ -186,7 +453,7 @@ class DataCache(object):
 
     def store(self, obj):
         if obj not in self._data:
-            logger.debug("Adding %s to cache" % obj)
+            logger.debug("Adding %s to cache", obj)
             self._data.append(obj)
 
     def clear(self):
@@ -195,6 +462,10 @@ class DataCache(object):
 
 class Recorder(object):
     """Encapsulates data and functions related to recording model variables."""
+    # backends whose `_get_all_signals()` and `_get_spiketimes()` have been
+    # verified to return only the data recorded since the last call to
+    # `clear()`, as needed for streaming, should set this to True
+    _supports_streaming = False
 
     def __init__(self, population, file=None):
         """
@@ -215,6 +486,7 @@ class Recorder(object):
         self.clear_flag = False
         self._recording_start_time = self._simulator.state.t * pq.ms
         self.sampling_interval = self._simulator.state.dt
+        self.stream = None
 
     def record(self, variables, ids, sampling_interval=None):
         """
@@ -303,8 +575,8 @@ class Recorder(object):
         """Return the recorded data as a Neo `Block`."""
         variables = normalize_variables_arg(variables)
         data = neo.Block()
-        data.segments = [filter_by_variables(segment, variables)
-                         for segment in self.cache]
+        data.segments = [self._get_cached_segment(segment, spikes, variables, filter_ids)
+                         for segment, spikes in self.cache]
         if self._simulator.state.running:  # reset() has not been called, so current segment is not in cache
             data.segments.append(self._get_current_segment(filter_ids=filter_ids, variables=variables, clear=clear))
         # collect channel indexes
@@ -325,6 +597,78 @@ class Recorder(object):
             self.clear()
         return data
 
+    def _get_cached_segment(self, segment, spikes, variables, filter_ids=None):
+        """
+        Return a segment from the cache, containing only the given variables
+        and, if `filter_ids` is given, only the data from those neurons.
+        The spikes are cached as a :class:`ColumnarSpikes` object, and are
+        converted to spike trains only here.
+        """
+        segment = copy(filter_by_variables(segment, variables))
+        if filter_ids is not None:
+            ids = numpy.array([int(id) for id in filter_ids], dtype=int)
+            segment.analogsignals = [signal for signal in
+                                     (_filter_signal(signal, ids) for signal in segment.analogsignals)
+                                     if signal is not None]
+        if variables == 'all' or 'spikes' in variables:
+            if filter_ids is not None:
+                spikes = spikes.filter(filter_ids)
+            segment.spiketrains = spikes.to_spiketrains()
+        return segment
+
+    def _get_spiketimes_as_arrays(self, ids):
+        """
+        Return the spikes emitted by the neurons with the given IDs as two
+        arrays of equal length, containing the IDs of the emitting neurons and
+        the spike times.
+
+        Backends can override this to avoid building a dict of spike times.
+        """
+        data = self._get_spiketimes(ids)
+        spiketimes = [numpy.asarray(data.get(int(id), []), dtype=float) for id in ids]
+        senders = numpy.repeat(numpy.array([int(id) for id in ids], dtype=int),
+                               [times.size for times in spiketimes])
+        if spiketimes:
+            times = numpy.concatenate(spiketimes)
+        else:
+            times = numpy.array([])
+        return senders, times
+
+    def _get_current_spikes_columnar(self, filter_ids=None):
+        t_stop = self._simulator.state.t  # must run on all MPI nodes
+        sids = sorted(self.filter_recorded('spikes', filter_ids))
+        senders, times = self._get_spiketimes_as_arrays(sids)
+        if times.size > 0 and times.max() > t_stop:
+            warn("Recorded at least one spike after t_stop")
+            mask = times <= t_stop
+            senders = senders[mask]
+            times = times[mask]
+        recorded_ids = numpy.array([int(id) for id in sids], dtype=int)
+        if recorded_ids.size > 0:
+            recorded_indices = self.population.id_to_index(recorded_ids)
+            source_indices = recorded_indices[numpy.searchsorted(recorded_ids, senders)]
+        else:
+            recorded_indices = source_indices = numpy.array([], dtype=int)
+        return ColumnarSpikes(times, source_indices, recorded_ids, recorded_indices,
+                              float(self._recording_start_time.rescale(pq.ms)), t_stop,
+                              self.population.label)
+
+    def get_spikes_columnar(self, gather=False, filter_ids=None, clear=False):
+        """
+        Return the recorded spikes as a list of :class:`ColumnarSpikes`
+        objects, one per segment.
+        """
+        segments = [spikes if filter_ids is None else spikes.filter(filter_ids)
+                    for segment, spikes in self.cache]
+        if self._simulator.state.running:  # reset() has not been called, so current segment is not in cache
+            segments.append(self._get_current_spikes_columnar(filter_ids))
+        always_local = getattr(self.population.celltype, "always_local", False)
+        if gather and self._simulator.state.num_processes > 1 and not always_local:
+            segments = [gather_columnar_spikes(spikes) for spikes in segments]
+        if clear:
+            self.clear()
+        return segments
+
     def clear(self):
         """
         Clear all recorded data, both from the cache and the simulator.
@@ -379,14 +723,85 @@ class Recorder(object):
             N = gather_dict(N)
         return N
 
+    def stream_to(self, filename, flush_interval):
+        """
+        Stream the recorded data to the HDF5 file `filename` (see
+        :mod:`pyNN.recording.streaming`): every `flush_interval` ms during
+        `run()`, the data are retrieved from the simulator, appended to the
+        file and then cleared from memory.
+        """
+        if not self._supports_streaming:
+            raise NotImplementedError("Streaming recorded data is not yet supported by the %s backend"
+                                      % self._simulator.name)
+        if self._simulator.state.num_processes > 1:
+            filename += '.%d' % self._simulator.state.mpi_rank
+        self.close_stream()
+        self.stream = streaming.StreamWriter(filename, self.population.label)
+        self.flush_interval = flush_interval
+        self._next_flush = self._simulator.state.t + flush_interval
+
+    def _stream_callback(self, t):
+        """Callback for `run_until()`, which flushes the data every `flush_interval` ms."""
+        if t + 0.5 * self._simulator.state.dt >= self._next_flush:
+            self.flush_stream()
+            self._next_flush = t + self.flush_interval
+        return self._next_flush
+
+    def flush_stream(self):
+        """
+        Append the data recorded since the last flush to the stream file, and
+        clear them from the simulator.
+        """
+        t_start = float(self._recording_start_time.rescale(pq.ms))
+        if self._simulator.state.t <= t_start:
+            return
+        segment_index = self._simulator.state.segment_counter
+        for variable in sorted(self.recorded):
+            if variable == 'spikes':
+                self.stream.append_spikes(segment_index, self._get_current_spikes_columnar())
+            else:
+                ids = sorted(self.filter_recorded(variable, None))
+                signal_array = self._get_all_signals(variable, ids, clear=True)
+                if signal_array.size > 0:
+                    units = self.population.find_units(variable)
+                    self.stream.append_signal(segment_index, variable, signal_array,
+                                              t_start, self.sampling_interval,
+                                              units, ids,
+                                              self.population.id_to_index(numpy.array(ids, dtype=int)))
+        self.stream.flush()
+        self.clear()
+
+    def close_stream(self):
+        """Write any remaining data to the stream file, and close it."""
+        if self.stream is not None:
+            self.flush_stream()
+            self.stream.close()
+            self.stream = None
+
     def store_to_cache(self, annotations=None):
+        if self.stream is not None:
+            # the data are written to the stream file rather than to the cache
+            self.flush_stream()
+            self.clear_flag = False
+            self._recording_start_time = 0.0 * pq.ms
+            self._next_flush = self.flush_interval
+            return
         # make sure we haven't called get with clear=True since last reset
         # and that we did not do two resets in a row
         if (self._simulator.state.t != 0) and (not self.clear_flag):
             if annotations is None:
                 annotations = {}
-            segment = self._get_current_segment()
+            # spikes are cached in columnar form, rather than as one spike
+            # train per neuron
+            signal_variables = [variable for variable in self.recorded if variable != 'spikes']
+            segment = self._get_current_segment(variables=signal_variables)
             segment.annotate(**annotations)
-            self.cache.store(segment)
+            if 'spikes' in self.recorded:
+                spikes = self._get_current_spikes_columnar()
+            else:
+                spikes = ColumnarSpikes([], [], [], [],
+                                        float(self._recording_start_time.rescale(pq.ms)),
+                                        self._simulator.state.t, self.population.label)
+            self.cache.store((segment, spikes))
         self.clear_flag = False
         self._recording_start_time = 0.0 * pq.ms
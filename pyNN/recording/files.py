@@ -7,6 +7,7 @@ Classes:
     StandardTextFile
     PickleFile
     NumpyBinaryFile
+    NumpyArrayFile
     HDF5ArrayFile - requires PyTables
 
 :copyright: Copyright 2006-2019 by the PyNN team, see AUTHORS.
@@ -17,6 +18,7 @@ Classes:
 import numpy
 import os
 import shutil
+from itertools import islice
 try:
     import cPickle as pickle
 except ImportError:
@@ -130,6 +132,15 @@ class BaseFile(object):
         """
         raise NotImplementedError
 
+    def read_chunks(self, chunk_size):
+        """
+        Read data from the file in blocks of at most `chunk_size` rows.
+        Returns an iterator over NumPy arrays.
+        """
+        data = self.read()
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
     def get_metadata(self):
         """
         Read metadata from the file and return a dict.
@@ -166,6 +177,19 @@ class StandardTextFile(BaseFile):
         self._check_open()
         return numpy.loadtxt(self.fileobj)
 
+    def read_chunks(self, chunk_size):
+        __doc__ = BaseFile.read_chunks.__doc__
+        self._check_open()
+        while True:
+            lines = list(islice(self.fileobj, chunk_size))
+            if not lines:  # end of file
+                break
+            lines = [line for line in lines
+                     if line.strip() and line.lstrip()[:1] not in ("#", b"#")]
+            if lines:  # skip chunks containing only comments or blank lines
+                yield numpy.loadtxt(lines, ndmin=2)
+        self.fileobj.seek(0)
+
     def get_metadata(self):
         self._check_open()
         D = {}
@@ -243,6 +267,35 @@ class NumpyBinaryFile(BaseFile):
         return D
 
 
+class NumpyArrayFile(BaseFile):
+    """
+    Data are saved in .npy format, without metadata. When reading, the file is
+    memory-mapped, so that large arrays can be read in chunks without loading
+    them entirely into memory.
+    """
+
+    def write(self, data, metadata):
+        __doc__ = BaseFile.write.__doc__
+        self._check_open()
+        numpy.save(self.fileobj, numpy.asarray(data))
+        self.fileobj.close()
+
+    def read(self):
+        __doc__ = BaseFile.read.__doc__
+        self._check_open()
+        return numpy.load(self.name, mmap_mode='r')
+
+    def read_chunks(self, chunk_size):
+        __doc__ = BaseFile.read_chunks.__doc__
+        data = self.read()
+        for start in range(0, data.shape[0], chunk_size):
+            yield numpy.array(data[start:start + chunk_size])
+
+    def get_metadata(self):
+        __doc__ = BaseFile.get_metadata.__doc__
+        return {}
+
+
 if have_hdf5:
     class HDF5ArrayFile(BaseFile):
         """
@@ -282,6 +335,12 @@ if have_hdf5:
             __doc__ = BaseFile.read.__doc__
             return self.fileobj.root.data.read()
 
+        def read_chunks(self, chunk_size):
+            __doc__ = BaseFile.read_chunks.__doc__
+            node = self.fileobj.root.data
+            for start in range(0, node.shape[0], chunk_size):
+                yield node.read(start, min(start + chunk_size, node.shape[0]))
+
         def get_metadata(self):
             __doc__ = BaseFile.get_metadata.__doc__
             D = {}
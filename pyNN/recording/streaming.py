@@ -0,0 +1,110 @@
+"""
+Streaming of recorded data to disk during a simulation.
+
+When a population is recorded with a `flush_interval`, its recorder
+periodically retrieves the data from the simulator, appends it to an HDF5 file
+and clears the simulator's buffers, so that long simulations do not need to
+keep all recorded data in memory.
+
+The file contains one group per population (named by the population label),
+containing one group per segment ("segment000", ...). Spikes are stored in
+the datasets "spikes/times" and "spikes/source_index"; each recorded state
+variable has a group containing a 2D dataset "values" (time x channel) with
+attributes "units", "t_start" and "sampling_period", and datasets "source_ids"
+and "channel_ids". All datasets are chunked and compressed.
+
+Classes:
+    StreamWriter
+
+:copyright: Copyright 2006-2019 by the PyNN team, see AUTHORS.
+:license: CeCILL, see LICENSE for details.
+"""
+
+import numpy
+try:
+    import h5py
+    have_h5py = True
+except ImportError:
+    have_h5py = False
+
+
+_open_files = {}  # filename: [h5py.File, number of writers]
+
+
+def _open(filename):
+    if filename not in _open_files:
+        _open_files[filename] = [h5py.File(filename, "w"), 0]
+    _open_files[filename][1] += 1
+    return _open_files[filename][0]
+
+
+def _close(filename):
+    _open_files[filename][1] -= 1
+    if _open_files[filename][1] == 0:
+        _open_files.pop(filename)[0].close()
+
+
+class StreamWriter(object):
+    """
+    Appends the data recorded from a single population to a chunked,
+    compressed HDF5 file. Several writers (e.g. for the populations of an
+    Assembly) may share the same file.
+    """
+
+    def __init__(self, filename, label, compression="gzip"):
+        if not have_h5py:
+            raise ImportError("Streaming recorded data to disk requires h5py")
+        self.filename = filename
+        self.compression = compression
+        self.root = _open(filename).require_group(label)
+
+    def _segment(self, segment_index):
+        return self.root.require_group("segment%03d" % segment_index)
+
+    def _append(self, group, name, data):
+        """Append `data` to the dataset `name`, along the first axis."""
+        if name not in group:
+            group.create_dataset(name, data=data, maxshape=(None,) + data.shape[1:],
+                                 chunks=True, compression=self.compression)
+        else:
+            dataset = group[name]
+            n = dataset.shape[0]
+            dataset.resize(n + data.shape[0], axis=0)
+            dataset[n:] = data
+
+    def append_spikes(self, segment_index, spikes):
+        """Append spikes, given as a :class:`~pyNN.recording.ColumnarSpikes` object."""
+        group = self._segment(segment_index).require_group("spikes")
+        self._append(group, "times", spikes.times)
+        self._append(group, "source_index", spikes.source_indices)
+
+    def append_signal(self, segment_index, variable, values, t_start, sampling_period,
+                      units, source_ids, channel_ids):
+        """
+        Append the samples in `values` (a 2D array, time x channel) of the
+        signal recorded from `variable`, starting at time `t_start` (in ms).
+        Samples which have already been written (as happens at the boundaries
+        between successive flushes) are skipped.
+        """
+        group = self._segment(segment_index).require_group(variable)
+        if "values" in group:
+            dataset = group["values"]
+            next_time = dataset.attrs["t_start"] + dataset.shape[0] * sampling_period
+            n_written = int(round((next_time - t_start) / sampling_period))
+            values = values[max(n_written, 0):]
+            self._append(group, "values", values)
+        else:
+            self._append(group, "values", values)
+            group["values"].attrs.update(units=units, t_start=t_start,
+                                         sampling_period=sampling_period)
+            group.create_dataset("source_ids", data=numpy.asarray(source_ids, dtype=int))
+            group.create_dataset("channel_ids", data=numpy.asarray(channel_ids, dtype=int))
+
+    def flush(self):
+        self.root.file.flush()
+
+    def close(self):
+        if self.root is not None:
+            self.root.file.flush()
+            _close(self.filename)
+            self.root = None
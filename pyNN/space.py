@@ -34,6 +34,11 @@ from operator import and_
 from pyNN.random import NumpyRNG
 from pyNN import descriptions
 import logging
+try:
+    from scipy.spatial import cKDTree
+    have_scipy = True
+except ImportError:
+    have_scipy = False
 
 logger = logging.getLogger("PyNN")
 
@@ -128,8 +133,117 @@ class Space(object):
         numpy.sqrt(d, d)
         return d.flatten()
 
+    def paired_distances(self, A, B):
+        """
+        Calculate the distances between corresponding rows of two (N, 3) arrays
+        of coordinates, given the topology of the current space.
+        """
+        assert A.shape == B.shape
+        A = A.reshape(-1, 3)
+        B = self.scale_factor * (B.reshape(-1, 3) + self.offset)
+        d = numpy.zeros(A.shape[0], dtype=A.dtype)
+        for axis in self.axes:
+            diff = A[:, axis] - B[:, axis]
+            if self.periodic_boundaries is not None:
+                boundaries = self.periodic_boundaries[axis]
+                if boundaries is not None:
+                    range = boundaries[1] - boundaries[0]
+                    ad = abs(diff)
+                    diff = numpy.minimum(ad, range - ad)
+            d += diff**2
+        return numpy.sqrt(d)
+
+    def _wrapped_coordinates(self, A, B, radius):
+        """
+        Return the coordinates of `A` and `B` (with scale factor and offset
+        applied to `B`) in a form suitable for :class:`scipy.spatial.cKDTree`,
+        together with the box size.
+
+        cKDTree handles periodic boundaries if the coordinates are wrapped into
+        [0, boxsize). Non-periodic axes are given a box size large enough that
+        wrapping cannot bring two points closer than `radius`.
+        """
+        A = A.reshape(-1, 3)[:, self.axes].astype(float)
+        B = (self.scale_factor * (B.reshape(-1, 3) + self.offset))[:, self.axes].astype(float)
+        boxsize = numpy.empty(len(self.axes))
+        for k, axis in enumerate(self.axes):
+            boundaries = None
+            if self.periodic_boundaries is not None:
+                boundaries = self.periodic_boundaries[axis]
+            if boundaries is None:
+                low = min(A[:, k].min(), B[:, k].min())
+                boxsize[k] = max(A[:, k].max(), B[:, k].max()) - low + 2 * radius + 1.0
+            else:
+                low = boundaries[0]
+                boxsize[k] = boundaries[1] - boundaries[0]
+            for X in (A, B):
+                X[:, k] = (X[:, k] - low) % boxsize[k]
+                X[X[:, k] >= boxsize[k], k] = 0.0
+        return A, B, boxsize
+
+    def neighbour_pairs(self, A, B, radius):
+        """
+        Find all pairs of points, one from the (N, 3) array of coordinates `A`
+        and one from the (M, 3) array `B`, which are within distance `radius`,
+        given the topology of the current space.
+
+        Returns two arrays, containing the indices of the rows of `A` and of
+        `B` respectively, sorted by the index in `B` then in `A`. If scipy is
+        available a k-d tree is used, otherwise each point of `B` is compared
+        with all points of `A`. The k-d tree may include pairs lying very
+        slightly further apart than `radius`, due to floating-point errors.
+        """
+        A = A.reshape(-1, 3)
+        B = B.reshape(-1, 3)
+        if A.shape[0] == 0 or B.shape[0] == 0:
+            return numpy.array([], dtype=int), numpy.array([], dtype=int)
+        if not have_scipy:
+            i = [numpy.nonzero(self.distances(A, b) <= radius)[0] for b in B]
+            j = numpy.repeat(numpy.arange(B.shape[0]), [x.size for x in i])
+            return numpy.concatenate(i).astype(int), j
+        A, B, boxsize = self._wrapped_coordinates(A, B, radius)
+        tree_A = cKDTree(A, boxsize=boxsize)
+        tree_B = cKDTree(B, boxsize=boxsize)
+        pairs = tree_B.sparse_distance_matrix(tree_A, radius * (1 + 1e-9), output_type='ndarray')
+        i = pairs['j'].astype(int)
+        j = pairs['i'].astype(int)
+        order = numpy.argsort(j * A.shape[0] + i)
+        return i[order], j[order]
+
+    def neighbours(self, A, B, radius, block_size=1000):
+        """
+        For each row of the (M, 3) array of coordinates `B`, return an array
+        of the (sorted) indices of the rows of the (N, 3) array `A` which are
+        within distance `radius`, given the topology of the current space.
+
+        Returns a generator, which finds the neighbours of blocks of
+        `block_size` points at a time. If scipy is available, a k-d tree of
+        `A` is built once and queried with each block of `B`, otherwise
+        :meth:`neighbour_pairs` is used for each block.
+        """
+        A = A.reshape(-1, 3)
+        B = B.reshape(-1, 3)
+        if have_scipy and A.shape[0] > 0 and B.shape[0] > 0:
+            A, B, boxsize = self._wrapped_coordinates(A, B, radius)
+            tree_A = cKDTree(A, boxsize=boxsize)
+            for start in range(0, B.shape[0], block_size):
+                block = B[start:start + block_size]
+                for indices in tree_A.query_ball_point(block, radius * (1 + 1e-9)):
+                    yield numpy.sort(numpy.array(indices, dtype=int))
+        else:
+            for start in range(0, B.shape[0], block_size):
+                block = B[start:start + block_size]
+                i, j = self.neighbour_pairs(A, block, radius)
+                boundaries = numpy.cumsum(numpy.bincount(j, minlength=block.shape[0]))[:-1]
+                for indices in numpy.split(i, boundaries):
+                    yield indices
+
     def distance_generator(self, f, g):
         def distance_map(i, j):
+            if (isinstance(i, numpy.ndarray) and i.ndim == 1
+                    and isinstance(j, numpy.ndarray) and j.ndim == 1):
+                # i and j are lists of (pre, post) pairs, not the axes of a sub-array
+                return self.paired_distances(f(i), g(j))
             shape = []
             if isinstance(i, numpy.ndarray) and i.ndim == 2:
                 i = i[:, 0]
@@ -295,6 +295,33 @@ class AssemblyTest(unittest.TestCase):
         a = sim.Assembly(p3, p1, p2)
         self.assertRaises(IndexError, a.id_to_index, p3.last_id + 1)
 
+    def test_cells_are_ids(self, sim=sim):
+        p1 = sim.Population(5, sim.IF_cond_exp())
+        p2 = sim.Population(4, sim.IF_curr_exp())
+        p3 = sim.Population(6, sim.IF_cond_alpha())
+        a = p3[1:4] + p1 + p2[::2]
+        expected_parents = [p3] * 3 + [p1] * 5 + [p2] * 2
+        for k, parent in enumerate(expected_parents):
+            self.assertIsInstance(a.all_cells[k], sim.simulator.ID)
+            self.assertIs(a.all_cells[k].parent, parent)
+        self.assertIs(a.local_cells[0].parent, p3)
+        self.assertIsInstance(a.local_cells[0].celltype, sim.IF_cond_alpha)
+        self.assertIs(a.all_cells[[8, 0]][0].parent, p2)
+        self.assertIs(numpy.sort(a.all_cells)[0].parent, p1)
+
+    def test_id_to_index_after_iadd(self, sim=sim):
+        p1 = sim.Population(11, sim.IF_cond_exp())
+        p2 = sim.Population(6, sim.IF_cond_alpha())
+        a = sim.Assembly(p2)
+        self.assertEqual(a.id_to_index(p2[5]), 5)
+        self.assertRaises(IndexError, a.id_to_index, p1[0])
+        a += p1
+        self.assertEqual(a.size, 17)
+        self.assertEqual(a.id_to_index(p1[0]), 6)
+        self.assertEqual(a[7], p1[1])
+        self.assertEqual(a.all_cells.size, 17)
+        self.assertEqual(a._mask_local.size, 17)
+
     def test_getitem_int(self, sim=sim):
         p1 = sim.Population(11, sim.IF_cond_exp())
         p2 = sim.Population(6, sim.IF_cond_alpha())
@@ -470,11 +470,16 @@ class TestFixedNumberPostConnector(unittest.TestCase):
         C = connectors.FixedNumberPostConnector(n=3, rng=MockRNG(delta=1))
         syn = sim.StaticSynapse(weight="0.5*d")
         prj = sim.Projection(self.p1, self.p2, C, syn)
-        # MockRNG.permutation(arr) returns the reverse of arr, so each pre neuron will connect to neurons 4, 3, 2
-        # however, only neuron 3 is on the "local" (fake MPI) node
+        # connections as follows: (pre - list of post)
+        #   0 - 2 3 4
+        #   1 - 0 1 4
+        #   2 - 1 2 3
+        #   3 - 0 3 4
+        # however, only neurons 1 and 3 are on the "local" (fake MPI) node
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(0, 3, 1.5, 0.123),
-                          (1, 3, 1.0, 0.123),
+                         [(1, 1, 0.0, 0.123),
+                          (2, 1, 0.5, 0.123),
+                          (0, 3, 1.5, 0.123),
                           (2, 3, 0.5, 0.123),
                           (3, 3, 0.0, 0.123)])
 
@@ -482,19 +487,19 @@ class TestFixedNumberPostConnector(unittest.TestCase):
         C = connectors.FixedNumberPostConnector(n=7, rng=MockRNG(delta=1))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p1, self.p2, C, syn)
-        # each pre neuron will connect to all post neurons (population size 5 is less than n), then to 4, 3 (MockRNG.permutation)
+        # each pre neuron will connect to all post neurons (population size 5 is less than n), then to two more:
+        #   0 - 0 1,  1 - 2 3,  2 - 4 0,  3 - 1 2
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
                          [(0, 1, 0.0, 0.123),
+                          (0, 1, 0.0, 0.123),
                           (1, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
                           (3, 1, 0.0, 0.123),
-                          (0, 3, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
                           (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),
-                          (3, 3, 0.0, 0.123),
                           (3, 3, 0.0, 0.123)])
 
     def test_with_n_larger_than_population_size_no_self_connections(self, sim=sim):
@@ -503,11 +508,11 @@ class TestFixedNumberPostConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         # connections as follows: (pre - list of post)
-        #   0 - 1 2 3 4 4 3 2
-        #   1 - 0 2 3 4 4 3 2
-        #   2 - 0 1 3 4 4 3 1
-        #   3 - 0 1 2 4 4 2 1
-        #   4 - 0 1 2 3 3 2 1
+        #   0 - 1 2 3 4 2 3 4
+        #   1 - 0 2 3 4 0 3 4
+        #   2 - 0 1 3 4 0 1 4
+        #   3 - 0 1 2 4 0 1 2
+        #   4 - 0 1 2 3 1 2 3
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
                          [(0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
@@ -521,9 +526,8 @@ class TestFixedNumberPostConnector(unittest.TestCase):
                           (1, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),
                           (4, 3, 0.0, 0.123),
-                          (4, 3, 0.0, 0.123), ])
+                          (4, 3, 0.0, 0.123)])
 
     def test_with_replacement(self, sim=sim):
         C = connectors.FixedNumberPostConnector(n=3, with_replacement=True, rng=MockRNG(delta=1))
@@ -559,16 +563,18 @@ class TestFixedNumberPostConnector(unittest.TestCase):
                                                 allow_self_connections=False, rng=MockRNG(start=2, delta=1))
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
-        # 0 - 2 3 4
-        # 1 - 0 2 3
-        # 2 - 4 0 1
-        # 3 - 2 4 0
-        # 4 - 1 2 3
+        # 0 - 3 4 1
+        # 1 - 2 3 4
+        # 2 - 0 1 3
+        # 3 - 4 0 1
+        # 4 - 2 3 0
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(2, 1, 0.0, 0.123),
-                          (4, 1, 0.0, 0.123),
+                         [(0, 1, 0.0, 0.123),
+                          (2, 1, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
                           (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
+                          (2, 3, 0.0, 0.123),
                           (4, 3, 0.0, 0.123)])
 
 
@@ -584,13 +590,13 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         C = connectors.FixedNumberPreConnector(n=3, rng=MockRNG(delta=1))
         syn = sim.StaticSynapse(weight="0.1*d")
         prj = sim.Projection(self.p1, self.p2, C, syn)
-        self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(3, 1, 0.2, 0.123),
-                          (2, 1, 0.1, 0.123),
-                          (1, 1, 0.0, 0.123),
-                          (3, 3, 0.0, 0.123),
-                          (2, 3, 0.1, 0.123),
-                          (1, 3, 0.2, 0.123), ])
+        assert_array_almost_equal(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
+                                  [(0, 1, 0.1, 0.123),
+                                   (2, 1, 0.1, 0.123),
+                                   (3, 1, 0.2, 0.123),
+                                   (0, 3, 0.3, 0.123),
+                                   (1, 3, 0.2, 0.123),
+                                   (2, 3, 0.1, 0.123)])
 
     def test_with_n_larger_than_population_size(self, sim=sim):
         C = connectors.FixedNumberPreConnector(n=7, rng=MockRNG(delta=1))
@@ -601,16 +607,16 @@ class TestFixedNumberPreConnector(unittest.TestCase):
                           (1, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
                           (3, 1, 0.0, 0.123),
-                          (3, 1, 0.0, 0.123),
+                          (0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
-                          (1, 1, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
                           (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
                           (3, 3, 0.0, 0.123),
-                          (3, 3, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),
-                          (1, 3, 0.0, 0.123), ])
+                          (0, 3, 0.0, 0.123),
+                          (1, 3, 0.0, 0.123),
+                          (2, 3, 0.0, 0.123)])
 
     def test_with_n_larger_than_population_size_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPreConnector(
@@ -622,16 +628,16 @@ class TestFixedNumberPreConnector(unittest.TestCase):
                           (2, 1, 0.0, 0.123),
                           (3, 1, 0.0, 0.123),
                           (4, 1, 0.0, 0.123),
-                          (4, 1, 0.0, 0.123),
+                          (0, 1, 0.0, 0.123),
                           (3, 1, 0.0, 0.123),
-                          (2, 1, 0.0, 0.123),
+                          (4, 1, 0.0, 0.123),
                           (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
                           (4, 3, 0.0, 0.123),
-                          (4, 3, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),
-                          (1, 3, 0.0, 0.123), ])
+                          (0, 3, 0.0, 0.123),
+                          (1, 3, 0.0, 0.123),
+                          (2, 3, 0.0, 0.123)])
 
     def test_with_replacement(self, sim=sim):
         C = connectors.FixedNumberPreConnector(n=3, with_replacement=True, rng=MockRNG(delta=1))
@@ -671,21 +677,12 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [  # (2, 0, 0.0, 0.123),  # [2, 3, 4] --> [2, 3, 4]
-            #(3, 0, 0.0, 0.123),
-            #(4, 0, 0.0, 0.123),
-            (0, 1, 0.0, 0.123),   # [0, 1, 2] --> [0, 3, 2]
-            #(1, 1, 0.0, 0.123),
-            (3, 1, 0.0, 0.123),
-            (2, 1, 0.0, 0.123),
-            # (4, 2, 0.0, 0.123),  # [4, 0, 1] --> [4, 0, 1]
-            #(0, 2, 0.0, 0.123),
-            #(1, 2, 0.0, 0.123),
-            (2, 3, 0.0, 0.123),   # [2, 3, 4] --> [2, 0, 4]
-            #(3, 3, 0.0, 0.123),
-            (0, 3, 0.0, 0.123),
-            (4, 3, 0.0, 0.123),
-        ])
+                         [(2, 1, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
+                          (4, 1, 0.0, 0.123),
+                          (4, 3, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
+                          (1, 3, 0.0, 0.123)])
 
     def test_no_replacement_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPreConnector(n=3, with_replacement=False,
@@ -693,13 +690,12 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(4, 1, 0.0, 0.123),
-                          (3, 1, 0.0, 0.123),
+                         [(0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
-                          (4, 3, 0.0, 0.123),
-                          #(3, 3, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
-                          (1, 3, 0.0, 0.123), ])
+                          (4, 3, 0.0, 0.123)])
 
     def test_with_replacement_parallel_unsafe(self, sim=sim):
         C = connectors.FixedNumberPreConnector(
@@ -720,12 +716,12 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p1, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(3, 1, 0.0, 0.123),
+                         [(1, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
-                          (1, 1, 0.0, 0.123),
-                          (3, 3, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
-                          (1, 3, 0.0, 0.123), ])
+                          (3, 3, 0.0, 0.123)])
 
 
 class TestArrayConnector(unittest.TestCase):
@@ -763,10 +759,10 @@ class TestArrayConnector(unittest.TestCase):
         ], dtype=bool)
         C = connectors.ArrayConnector(connections, safe=False)
         prj = sim.Projection(self.p1, self.p2, C, syn)
-        self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
-                         [(1, 0, 0.0, 1.0),
-                          (0, 2, 3.0, 1.3),
-                          (2, 2, 4.0, 1.4000000000000001)])  # better to do an "almost-equal" check
+        assert_array_almost_equal(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
+                                  [(1, 0, 0.0, 1.0),
+                                   (0, 2, 3.0, 1.3),
+                                   (2, 2, 4.0, 1.4)])
 
 
 class TestCloneConnector(unittest.TestCase):
@@ -787,17 +783,23 @@ class TestCloneConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         self.ref_prj = sim.Projection(self.p1, self.p2, list_connector, syn)
         self.orig_gather_dict = recording.gather_dict  # create reference to original function
-        # The gather_dict function in recording needs to be temporarily replaced so it can work with
-        # a mock version of the function to avoid it throwing an mpi4py import error when setting
-        # the rank in pyNN.mock by hand to > 1
+        self.orig_gather_array = recording.gather_array
+        # The gather_dict and gather_array functions in recording need to be temporarily replaced
+        # so they can work with mock versions of the functions to avoid them throwing an mpi4py
+        # import error when setting the rank in pyNN.mock by hand to > 1
 
         def mock_gather_dict(D, all=False):
             return D
+
+        def mock_gather_array(data, all=False):
+            return data
         recording.gather_dict = mock_gather_dict
+        recording.gather_array = mock_gather_array
 
     def tearDown(self, sim=sim):
-        # restore original gather_dict function
+        # restore original gather_dict and gather_array functions
         recording.gather_dict = self.orig_gather_dict
+        recording.gather_array = self.orig_gather_array
 
     def test_connect(self, sim=sim):
         syn = sim.StaticSynapse(weight=5.0, delay=0.5)
@@ -807,6 +809,23 @@ class TestCloneConnector(unittest.TestCase):
                          [(0, 1, 5.0, 0.5),
                           (2, 3, 5.0, 0.5)])
 
+    def test_connect_with_parallel_safe_random_weights(self, sim=sim):
+        # the connections from the other node are needed to draw the same
+        # random numbers as in a serial simulation
+        all_connections = numpy.array([(0, 0), (3, 0), (2, 3), (2, 2), (0, 1)], dtype=float)
+
+        def mock_gather_array(data, all=False):
+            self.assertTrue(all)
+            return all_connections
+        recording.gather_array = mock_gather_array
+        rd = random.RandomDistribution('uniform', (0, 1), rng=MockRNG(delta=1.0))
+        syn = sim.StaticSynapse(weight=rd, delay=0.5)
+        C = connectors.CloneConnector(self.ref_prj)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),  # use gather False because we are faking the MPI
+                         [(0, 1, 2.0, 0.5),
+                          (2, 3, 4.0, 0.5)])
+
     def test_connect_with_pre_post_mismatch(self, sim=sim):
         syn = sim.StaticSynapse()
         C = connectors.CloneConnector(self.ref_prj)
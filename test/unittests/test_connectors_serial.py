@@ -18,6 +18,10 @@ import sys
 from numpy.testing import assert_array_equal, assert_array_almost_equal
 from .mocks import MockRNG, MockRNG2, MockRNG3
 import pyNN.mock as sim
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
 
 
 orig_mpi_get_config = random.get_mpi_config
@@ -230,6 +234,40 @@ class TestAllToAllConnector(unittest.TestCase):
                           (2, 4, 102.0, 4.2),
                           (3, 4, 101.0, 2.2)])
 
+    def test_connect_in_chunks(self, sim=sim):
+        rd = random.RandomDistribution(
+            'uniform', (0, 1), rng=MockRNG(delta=1.0, parallel_safe=True))
+        syn = sim.StaticSynapse(weight=rd, delay="0.2+2*d")
+        C = connectors.AllToAllConnector(safe=False)
+        C.chunk_size = 6
+        levels = []
+        C.callback = levels.append
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        assert_array_almost_equal(prj.get('weight', format='array'),
+                                  numpy.array([[0., 4.,  8., 12., 16.],
+                                               [1., 5.,  9., 13., 17.],
+                                               [2., 6., 10., 14., 18.],
+                                               [3., 7., 11., 15., 19.]]),
+                                  9)
+        assert_array_almost_equal(prj.get('delay', format='array'),
+                                  0.2 + 2 * abs(numpy.arange(4)[:, None] - numpy.arange(5)),
+                                  9)
+        self.assertEqual(levels, [0.4, 0.8, 1.0])
+
+    def test_connect_without_bulk_connect(self, sim=sim):
+        # backends which do not provide _bulk_connect() are connected column by column
+        orig_bulk_connect = sim.Projection._bulk_connect
+        try:
+            del sim.Projection._bulk_connect
+            C = connectors.AllToAllConnector(safe=False)
+            syn = sim.StaticSynapse(weight="d+100", delay=0.5)
+            prj = sim.Projection(self.p1, self.p2, C, syn)
+        finally:
+            sim.Projection._bulk_connect = orig_bulk_connect
+        self.assertEqual(len(prj), 20)
+        self.assertEqual(prj.get(["weight", "delay"], format='list')[5],
+                         (1, 1, 100.0, 0.5))
+
     def test_connect_with_delays_None(self, sim=sim):
         syn = sim.StaticSynapse(weight=0.1, delay=None)
         C = connectors.AllToAllConnector()
@@ -405,6 +443,42 @@ class TestFixedProbabilityConnector(unittest.TestCase):
                                                [1.2,   1.4,   nan,   nan,   2.8]]),
                                   9)
 
+    def test_connect_sparse(self, sim=sim):
+        p = sim.Population(200, sim.IF_cond_exp())
+        C = connectors.FixedProbabilityConnector(p_connect=0.05, sparse=True,
+                                                 rng=random.NumpyRNG(seed=1234))
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        connections = prj.get([], format='list')
+        # no multiple connections
+        self.assertEqual(len(set(connections)), len(connections))
+        # expected number of connections is 2000, standard deviation ~44
+        self.assertLess(abs(len(connections) - 2000), 200)
+
+    def test_connect_sparse_no_self_connections(self, sim=sim):
+        p = sim.Population(50, sim.IF_cond_exp())
+        C = connectors.FixedProbabilityConnector(p_connect=0.5, sparse=True,
+                                                 allow_self_connections=False,
+                                                 rng=random.NumpyRNG(seed=1234))
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        connections = numpy.array(prj.get([], format='list'), dtype=int)
+        self.assertGreater(connections.shape[0], 0)
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+
+    def test_connect_sparse_no_mutual_connections(self, sim=sim):
+        p = sim.Population(50, sim.IF_cond_exp())
+        C = connectors.FixedProbabilityConnector(p_connect=0.5, sparse=True,
+                                                 allow_self_connections='NoMutual',
+                                                 rng=random.NumpyRNG(seed=1234))
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        connections = numpy.array(prj.get([], format='list'), dtype=int)
+        self.assertGreater(connections.shape[0], 0)
+        self.assertTrue((connections[:, 0] > connections[:, 1]).all())
+
+    def test_connect_sparse_with_probability_one(self, sim=sim):
+        C = connectors.FixedProbabilityConnector(p_connect=1., sparse=True)
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        self.assertEqual(len(prj), self.p1.size * self.p2.size)
+
 
 class TestDistanceDependentProbabilityConnector(unittest.TestCase):
 
@@ -436,6 +510,64 @@ class TestDistanceDependentProbabilityConnector(unittest.TestCase):
                           (3, 3, 0.0, 0.123),
                           (3, 4, 0.0, 0.123)])
 
+    def test_connect_with_max_distance(self, sim=sim):
+        C = connectors.DistanceDependentProbabilityConnector(d_expression="d<1.5",
+                                                             max_distance="auto",
+                                                             rng=MockRNG(delta=0.01))
+        self.assertEqual(C.max_distance, 1.5)
+        syn = sim.StaticSynapse(weight=lambda d: d + 0.1)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(prj.get(["weight", "delay"], format='list'),
+                         [(0, 0, 0.1, 0.123),
+                          (1, 0, 1.1, 0.123),
+                          (0, 1, 1.1, 0.123),
+                          (1, 1, 0.1, 0.123),
+                          (2, 1, 1.1, 0.123),
+                          (1, 2, 1.1, 0.123),
+                          (2, 2, 0.1, 0.123),
+                          (3, 2, 1.1, 0.123),
+                          (2, 3, 1.1, 0.123),
+                          (3, 3, 0.1, 0.123),
+                          (3, 4, 1.1, 0.123)])
+
+    def test_connect_with_max_distance_periodic_boundaries(self, sim=sim):
+        p = sim.Population(20, sim.IF_cond_exp(), structure=space.Line())
+        C = connectors.DistanceDependentProbabilityConnector(d_expression="exp(-d)*(d<=2)",
+                                                             max_distance=2.0,
+                                                             allow_self_connections=False,
+                                                             rng=random.NumpyRNG(seed=87))
+        prj = sim.Projection(p, p, C, sim.StaticSynapse(),
+                             space=space.Space(periodic_boundaries=((0, 20), None, None)))
+        connections = numpy.array(prj.get([], format='list'), dtype=int)
+        self.assertGreater(connections.shape[0], 0)
+        d = abs(connections[:, 0] - connections[:, 1])
+        d = numpy.minimum(d, 20 - d)
+        self.assertTrue(((d > 0) & (d <= 2)).all())
+        # some connections wrap around the boundary
+        self.assertTrue((abs(connections[:, 0] - connections[:, 1]) > 2).any())
+
+    @unittest.skipUnless(connectors.have_numexpr, "Requires numexpr")
+    def test_numexpr_matches_python_evaluation(self, sim=sim):
+        p = sim.Population(30, sim.IF_cond_exp(), structure=space.Line())
+        for max_distance in (None, 5.0):
+            connections = []
+            for use_numexpr in (True, False):
+                C = connectors.DistanceDependentProbabilityConnector(
+                        d_expression="exp(-d/3.0)*(d<5)", max_distance=max_distance,
+                        rng=random.NumpyRNG(seed=3427))
+                self.assertTrue(C._use_numexpr)
+                C._use_numexpr = use_numexpr
+                prj = sim.Projection(p, p, C, sim.StaticSynapse())
+                connections.append(prj.get([], format='list'))
+            self.assertGreater(len(connections[0]), 0)
+            self.assertEqual(connections[0], connections[1])
+
+    def test_max_distance_auto_invalid(self, sim=sim):
+        self.assertRaises(ValueError, connectors.DistanceDependentProbabilityConnector,
+                          d_expression="exp(-d)", max_distance="auto")
+        self.assertRaises(ValueError, connectors.DistanceDependentProbabilityConnector,
+                          d_expression="(d<3) + 0.1", max_distance="auto")
+
 
 class TestFromListConnector(unittest.TestCase):
 
@@ -531,7 +663,8 @@ class TestFromFileConnector(unittest.TestCase):
 
     def tearDown(self, sim=sim):
         sim.end()
-        for path in ("test.connections", "test.connections.1", "test.connections.2"):
+        for path in ("test.connections", "test.connections.1", "test.connections.2",
+                     "test.connections.npy"):
             if os.path.exists(path):
                 os.remove(path)
 
@@ -567,6 +700,27 @@ class TestFromFileConnector(unittest.TestCase):
                           (2, 2, 0.4, 0.13, 130.0, 97.0, 88.8),
                           (2, 3, 0.3, 0.12, 120.0, 98.0, 88.8)])
 
+    def test_connect_with_numpy_file_in_chunks(self, sim=sim):
+        numpy.save("test.connections.npy", numpy.array(self.connection_list))
+        C = connectors.FromFileConnector("test.connections.npy", distributed=False)
+        C.chunk_size = 2
+        syn = sim.StaticSynapse()
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(sorted(prj.get(["weight", "delay"], format='list')),
+                         [(0, 0, 0.1, 0.1),
+                          (0, 1, 0.5, 0.14),
+                          (2, 2, 0.4, 0.13),
+                          (2, 3, 0.3, 0.12),
+                          (3, 0, 0.2, 0.11)])
+
+    def test_hdf5_file_without_pytables(self, sim=sim):
+        orig_have_hdf5 = connectors.files.have_hdf5
+        connectors.files.have_hdf5 = False
+        try:
+            self.assertRaises(ImportError, connectors.FromFileConnector, "test.connections.h5")
+        finally:
+            connectors.files.have_hdf5 = orig_have_hdf5
+
 
 class TestFixedNumberPreConnector(unittest.TestCase):
 
@@ -584,21 +738,21 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         prj = sim.Projection(self.p1, self.p2, C, syn)
         rec = prj.get(["weight", "delay"], format='list')
         assert_array_almost_equal([list(r) for r in rec],
-                                  [(3, 0, 0.3, 0.123),
+                                  [(1, 0, 0.1, 0.123),
                                    (2, 0, 0.2, 0.123),
-                                   (1, 0, 0.1, 0.123),
-                                   (3, 1, 0.2, 0.123),
+                                   (3, 0, 0.3, 0.123),
+                                   (0, 1, 0.1, 0.123),
                                    (2, 1, 0.1, 0.123),
-                                   (1, 1, 0.0, 0.123),
-                                   (3, 2, 0.1, 0.123),
-                                   (2, 2, 0.0, 0.123),
+                                   (3, 1, 0.2, 0.123),
+                                   (0, 2, 0.2, 0.123),
                                    (1, 2, 0.1, 0.123),
-                                   (3, 3, 0.0, 0.123),
-                                   (2, 3, 0.1, 0.123),
+                                   (3, 2, 0.1, 0.123),
+                                   (0, 3, 0.3, 0.123),
                                    (1, 3, 0.2, 0.123),
-                                   (3, 4, 0.1, 0.123),
+                                   (2, 3, 0.1, 0.123),
+                                   (1, 4, 0.3, 0.123),
                                    (2, 4, 0.2, 0.123),
-                                   (1, 4, 0.3, 0.123)])
+                                   (3, 4, 0.1, 0.123)])
 
     def test_with_n_larger_than_population_size(self, sim=sim):
         C = connectors.FixedNumberPreConnector(n=7, rng=MockRNG(delta=1))
@@ -609,37 +763,37 @@ class TestFixedNumberPreConnector(unittest.TestCase):
                           (1, 0, 0.0, 0.123),
                           (2, 0, 0.0, 0.123),
                           (3, 0, 0.0, 0.123),
-                          (3, 0, 0.0, 0.123),
-                          (2, 0, 0.0, 0.123),
                           (1, 0, 0.0, 0.123),
+                          (2, 0, 0.0, 0.123),
+                          (3, 0, 0.0, 0.123),
                           (0, 1, 0.0, 0.123),
                           (1, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
                           (3, 1, 0.0, 0.123),
-                          (3, 1, 0.0, 0.123),
+                          (0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
-                          (1, 1, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
                           (0, 2, 0.0, 0.123),
                           (1, 2, 0.0, 0.123),
                           (2, 2, 0.0, 0.123),
                           (3, 2, 0.0, 0.123),
-                          (3, 2, 0.0, 0.123),
-                          (2, 2, 0.0, 0.123),
+                          (0, 2, 0.0, 0.123),
                           (1, 2, 0.0, 0.123),
+                          (3, 2, 0.0, 0.123),
                           (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
                           (3, 3, 0.0, 0.123),
-                          (3, 3, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
+                          (2, 3, 0.0, 0.123),
                           (0, 4, 0.0, 0.123),
                           (1, 4, 0.0, 0.123),
                           (2, 4, 0.0, 0.123),
                           (3, 4, 0.0, 0.123),
-                          (3, 4, 0.0, 0.123),
+                          (1, 4, 0.0, 0.123),
                           (2, 4, 0.0, 0.123),
-                          (1, 4, 0.0, 0.123)])
+                          (3, 4, 0.0, 0.123)])
 
     def test_with_n_larger_than_population_size_no_self_connections(self, sim=sim):
         C = connectors.FixedNumberPreConnector(
@@ -651,37 +805,37 @@ class TestFixedNumberPreConnector(unittest.TestCase):
                           (2, 0, 0.0, 0.123),
                           (3, 0, 0.0, 0.123),
                           (4, 0, 0.0, 0.123),
-                          (4, 0, 0.0, 0.123),
-                          (3, 0, 0.0, 0.123),
                           (2, 0, 0.0, 0.123),
+                          (3, 0, 0.0, 0.123),
+                          (4, 0, 0.0, 0.123),
                           (0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
                           (3, 1, 0.0, 0.123),
                           (4, 1, 0.0, 0.123),
-                          (4, 1, 0.0, 0.123),
+                          (0, 1, 0.0, 0.123),
                           (3, 1, 0.0, 0.123),
-                          (2, 1, 0.0, 0.123),
+                          (4, 1, 0.0, 0.123),
                           (0, 2, 0.0, 0.123),
                           (1, 2, 0.0, 0.123),
                           (3, 2, 0.0, 0.123),
                           (4, 2, 0.0, 0.123),
-                          (4, 2, 0.0, 0.123),
-                          (3, 2, 0.0, 0.123),
+                          (0, 2, 0.0, 0.123),
                           (1, 2, 0.0, 0.123),
+                          (4, 2, 0.0, 0.123),
                           (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
                           (4, 3, 0.0, 0.123),
-                          (4, 3, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
+                          (2, 3, 0.0, 0.123),
                           (0, 4, 0.0, 0.123),
                           (1, 4, 0.0, 0.123),
                           (2, 4, 0.0, 0.123),
                           (3, 4, 0.0, 0.123),
-                          (3, 4, 0.0, 0.123),
+                          (1, 4, 0.0, 0.123),
                           (2, 4, 0.0, 0.123),
-                          (1, 4, 0.0, 0.123)])
+                          (3, 4, 0.0, 0.123)])
 
     def test_with_replacement(self, sim=sim):
         C = connectors.FixedNumberPreConnector(n=3, with_replacement=True, rng=MockRNG(delta=1))
@@ -742,24 +896,21 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list'),
-                         [(2, 0, 0.0, 0.123),  # [2, 3, 4] --> [2, 3, 4]
-                          (3, 0, 0.0, 0.123),
+                         [(3, 0, 0.0, 0.123),
                           (4, 0, 0.0, 0.123),
-                          (0, 1, 0.0, 0.123),   # [0, 1, 2] --> [0, 3, 2]
-                          #(1, 1, 0.0, 0.123),
-                          (3, 1, 0.0, 0.123),
+                          (1, 0, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
-                          (4, 2, 0.0, 0.123),  # [4, 0, 1] --> [4, 0, 1]
+                          (3, 1, 0.0, 0.123),
+                          (4, 1, 0.0, 0.123),
                           (0, 2, 0.0, 0.123),
                           (1, 2, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),   # [2, 3, 4] --> [2, 0, 4]
-                          #(3, 3, 0.0, 0.123),
-                          (0, 3, 0.0, 0.123),
+                          (3, 2, 0.0, 0.123),
                           (4, 3, 0.0, 0.123),
-                          (1, 4, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
+                          (1, 3, 0.0, 0.123),
                           (2, 4, 0.0, 0.123),
                           (3, 4, 0.0, 0.123),
-                          ])
+                          (0, 4, 0.0, 0.123)])
 
     # TOCHECK
 
@@ -769,21 +920,21 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p2, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list'),
-                         [(4, 0, 0.0, 0.123),
-                          (3, 0, 0.0, 0.123),
+                         [(1, 0, 0.0, 0.123),
                           (2, 0, 0.0, 0.123),
-                          (4, 1, 0.0, 0.123),
-                          (3, 1, 0.0, 0.123),
+                          (4, 0, 0.0, 0.123),
+                          (0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
-                          (4, 2, 0.0, 0.123),
-                          (3, 2, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
                           (1, 2, 0.0, 0.123),
-                          (4, 3, 0.0, 0.123),
+                          (3, 2, 0.0, 0.123),
+                          (4, 2, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
                           (2, 3, 0.0, 0.123),
-                          (1, 3, 0.0, 0.123),
-                          (3, 4, 0.0, 0.123),
-                          (2, 4, 0.0, 0.123),
-                          (1, 4, 0.0, 0.123)])
+                          (4, 3, 0.0, 0.123),
+                          (0, 4, 0.0, 0.123),
+                          (1, 4, 0.0, 0.123),
+                          (3, 4, 0.0, 0.123)])
 
     # TOCHECK
 
@@ -815,21 +966,67 @@ class TestFixedNumberPreConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         prj = sim.Projection(self.p1, self.p2, C, syn)
         self.assertEqual(prj.get(["weight", "delay"], format='list'),
-                         [(3, 0, 0.0, 0.123),
+                         [(1, 0, 0.0, 0.123),
                           (2, 0, 0.0, 0.123),
-                          (1, 0, 0.0, 0.123),
-                          (3, 1, 0.0, 0.123),
+                          (3, 0, 0.0, 0.123),
+                          (0, 1, 0.0, 0.123),
                           (2, 1, 0.0, 0.123),
-                          (1, 1, 0.0, 0.123),
-                          (3, 2, 0.0, 0.123),
-                          (2, 2, 0.0, 0.123),
+                          (3, 1, 0.0, 0.123),
+                          (0, 2, 0.0, 0.123),
                           (1, 2, 0.0, 0.123),
-                          (3, 3, 0.0, 0.123),
-                          (2, 3, 0.0, 0.123),
+                          (3, 2, 0.0, 0.123),
+                          (0, 3, 0.0, 0.123),
                           (1, 3, 0.0, 0.123),
-                          (3, 4, 0.0, 0.123),
+                          (2, 3, 0.0, 0.123),
+                          (1, 4, 0.0, 0.123),
                           (2, 4, 0.0, 0.123),
-                          (1, 4, 0.0, 0.123), ])
+                          (3, 4, 0.0, 0.123)])
+
+    def test_no_replacement_large_population(self, sim=sim):
+        p = sim.Population(100, sim.IF_cond_exp())
+        C = connectors.FixedNumberPreConnector(n=30, allow_self_connections=False,
+                                               rng=random.NumpyRNG(seed=2389))
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        connections = numpy.array(prj.get([], format='list'), dtype=int)
+        self.assertEqual(connections.shape[0], 30 * p.size)
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+        for post in range(p.size):
+            sources = connections[connections[:, 1] == post, 0]
+            self.assertEqual(numpy.unique(sources).size, 30)
+
+
+class TestFixedNumberPostConnector(unittest.TestCase):
+
+    def setUp(self, sim=sim, **extra):
+        sim.setup(min_delay=0.123, **extra)
+
+    def tearDown(self, sim=sim):
+        sim.end()
+
+    def test_no_replacement_large_population(self, sim=sim):
+        p = sim.Population(100, sim.IF_cond_exp())
+        C = connectors.FixedNumberPostConnector(n=70, allow_self_connections=False,
+                                                rng=random.NumpyRNG(seed=2389))
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        connections = numpy.array(prj.get([], format='list'), dtype=int)
+        self.assertEqual(connections.shape[0], 70 * p.size)
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+        for pre in range(p.size):
+            targets = connections[connections[:, 0] == pre, 1]
+            self.assertEqual(numpy.unique(targets).size, 70)
+
+    def test_with_replacement_variable_n(self, sim=sim):
+        p1 = sim.Population(50, sim.IF_cond_exp())
+        p2 = sim.Population(20, sim.IF_cond_exp())
+        n = random.RandomDistribution('binomial', (10, 0.5), rng=random.NumpyRNG(seed=76))
+        C = connectors.FixedNumberPostConnector(n=n, with_replacement=True,
+                                                rng=random.NumpyRNG(seed=2389))
+        prj = sim.Projection(p1, p2, C, sim.StaticSynapse())
+        connections = numpy.array(prj.get([], format='list'), dtype=int)
+        rd = random.RandomDistribution('binomial', (10, 0.5), rng=random.NumpyRNG(seed=76))
+        rd.next(100)  # the connector draws 100 values to check the distribution
+        expected_counts = rd.next(p1.size)
+        assert_array_equal(numpy.bincount(connections[:, 0], minlength=p1.size), expected_counts)
 
 
 class TestArrayConnector(unittest.TestCase):
@@ -881,6 +1078,44 @@ class TestArrayConnector(unittest.TestCase):
                                    (2, 2, 4.0, 1.4),
                                    (1, 3, 5.0, 1.5)])
 
+    @unittest.skipUnless(scipy, "Requires SciPy")
+    def test_connect_with_sparse_matrix(self, sim=sim):
+        connections = scipy.sparse.csr_matrix(numpy.array([
+            [0, 1, 1, 0],
+            [1, 1, 0, 1],
+            [0, 0, 1, 0],
+        ], dtype=bool))
+        C = connectors.ArrayConnector(connections, safe=False)
+        syn = sim.StaticSynapse(weight=5.0, delay=0.5)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(prj.get(["weight", "delay"], format='list'),
+                         [(1, 0, 5.0, 0.5),
+                          (0, 1, 5.0, 0.5),
+                          (1, 1, 5.0, 0.5),
+                          (0, 2, 5.0, 0.5),
+                          (2, 2, 5.0, 0.5),
+                          (1, 3, 5.0, 0.5)])
+
+    def test_connect_with_index_arrays_and_values(self, sim=sim):
+        rows = numpy.array([1, 0, 2, 1, 1])
+        cols = numpy.array([3, 2, 2, 0, 3])
+        C = connectors.ArrayConnector((rows, cols), safe=False,
+                                      connection_parameters={"weight": [0.1, 0.2, 0.3, 0.4, 0.5],
+                                                             "delay": [1.1, 1.2, 1.3, 1.4, 1.5]})
+        syn = sim.StaticSynapse(weight=5.0, delay=0.5)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        assert_array_almost_equal(numpy.array(prj.get(["weight", "delay"], format='list')),
+                                  numpy.array([(1, 0, 0.4, 1.4),
+                                               (0, 2, 0.2, 1.2),
+                                               (2, 2, 0.3, 1.3),
+                                               (1, 3, 0.1, 1.1),
+                                               (1, 3, 0.5, 1.5)]))
+
+    def test_connect_with_index_out_of_range(self, sim=sim):
+        C = connectors.ArrayConnector((numpy.array([0, 3]), numpy.array([1, 1])))
+        self.assertRaises(errors.ConnectionError, sim.Projection, self.p1, self.p2, C,
+                          sim.StaticSynapse())
+
 
 class TestCloneConnector(unittest.TestCase):
 
@@ -899,17 +1134,23 @@ class TestCloneConnector(unittest.TestCase):
         syn = sim.StaticSynapse()
         self.ref_prj = sim.Projection(self.p1, self.p2, list_connector, syn)
         self.orig_gather_dict = recording.gather_dict  # create reference to original function
-        # The gather_dict function in recording needs to be temporarily replaced so it can work with
-        # a mock version of the function to avoid it throwing an mpi4py import error when setting
-        # the rank in pyNN.mock by hand to > 1
+        self.orig_gather_array = recording.gather_array
+        # The gather_dict and gather_array functions in recording need to be temporarily replaced
+        # so they can work with mock versions of the functions to avoid them throwing an mpi4py
+        # import error when setting the rank in pyNN.mock by hand to > 1
 
         def mock_gather_dict(D, all=False):
             return D
+
+        def mock_gather_array(data, all=False):
+            return data
         recording.gather_dict = mock_gather_dict
+        recording.gather_array = mock_gather_array
 
     def tearDown(self, sim=sim):
-        # restore original gather_dict function
+        # restore original gather_dict and gather_array functions
         recording.gather_dict = self.orig_gather_dict
+        recording.gather_array = self.orig_gather_array
         sim.end()
 
     def test_connect(self, sim=sim):
@@ -923,6 +1164,23 @@ class TestCloneConnector(unittest.TestCase):
                           (2, 2, 5.0, 0.5),
                           (2, 3, 5.0, 0.5)])
 
+    def test_connect_with_multapses(self, sim=sim):
+        connection_list = [
+            (0, 0, 0.0, 1.0),
+            (1, 4, 0.0, 1.0),
+            (0, 0, 0.0, 1.0),
+        ]
+        ref_prj = sim.Projection(self.p1, self.p2,
+                                 connectors.FromListConnector(connection_list),
+                                 sim.StaticSynapse())
+        syn = sim.StaticSynapse(weight=5.0, delay=0.5)
+        C = connectors.CloneConnector(ref_prj)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(prj.get(["weight", "delay"], format='list'),
+                         [(0, 0, 5.0, 0.5),
+                          (0, 0, 5.0, 0.5),
+                          (1, 4, 5.0, 0.5)])
+
     def test_connect_with_pre_post_mismatch(self, sim=sim):
         syn = sim.StaticSynapse()
         C = connectors.CloneConnector(self.ref_prj)
@@ -947,6 +1205,11 @@ class TestIndexBasedProbabilityConnector(unittest.TestCase):
         def __call__(self, i, j):
             return numpy.array(i + j + 1, dtype=float)
 
+    class HalfProbability(connectors.IndexBasedExpression):
+
+        def __call__(self, i, j):
+            return 0.5 * numpy.ones_like(i, dtype=float)
+
     def setUp(self, sim=sim, **extra):
         sim.setup(nmin_delay=0.123, **extra)
         self.p1 = sim.Population(5, sim.IF_cond_exp(), structure=space.Line())
@@ -969,6 +1232,19 @@ class TestIndexBasedProbabilityConnector(unittest.TestCase):
                           (3, 3, 1., 2),
                           (2, 4, 1., 2)])
 
+    def test_connect_in_tiles(self, sim=sim):
+        syn = sim.StaticSynapse(weight=1.0, delay=2)
+        connections = []
+        for chunk_size in (2, 10, 100):
+            C = connectors.IndexBasedProbabilityConnector(self.HalfProbability(),
+                                                          rng=random.NumpyRNG(seed=2734))
+            C.chunk_size = chunk_size
+            prj = sim.Projection(self.p1, self.p2, C, syn)
+            connections.append(prj.get(["weight", "delay"], format='list'))
+        self.assertEqual(connections[0], connections[1])
+        self.assertEqual(connections[0], connections[2])
+        self.assertTrue(0 < len(connections[0]) < 25)
+
     def test_connect_with_index_based_weights(self, sim=sim):
         syn = sim.StaticSynapse(weight=self.IndexBasedWeights(), delay=2)
         C = connectors.IndexBasedProbabilityConnector(self.IndexBasedProbability())
@@ -1127,6 +1403,240 @@ class TestFixedTotalNumberConnector(unittest.TestCase):
         connections = prj.get(["weight", "delay"], format='list', gather=False)
         self.assertEqual(len(connections), 12)
 
+    def test_without_replacement_no_self_connections(self):
+        p = sim.Population(50, sim.IF_cond_exp())
+        C = connectors.FixedTotalNumberConnector(n=1000, with_replacement=False,
+                                                 allow_self_connections=False,
+                                                 rng=random.NumpyRNG(seed=6402))
+        prj = sim.Projection(p, p, C, sim.StaticSynapse())
+        connections = numpy.array(prj.get(["weight"], format='list'))[:, :2].astype(int)
+        self.assertEqual(connections.shape[0], 1000)
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+        keys = connections[:, 0] * p.size + connections[:, 1]
+        self.assertEqual(numpy.unique(keys).size, keys.size)
+
+    def test_without_replacement_nearly_all_pairs(self):
+        p = sim.Population(10, sim.IF_cond_exp())
+        for allow_self_connections, n in ((True, 95), (False, 88)):
+            C = connectors.FixedTotalNumberConnector(n=n, with_replacement=False,
+                                                     allow_self_connections=allow_self_connections,
+                                                     rng=random.NumpyRNG(seed=6402))
+            prj = sim.Projection(p, p, C, sim.StaticSynapse())
+            connections = numpy.array(prj.get(["weight"], format='list'))[:, :2].astype(int)
+            self.assertEqual(connections.shape[0], n)
+            keys = connections[:, 0] * p.size + connections[:, 1]
+            self.assertEqual(numpy.unique(keys).size, n)
+            if not allow_self_connections:
+                self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+
+    def test_without_replacement_too_many_connections(self):
+        p = sim.Population(10, sim.IF_cond_exp())
+        C = connectors.FixedTotalNumberConnector(n=91, with_replacement=False,
+                                                 allow_self_connections=False,
+                                                 rng=random.NumpyRNG(seed=6402))
+        self.assertRaises(ValueError, sim.Projection, p, p, C, sim.StaticSynapse())
+
+    def test_with_non_numpy_rng(self):
+        C = connectors.FixedTotalNumberConnector(n=12, rng=MockRNG(delta=1))
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        connections = numpy.array(prj.get(["weight"], format='list'))[:, :2].astype(int)
+        self.assertEqual(connections.shape[0], 12)
+        assert_array_equal(numpy.bincount(connections[:, 1], minlength=5),
+                           numpy.bincount(numpy.arange(12) % 5, minlength=5))
+
+    def test_with_non_numpy_rng_in_batches(self):
+        C = connectors.FixedTotalNumberConnector(n=12, rng=MockRNG(delta=1))
+        C.batch_size = 5
+        counts = C._multinomial(12, 5)
+        assert_array_equal(counts, numpy.bincount(numpy.arange(12) % 5, minlength=5))
+
+    def test_no_mutual_connections_not_supported(self):
+        self.assertRaises(NotImplementedError, connectors.FixedTotalNumberConnector,
+                          n=12, allow_self_connections='NoMutual')
+
+
+class TestSmallWorldConnector(unittest.TestCase):
+
+    def setUp(self, sim=sim):
+        sim.setup(min_delay=0.123)
+        self.p = sim.Population(20, sim.IF_cond_exp(), structure=space.Line())
+
+    def tearDown(self, sim=sim):
+        sim.end()
+
+    def _connections(self, C):
+        prj = sim.Projection(self.p, self.p, C, sim.StaticSynapse(),
+                             space=space.Space(periodic_boundaries=((0, 20), None, None)))
+        return numpy.array(prj.get(["weight"], format="list"))[:, :2].astype(int)
+
+    def test_no_rewiring(self):
+        C = connectors.SmallWorldConnector(degree=2.5, rewiring=0.0,
+                                           allow_self_connections=False)
+        connections = self._connections(C)
+        # each neuron is connected to its two nearest neighbours on each side of the ring
+        self.assertEqual(connections.shape[0], 4 * self.p.size)
+        d = abs(connections[:, 0] - connections[:, 1])
+        d = numpy.minimum(d, 20 - d)
+        self.assertTrue(((d == 1) | (d == 2)).all())
+
+    def test_rewiring(self):
+        C = connectors.SmallWorldConnector(degree=2.5, rewiring=0.5,
+                                           allow_self_connections=False,
+                                           rng=random.NumpyRNG(seed=8493))
+        connections = self._connections(C)
+        self.assertEqual(connections.shape[0], 4 * self.p.size)
+        assert_array_equal(numpy.bincount(connections[:, 0]), 4 * numpy.ones(self.p.size))
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+        keys = connections[:, 0] * self.p.size + connections[:, 1]
+        self.assertEqual(numpy.unique(keys).size, keys.size)
+        d = abs(connections[:, 0] - connections[:, 1])
+        d = numpy.minimum(d, 20 - d)
+        self.assertTrue((d > 2).any())
+
+    def test_with_n_connections(self):
+        C = connectors.SmallWorldConnector(degree=2.5, rewiring=0.0, n_connections=3,
+                                           allow_self_connections=False,
+                                           rng=random.NumpyRNG(seed=8493))
+        connections = self._connections(C)
+        assert_array_equal(numpy.bincount(connections[:, 0]), 3 * numpy.ones(self.p.size))
+
+    def test_rewiring_no_self_connections_with_assembly(self):
+        C = connectors.SmallWorldConnector(degree=2.5, rewiring=0.8,
+                                           allow_self_connections=False,
+                                           rng=random.NumpyRNG(seed=8493))
+        prj = sim.Projection(self.p, self.p[:10] + self.p[10:], C, sim.StaticSynapse(),
+                             space=space.Space(periodic_boundaries=((0, 20), None, None)))
+        connections = numpy.array(prj.get(["weight"], format="list"))[:, :2].astype(int)
+        self.assertEqual(connections.shape[0], 4 * self.p.size)
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+
+    def test_rewiring_no_mutual_connections(self):
+        C = connectors.SmallWorldConnector(degree=2.5, rewiring=0.8,
+                                           allow_self_connections='NoMutual',
+                                           rng=random.NumpyRNG(seed=8493))
+        connections = self._connections(C)
+        self.assertEqual(connections.shape[0], 2 * self.p.size)
+        self.assertFalse((connections[:, 0] == connections[:, 1]).any())
+        keys = set(connections[:, 0] * self.p.size + connections[:, 1])
+        reverse_keys = set(connections[:, 1] * self.p.size + connections[:, 0])
+        self.assertEqual(len(keys), connections.shape[0])
+        self.assertEqual(keys.intersection(reverse_keys), set())
+        d = abs(connections[:, 0] - connections[:, 1])
+        d = numpy.minimum(d, 20 - d)
+        self.assertTrue((d > 2).any())
+
+    def test_get_parameters(self):
+        C = connectors.SmallWorldConnector(degree=2.5, rewiring=0.1)
+        self.assertEqual(C.get_parameters(),
+                         {'allow_self_connections': True, 'degree': 2.5,
+                          'rewiring': 0.1, 'n_connections': None})
+
+
+class MockCSet(object):
+    """
+    Minimal stand-in for a CSA connection set, containing an explicit list of
+    connections, each of which is a tuple (i, j) or (i, j, weight, delay).
+    """
+
+    def __init__(self, connections, arity=0):
+        self.connections = connections
+        self.arity = arity
+
+
+class MockCross(object):
+
+    def __init__(self, pre_range, post_range, calls):
+        self.pre_range = pre_range
+        self.post_range = post_range
+        calls.append((pre_range, post_range))
+
+    def __mul__(self, cset):
+        return [c for c in cset.connections
+                if self.pre_range[0] <= c[0] <= self.pre_range[1]
+                and self.post_range[0] <= c[1] <= self.post_range[1]]
+
+
+class MockCSA(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def arity(self, cset):
+        return cset.arity
+
+    def cross(self, pre_range, post_range):
+        return MockCross(pre_range, post_range, self.calls)
+
+
+class TestCSAConnector(unittest.TestCase):
+
+    def setUp(self, sim=sim):
+        sim.setup(num_processes=2, rank=1, min_delay=0.123)
+        self.p1 = sim.Population(4, sim.IF_cond_exp(), structure=space.Line())
+        self.p2 = sim.Population(5, sim.HH_cond_exp(), structure=space.Line())
+        assert_array_equal(self.p2._mask_local, numpy.array([0, 1, 0, 1, 0], dtype=bool))
+        self.orig_csa = connectors.csa if connectors.haveCSA else None
+        self.orig_have_csa = connectors.haveCSA
+        self.csa = MockCSA()
+        connectors.csa = self.csa
+        connectors.haveCSA = True
+
+    def tearDown(self, sim=sim):
+        connectors.haveCSA = self.orig_have_csa
+        if self.orig_csa is None:
+            del connectors.csa
+        else:
+            connectors.csa = self.orig_csa
+        sim.end()
+
+    def test_connect_with_mask(self, sim=sim):
+        cset = MockCSet([(0, 0), (1, 1), (3, 1), (2, 2), (0, 3), (1, 4)])
+        C = connectors.CSAConnector(cset)
+        syn = sim.StaticSynapse(weight=5.0, delay=0.5)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        self.assertEqual(prj.get(["weight", "delay"], format='list', gather=False),
+                         [(1, 1, 5.0, 0.5),
+                          (3, 1, 5.0, 0.5),
+                          (0, 3, 5.0, 0.5)])
+
+    def test_connect_with_arity_2(self, sim=sim):
+        cset = MockCSet([(0, 0, 0.1, 0.2), (1, 1, 0.3, 0.4), (3, 1, 0.5, 0.6),
+                         (2, 2, 0.7, 0.8), (0, 3, 0.9, 1.0), (1, 4, 1.1, 1.2)],
+                        arity=2)
+        C = connectors.CSAConnector(cset)
+        syn = sim.StaticSynapse(weight=5.0, delay=0.5)
+        prj = sim.Projection(self.p1, self.p2, C, syn)
+        assert_array_almost_equal(
+            numpy.array(prj.get(["weight", "delay"], format='list', gather=False)),
+            numpy.array([(1, 1, 0.3, 0.4),
+                         (3, 1, 0.5, 0.6),
+                         (0, 3, 0.9, 1.0)]))
+
+    def test_connect_with_arity_2_translates_parameters(self, sim=sim):
+        cset = MockCSet([(1, 1, 0.3, 0.4), (0, 3, 0.9, 1.0)], arity=2)
+        C = connectors.CSAConnector(cset)
+        prj = sim.Projection(self.p1, self.p2, C, sim.TsodyksMarkramSynapse(U=0.7))
+        self.assertEqual(prj.get(["weight", "delay", "U"], format='list', gather=False),
+                         [(1, 1, 0.3, 0.4, 0.7),
+                          (0, 3, 0.9, 1.0, 0.7)])
+
+    def test_block_size(self, sim=sim):
+        cset = MockCSet([(0, 0), (1, 1), (3, 1), (2, 2), (0, 3), (1, 4)])
+        C = connectors.CSAConnector(cset, block_size=1)
+        self.assertEqual(C.block_size, 1)
+        prj = sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        self.assertEqual(self.csa.calls, [((0, 3), (1, 1)), ((0, 3), (3, 3))])
+        self.assertEqual(prj.get(["weight"], format='list', gather=False),
+                         [(1, 1, 0.0), (3, 1, 0.0), (0, 3, 0.0)])
+
+    def test_block_boundaries(self, sim=sim):
+        cset = MockCSet([(0, 0), (1, 1), (3, 1), (2, 2), (0, 3), (1, 4)])
+        C = connectors.CSAConnector(cset, block_size=1000)
+        sim.Projection(self.p1, self.p2, C, sim.StaticSynapse())
+        # a single block spanning the local columns, including the
+        # non-local column 2, which must be discarded
+        self.assertEqual(self.csa.calls, [((0, 3), (1, 3))])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -76,6 +76,49 @@ def test_StandardTextFile_read():
     files.open = builtin_open
 
 
+def test_StandardTextFile_read_chunks():
+    stf = files.StandardTextFile("tmp.txt", "wb")
+    data = numpy.array([(0, 2.3), (1, 3.4), (2, 4.3)])
+    stf.write(data, {'columns': ['i', 'x']})
+    stf.close()
+
+    stf = files.StandardTextFile("tmp.txt", "r")
+    chunks = list(stf.read_chunks(2))
+    assert_equal([chunk.shape for chunk in chunks], [(1, 2), (2, 2)])  # first chunk contains the header
+    assert_arrays_equal(numpy.vstack(chunks).flatten(), data.flatten())
+    stf.close()
+
+    os.remove("tmp.txt")
+
+
+def test_StandardTextFile_read_chunks_with_long_header():
+    with open("tmp.txt", "w") as f:
+        f.write("# columns = ['i', 'x']\n# a comment\n\n# another comment\n0 2.3\n1 3.4\n2 4.3\n")
+    data = numpy.array([(0, 2.3), (1, 3.4), (2, 4.3)])
+    for chunk_size in (1, 2, 3, 4, 10):
+        stf = files.StandardTextFile("tmp.txt", "r")
+        chunks = list(stf.read_chunks(chunk_size))
+        assert_arrays_equal(numpy.vstack(chunks).flatten(), data.flatten())
+        stf.close()
+    os.remove("tmp.txt")
+
+
+def test_NumpyArrayFile():
+    naf = files.NumpyArrayFile("tmp.npy", "wb")
+    data = [(0, 2.3), (1, 3.4), (2, 4.3)]
+    naf.write(data, {})
+    naf.close()
+
+    naf = files.NumpyArrayFile("tmp.npy", "rb")
+    assert_equal(naf.get_metadata(), {})
+    assert_arrays_equal(naf.read().flatten(), numpy.array(data).flatten())
+    chunks = list(naf.read_chunks(2))
+    assert_equal([chunk.shape for chunk in chunks], [(2, 2), (1, 2)])
+    naf.close()
+
+    os.remove("tmp.npy")
+
+
 def test_PickleFile():
     pf = files.PickleFile("tmp.pickle", "wb")
     data = [(0, 2.3), (1, 3.4), (2, 4.3)]
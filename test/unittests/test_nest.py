@@ -181,6 +181,17 @@ class TestProjection(unittest.TestCase):
         prj.set(weight=weight_array)
         self.assertTrue((weight_array == prj.get("weight", format="array")).all())
 
+    def test_bulk_connect_in_several_chunks(self):
+        connector = sim.AllToAllConnector()
+        connector.chunk_size = 5
+        weights = numpy.arange(28, dtype=float).reshape((7, 4)) / 100.0
+        prj = sim.Projection(self.p1, self.p2, connector,
+                             synapse_type=sim.StaticSynapse(weight=weights, delay=0.5),
+                             receptor_type="inhibitory")
+        self.assertEqual(len(prj), 28)
+        assert_array_almost_equal(prj.get("weight", format="array"), weights, decimal=12)
+        self.assertTrue((prj.get("delay", format="array") == 0.5).all())
+
     def test_stdp_set_tau_minus(self):
         """cf https://github.com/NeuralEnsemble/PyNN/issues/423"""
         intended_tau_minus = 18.9
@@ -346,6 +346,74 @@ class TestProjection(unittest.TestCase):
         prj = sim.Projection(self.p1, self.p2, self.all2all,
                              synapse_type=sim.TsodyksMarkramSynapse())
 
+    def _multapse_projection(self):
+        connection_list = [
+            (2, 1, 0.1, 0.5),
+            (0, 1, 0.2, 0.5),
+            (2, 1, 0.3, 0.5),
+            (1, 0, 0.4, 0.5),
+            (0, 2, 0.5, 0.5),
+        ]
+        return sim.Projection(self.p1, self.p2, sim.FromListConnector(connection_list),
+                              sim.StaticSynapse())
+
+    def test_get_with_multapses(self):
+        prj = self._multapse_projection()
+        self.assertEqual(len(prj), 5)
+        # connections are ordered by post-synaptic cell, then grouped by
+        # pre-synaptic cell, in order of creation
+        assert_array_almost_equal(numpy.array(prj.get("weight", format="list")),
+                                  numpy.array([(1, 0, 0.4),
+                                               (2, 1, 0.1),
+                                               (2, 1, 0.3),
+                                               (0, 1, 0.2),
+                                               (0, 2, 0.5)]))
+        self.assertEqual([(c.presynaptic_index, c.postsynaptic_index) for c in prj.connections],
+                         [(1, 0), (2, 1), (2, 1), (0, 1), (0, 2)])
+        self.assertAlmostEqual(prj[2].weight, 0.3)
+
+    def test_set_with_multapses(self):
+        prj = self._multapse_projection()
+        weights = 0.01 * numpy.arange(self.p1.size * self.p2.size).reshape(prj.shape)
+        prj.set(weight=weights)
+        assert_array_almost_equal(numpy.array(prj.get("weight", format="list")),
+                                  numpy.array([(1, 0, weights[1, 0]),
+                                               (2, 1, weights[2, 1]),
+                                               (2, 1, weights[2, 1]),
+                                               (0, 1, weights[0, 1]),
+                                               (0, 2, weights[0, 2])]))
+
+    def test_get_attributes_as_arrays_with_multapses(self):
+        prj = self._multapse_projection()
+        weights, = prj._get_attributes_as_arrays(["weight"], multiple_synapses='sum')
+        expected = numpy.nan * numpy.ones(prj.shape)
+        expected[2, 1] = 0.4
+        expected[0, 1] = 0.2
+        expected[1, 0] = 0.4
+        expected[0, 2] = 0.5
+        assert_array_almost_equal(weights, expected)
+        weights, = prj._get_attributes_as_arrays(["weight"], multiple_synapses='first')
+        self.assertAlmostEqual(weights[2, 1], 0.1)
+
+    def test_connections_added_after_index_built(self):
+        prj = self._multapse_projection()
+        prj.get("weight", format="list")  # builds the index
+        prj._convergent_connect(numpy.array([0, 3]), 1, weight=0.6, delay=0.5)
+        prj._convergent_connect(numpy.array([2]), 0, weight=0.7, delay=0.5)
+        self.assertEqual(len(prj), 8)
+        assert_array_almost_equal(numpy.array(prj.get("weight", format="list")),
+                                  numpy.array([(1, 0, 0.4),
+                                               (2, 0, 0.7),
+                                               (2, 1, 0.1),
+                                               (2, 1, 0.3),
+                                               (0, 1, 0.2),
+                                               (0, 1, 0.6),
+                                               (3, 1, 0.6),
+                                               (0, 2, 0.5)]))
+        prj.set(delay=1.5)
+        assert_array_almost_equal(numpy.array(prj.get("delay", format="list"))[:, 2],
+                                  1.5 * numpy.ones(8))
+
 
 @unittest.skipUnless(sim, "Requires NEURON")
 class TestCurrentSources(unittest.TestCase):
@@ -15,7 +15,9 @@ try:
 except NameError:
     basestring = str
 import numpy
+import os
 import sys
+import pickle
 from numpy.testing import assert_array_equal, assert_array_almost_equal
 import quantities as pq
 try:
@@ -24,8 +26,9 @@ except ImportError:
     from mock import Mock, patch
 from .mocks import MockRNG
 import pyNN.mock as sim
-from pyNN import random, errors, space
+from pyNN import random, errors, space, common, recording
 from pyNN.parameters import Sequence
+from pyNN.recording import streaming
 
 
 def setUp():
@@ -197,6 +200,30 @@ class PopulationTest(unittest.TestCase):
         assert hasattr(itr, "next") or hasattr(itr, "__next__")
         self.assertEqual(len(list(itr)), 6)
 
+    def test_ids_created_on_demand(self, sim=sim):
+        p = sim.Population(6, sim.IF_curr_exp())
+        self.assertEqual(p.all_cells.dtype, numpy.int64)
+        self.assertIsInstance(p[3], sim.simulator.ID)
+        self.assertIs(p[3].parent, p)
+        self.assertIs(p[2:5].all_cells[1].parent, p)
+        self.assertTrue(all(isinstance(id, sim.simulator.ID) for id in p))
+        self.assertEqual(type(p.all_cells + 1), numpy.ndarray)
+
+    def test_pickle_id_array(self, sim=sim):
+        ids = common.IDArray(numpy.arange(42, 48), sim.simulator.ID, "parent")
+        ids = pickle.loads(pickle.dumps(ids[2:]))
+        assert_array_equal(ids, numpy.arange(44, 48))
+        self.assertIs(ids.id_class, sim.simulator.ID)
+        self.assertEqual(ids.parent, "parent")
+
+    def test_id_array_ufunc_results(self, sim=sim):
+        ids = common.IDArray(numpy.arange(42, 48), sim.simulator.ID, "parent")
+        self.assertEqual(type(ids + 1), numpy.ndarray)
+        self.assertNotIsInstance(ids.sum(), sim.simulator.ID)
+        # numpy >= 2 passes a third argument, `return_scalar`
+        wrapped = ids.__array_wrap__(numpy.arange(3), None, False)
+        self.assertEqual(type(wrapped), numpy.ndarray)
+
     def test___add__two(self, sim=sim):
         # adding two populations should give an Assembly
         p1 = sim.Population(6, sim.IF_curr_exp())
@@ -283,6 +310,25 @@ class PopulationTest(unittest.TestCase):
         sim.simulator.state.num_processes = 1
         sim.simulator.state.mpi_rank = 0
 
+    def test_get_multiple_params_with_gather_distributed(self, sim=sim):
+        sim.simulator.state.num_processes = 2
+        sim.simulator.state.mpi_rank = 0
+        p = sim.Population(5, sim.IF_cond_exp(tau_m=12.3,
+                                              tau_syn_E=[0.987, 0.988, 0.989, 0.990, 0.991],
+                                              i_offset=lambda i: -0.2 * i))
+        remote = numpy.arange(5)[~p._mask_local]
+        remote_data = numpy.column_stack((remote, 0.987 + 0.001 * remote,
+                                          12.3 * numpy.ones_like(remote), -0.2 * remote))
+        gather_array = Mock(side_effect=lambda data: numpy.vstack((remote_data, data)))
+        with patch("pyNN.recording.gather_array", gather_array):
+            tau_syn_E, tau_m, i_offset = p.get(('tau_syn_E', 'tau_m', 'i_offset'), gather=True)
+        sim.simulator.state.num_processes = 1
+        sim.simulator.state.mpi_rank = 0
+        self.assertEqual(gather_array.call_count, 1)
+        assert_array_almost_equal(tau_syn_E, numpy.array([0.987, 0.988, 0.989, 0.990, 0.991]), decimal=12)
+        self.assertAlmostEqual(tau_m, 12.3)
+        assert_array_almost_equal(i_offset, -0.2 * numpy.arange(5), decimal=12)
+
     def test_get_sequence_param(self, sim=sim):
         p = sim.Population(3, sim.SpikeSourceArray(spike_times=[Sequence([1, 2, 3, 4]),
                                                                 Sequence([2, 3, 4, 5]),
@@ -310,6 +356,59 @@ class PopulationTest(unittest.TestCase):
         self.assertRaises(errors.InvalidParameterValueError, p.set, tau_m={})
         self.assertRaises(errors.InvalidParameterValueError, p.set, v_reset='bar')
 
+    def test_set_in_batch(self, sim=sim):
+        p = sim.Population(4, sim.IF_cond_exp(tau_m=12.3, tau_syn_E=0.987))
+        with patch.object(p, "_set_parameters", wraps=p._set_parameters) as set_parameters:
+            with p.batch_updates():
+                p.set(tau_m=9.87)
+                p.set(tau_syn_E=[1.1, 1.2, 1.3, 1.4], tau_m=8.76)
+                self.assertEqual(set_parameters.call_count, 0)
+                self.assertRaises(errors.NonExistentParameterError, p.set, foo=13.2)
+            self.assertEqual(set_parameters.call_count, 1)
+        tau_m, tau_syn_E = p.get(('tau_m', 'tau_syn_E'))
+        self.assertAlmostEqual(tau_m, 8.76)
+        assert_array_almost_equal(tau_syn_E, numpy.array([1.1, 1.2, 1.3, 1.4]))
+
+    def test_batch_updates_applied_before_run(self, sim=sim):
+        p = sim.Population(4, sim.IF_cond_exp(tau_m=12.3))
+        with p.batch_updates():
+            p.set(tau_m=9.87)
+            p.initialize(v=-61.0)
+            self.assertEqual(p.initial_values['v'].evaluate(simplify=True), -65.0)
+            sim.run(1.0)
+            self.assertEqual(p.initial_values['v'].evaluate(simplify=True), -61.0)
+            self.assertAlmostEqual(p.get('tau_m'), 9.87)
+
+    def test_batch_updates_discarded_after_exception(self, sim=sim):
+        p = sim.Population(4, sim.IF_cond_exp(tau_m=12.3))
+
+        def set_and_fail():
+            with p.batch_updates():
+                p.set(tau_m=9.87)
+                raise ValueError()
+        self.assertRaises(ValueError, set_and_fail)
+        self.assertAlmostEqual(p.get('tau_m'), 12.3)
+
+    def test_batch_updates_interrupted(self, sim=sim):
+        p = sim.Population(4, sim.IF_cond_exp(tau_m=12.3))
+
+        def set_and_interrupt():
+            with p.batch_updates():
+                p.set(tau_m=9.87)
+                raise KeyboardInterrupt()
+        self.assertRaises(KeyboardInterrupt, set_and_interrupt)
+        self.assertEqual(p._batch_depth, 0)
+        self.assertEqual(sim.simulator.state.pending_updates, set())
+        p.set(tau_m=8.76)
+        self.assertAlmostEqual(p.get('tau_m'), 8.76)
+
+    def test_pending_updates_cleared_by_setup(self, sim=sim):
+        p = sim.Population(4, sim.IF_cond_exp(tau_m=12.3))
+        with p.batch_updates():
+            p.set(tau_m=9.87)
+            sim.setup()
+            self.assertEqual(sim.simulator.state.pending_updates, set())
+
     def test_set_sequence(self, sim=sim):
         p = sim.Population(3, sim.SpikeSourceArray())
         p.set(spike_times=[Sequence([1, 2, 3, 4]),
@@ -504,6 +603,146 @@ class PopulationTest(unittest.TestCase):
         assert_array_equal(seg1.spiketrains[7],
                            numpy.array([p.first_id + 7, p.first_id + 7 + 5]) % t3)
 
+    def test_get_spikes_columnar(self, sim=sim):
+        p = sim.Population(14, sim.EIF_cond_exp_isfa_ista())
+        p.record('spikes')
+        sim.run(12.3)
+        sim.reset()
+        sim.run(14.5)
+        spikes = p.get_spikes_columnar()
+        self.assertEqual(len(spikes), 2)
+        self.assertEqual(len(spikes[1]), 2 * p.size)
+        assert_array_equal(spikes[1].recorded_indices, numpy.arange(p.size))
+        self.assertEqual(spikes[1].spike_counts(), dict((int(id), 2) for id in p))
+        data = p.get_data('spikes')
+        for columnar, segment in zip(spikes, data.segments):
+            spiketrains = columnar.to_spiketrains()
+            self.assertEqual(len(spiketrains), len(segment.spiketrains))
+            for st, expected in zip(spiketrains, segment.spiketrains):
+                assert_array_equal(st.magnitude, expected.magnitude)
+                self.assertEqual(st.t_stop, expected.t_stop)
+                self.assertEqual(st.annotations['source_id'], expected.annotations['source_id'])
+                self.assertEqual(st.annotations['source_index'], expected.annotations['source_index'])
+
+    def test_get_spikes_columnar_from_cache(self, sim=sim):
+        p = sim.Population(14, sim.EIF_cond_exp_isfa_ista())
+        p.record(('spikes', 'v'))
+        sim.run(12.3)
+        sim.reset()
+        sim.run(14.5)
+        segment, cached_spikes = list(p.recorder.cache)[0]
+        self.assertIsInstance(cached_spikes, recording.ColumnarSpikes)
+        self.assertEqual(len(segment.spiketrains), 0)
+        view = p[2:5]
+        spikes = view.get_spikes_columnar()
+        for columnar in spikes:
+            assert_array_equal(columnar.recorded_ids, view.all_cells)
+            self.assertTrue(numpy.in1d(columnar.source_indices, [2, 3, 4]).all())
+        data = view.get_data('spikes')
+        self.assertEqual(len(data.segments[0].spiketrains), 3)
+        self.assertEqual(len(p.get_data().segments[0].spiketrains), p.size)
+
+    def test_get_spikes_columnar_without_spikes(self, sim=sim):
+        p = sim.Population(4, sim.EIF_cond_exp_isfa_ista())
+        p.record('v')
+        sim.run(12.3)
+        sim.reset()
+        spikes = p.get_spikes_columnar()[0]
+        self.assertEqual(len(spikes), 0)
+        self.assertAlmostEqual(spikes.t_start, 0.0)
+        self.assertAlmostEqual(spikes.t_stop, 12.3)
+
+    def test_get_data_with_filter_ids_from_cache(self, sim=sim):
+        p = sim.Population(4, sim.EIF_cond_exp_isfa_ista())
+        p.record(('v', 'spikes'))
+        sim.run(12.3)
+        sim.reset()
+        sim.run(12.3)
+        view = p[1:3]
+        filter_ids = view.all_cells
+        data = view.get_data()
+        cached, current = data.segments
+        for segment in (cached, current):
+            signal = segment.filter(name='v')[0]
+            self.assertEqual(signal.shape[1], 2)
+            assert_array_equal(signal.annotations['source_ids'], filter_ids)
+            assert_array_equal(signal.channel_index.channel_ids, [1, 2])
+            self.assertEqual([st.annotations['source_id'] for st in segment.spiketrains],
+                             list(filter_ids))
+        # the cached data are not modified
+        self.assertEqual(p.get_data().segments[0].filter(name='v')[0].shape[1], 4)
+
+    @unittest.skipUnless(streaming.have_h5py, "Requires h5py")
+    def test_record_with_flush_interval(self, sim=sim):
+        import h5py
+        p = sim.Population(3, sim.EIF_cond_exp_isfa_ista(), label="streamed")
+        p.record(('v', 'spikes'), to_file="tmp_stream.h5", flush_interval=4.0)
+        sim.run(10.0)
+        sim.end()
+        n_values = int(round(10.0 / sim.get_time_step())) + 1
+        with h5py.File("tmp_stream.h5", "r") as f:
+            segment = f["streamed/segment000"]
+            self.assertEqual(segment["v/values"].shape, (n_values, p.size))
+            assert_array_equal(segment["v/channel_ids"][:], numpy.arange(p.size))
+            self.assertGreater(segment["spikes/times"].shape[0], 0)
+            self.assertEqual(segment["spikes/times"].shape, segment["spikes/source_index"].shape)
+        os.remove("tmp_stream.h5")
+
+    @unittest.skipUnless(streaming.have_h5py, "Requires h5py")
+    def test_streamed_data_match_get_data(self, sim=sim):
+        import h5py
+
+        class DeterministicRecorder(sim.Population._recorder_class):
+            """
+            Returns data which depend only on the cell ID and the time and, as
+            for a real simulator, only those recorded since the last clear().
+            """
+
+            def _get_spiketimes(self, ids):
+                t_start = float(self._recording_start_time)
+                t_stop = self._simulator.state.t
+                spikes = {}
+                for id in ids:
+                    times = 1.7 * numpy.arange(1, 10) + 0.01 * int(id)
+                    spikes[int(id)] = times[(times > t_start) & (times <= t_stop)]
+                return spikes
+
+            def _get_all_signals(self, variable, ids, clear=False):
+                t_start = float(self._recording_start_time)
+                dt = self._simulator.state.dt
+                n_samples = int(round((self._simulator.state.t - t_start) / dt)) + 1
+                times = t_start + dt * numpy.arange(n_samples)
+                return times[:, numpy.newaxis] + 1000.0 * numpy.array(ids, dtype=float)
+
+        with patch.object(sim.Population, "_recorder_class", DeterministicRecorder):
+            p = sim.Population(3, sim.EIF_cond_exp_isfa_ista(), label="streamed")
+            p.record(('v', 'spikes'))
+            sim.run(10.0)
+            expected = p.get_data().segments[0]
+            sim.setup()
+            p = sim.Population(3, sim.EIF_cond_exp_isfa_ista(), label="streamed")
+            p.record(('v', 'spikes'), to_file="tmp_stream.h5", flush_interval=3.0)
+            sim.run(10.0)
+            sim.end()
+        with h5py.File("tmp_stream.h5", "r") as f:
+            segment = f["streamed/segment000"]
+            assert_array_almost_equal(segment["v/values"][:],
+                                      expected.filter(name='v')[0].magnitude)
+            times = segment["spikes/times"][:]
+            source_index = segment["spikes/source_index"][:]
+            self.assertEqual(times.size, sum(st.size for st in expected.spiketrains))
+            for index, spiketrain in enumerate(expected.spiketrains):
+                assert_array_almost_equal(numpy.sort(times[source_index == index]),
+                                          spiketrain.magnitude)
+        os.remove("tmp_stream.h5")
+
+    def test_record_with_flush_interval_not_supported(self, sim=sim):
+        p = sim.Population(3, sim.EIF_cond_exp_isfa_ista())
+        with patch.object(sim.Population._recorder_class, "_supports_streaming", False):
+            self.assertRaises(NotImplementedError, p.record, 'v',
+                              to_file="tmp_stream.h5", flush_interval=4.0)
+        self.assertFalse(os.path.exists("tmp_stream.h5"))
+
     # def test_get_data_no_gather(self, sim=sim):
     #    self.fail()
 
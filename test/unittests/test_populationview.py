@@ -128,11 +128,23 @@ class PopulationViewTest(unittest.TestCase):
         self.assertRaises(IndexError, pv.id_to_index, p[0])
         self.assertRaises(IndexError, pv.id_to_index, p[9])
 
-#    def test_id_to_index_with_invalid_ids(self, sim=sim):
-#        p = sim.Population(11, sim.IF_curr_alpha())
-#        pv = p[2, 5, 7, 8]
-#        self.assertRaises(IndexError, pv.id_to_index, p.all_cells[[2, 5, 6]])
-# currently failing
+    def test_id_to_index_with_invalid_ids(self, sim=sim):
+        p = sim.Population(11, sim.IF_curr_alpha())
+        pv = p[2, 5, 7, 8]
+        self.assertRaises(IndexError, pv.id_to_index, p.all_cells[[2, 5, 6]])
+
+    def test_id_to_index_unsorted(self, sim=sim):
+        p = sim.Population(11, sim.IF_curr_alpha())
+        pv = p[8, 2, 7, 5]
+        self.assertEqual(pv.id_to_index(p[7]), 2)
+        assert_array_equal(pv.id_to_index(p.all_cells[[2, 5, 8]]), numpy.array([1, 3, 0]))
+        self.assertRaises(IndexError, pv.id_to_index, p[3])
+
+    def test_id_to_index_with_duplicated_ids(self, sim=sim):
+        p = sim.Population(11, sim.IF_curr_alpha())
+        pv = p[2, 5, 7, 8]
+        pv.all_cells = p.all_cells[[2, 5, 5, 8]]
+        self.assertRaises(Exception, pv.id_to_index, p[2])
 
     # def test_id_to_local_index():
 
@@ -28,6 +28,7 @@ import pyNN.mock as sim
 
 from pyNN import random, errors, space
 from pyNN.parameters import Sequence
+from pyNN.common.projections import SparseConnectionMatrix
 
 
 def _sort_by_column(A, col):
@@ -167,12 +168,13 @@ class ProjectionTest(unittest.TestCase):
     def test_get_weights_as_array_with_multapses(self, sim=sim):
         C = sim.FixedNumberPreConnector(n=7, rng=MockRNG(delta=1))
         prj = sim.Projection(self.p2, self.p3, C, synapse_type=self.syn1)
-        # because we use a fake RNG, it is always the last three presynaptic cells which receive the double connection
+        # each post-synaptic cell is connected to all four presynaptic cells, then to three more.
+        # Because we use a fake RNG, the one which does not receive a double connection varies cyclically
         target = numpy.array([
-            [0.006, 0.006, 0.006, 0.006, 0.006],
-            [0.012, 0.012, 0.012, 0.012, 0.012],
-            [0.012, 0.012, 0.012, 0.012, 0.012],
-            [0.012, 0.012, 0.012, 0.012, 0.012],
+            [0.006, 0.012, 0.012, 0.012, 0.006],
+            [0.012, 0.006, 0.012, 0.012, 0.012],
+            [0.012, 0.012, 0.006, 0.012, 0.012],
+            [0.012, 0.012, 0.012, 0.006, 0.012],
         ])
         # use gather False because we are faking the MPI
         weights = prj.get("weight", format="array", gather=False)
@@ -191,6 +193,30 @@ class ProjectionTest(unittest.TestCase):
         weights = prj.get("weight", format="array", gather=False, multiple_synapses='min')
         assert_array_equal(weights, target)
 
+    def test_get_weights_as_array_with_multapses_all_operations(self, sim=sim):
+        C = sim.FromListConnector([(0, 1, 0.3, 0.1), (2, 0, 0.5, 0.1),
+                                   (0, 1, 0.7, 0.1), (0, 1, 0.2, 0.1)],
+                                  column_names=["weight", "delay"])
+        prj = sim.Projection(self.p2, self.p3, C, synapse_type=self.syn1)
+        nan = numpy.nan
+        targets = {
+            'sum': 1.2,
+            'first': 0.3,
+            'last': 0.2,
+            'min': 0.2,
+            'max': 0.7,
+        }
+        for multiple_synapses, w01 in targets.items():
+            target = numpy.array([
+                [nan, w01, nan, nan, nan],
+                [nan, nan, nan, nan, nan],
+                [0.5, nan, nan, nan, nan],
+                [nan, nan, nan, nan, nan],
+            ])
+            weights = prj.get("weight", format="array", gather=False,
+                              multiple_synapses=multiple_synapses)
+            assert_array_almost_equal(weights, target, decimal=12)
+
     def test_synapse_with_lambda_parameter(self, sim=sim):
         syn = sim.StaticSynapse(weight=lambda d: 0.01 + 0.001 * d)
         prj = sim.Projection(self.p1, self.p2, self.all2all, synapse_type=syn)
@@ -234,6 +260,31 @@ class ProjectionTest(unittest.TestCase):
              (4, 0, 84), ])
         assert_array_equal(tau_rec, tau_rec_target)
 
+    def test_get_weights_as_sparse(self, sim=sim):
+        C = sim.FromListConnector([(0, 1, 0.3, 0.1), (2, 0, 0.5, 0.1),
+                                   (0, 1, 0.7, 0.1), (3, 4, 0.0, 0.1)],
+                                  column_names=["weight", "delay"])
+        prj = sim.Projection(self.p2, self.p3, C, synapse_type=self.syn1)
+        weights = prj.get("weight", format="sparse", gather=False, multiple_synapses='max')
+        self.assertEqual(weights.shape, (4, 5))
+        self.assertEqual(weights.nnz, 3)  # the zero weight is stored explicitly
+        dense = prj.get("weight", format="array", gather=False, multiple_synapses='max')
+        assert_array_equal(weights.toarray(), numpy.where(numpy.isnan(dense), 0.0, dense))
+
+    def test_get_weights_as_sparse_without_scipy(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn2)
+        with patch("pyNN.common.projections.have_scipy", False):
+            weights = prj.get("weight", format="sparse", gather=False)
+        self.assertIsInstance(weights, SparseConnectionMatrix)
+        self.assertEqual(weights.nnz, 28)
+        assert_array_equal(weights.toarray(), 0.007 * numpy.ones((7, 4)))
+
+    def test_get_multiple_attributes_as_sparse(self, sim=sim):
+        prj = sim.Projection(self.p1, self.p2, connector=self.all2all, synapse_type=self.syn3)
+        weights, U = prj.get(["weight", "U"], format="sparse", gather=False)
+        assert_array_almost_equal(weights.toarray(), 0.012 * numpy.ones((7, 4)), decimal=12)
+        assert_array_almost_equal(U.toarray(), 0.2 * numpy.ones((7, 4)), decimal=12)
+
     # def test_get_delays(self, sim=sim):
     #    p1 = sim.Population(7, sim.IF_cond_exp)
     #    p2 = sim.Population(7, sim.IF_cond_exp)
@@ -251,6 +302,47 @@ class ProjectionTest(unittest.TestCase):
         assert os.path.exists(filename)
         os.remove(filename)
 
+    def test_save_sparse(self, sim=sim):
+        filename = "test_sparse_connections.npz"
+        if os.path.exists(filename):
+            os.remove(filename)
+        C = sim.FromListConnector([(0, 1, 0.3, 0.1), (2, 0, 0.5, 0.2), (0, 1, 0.7, 0.3)],
+                                  column_names=["weight", "delay"])
+        prj = sim.Projection(self.p2, self.p3, C, synapse_type=self.syn1)
+        prj.save(["weight", "delay"], filename, format="sparse", gather=True)
+        data = numpy.load(filename)
+        assert_array_equal(data["i"], [0, 0, 2])
+        assert_array_equal(data["j"], [1, 1, 0])
+        assert_array_equal(data["shape"], [4, 5])
+        assert_array_almost_equal(data["weight"], [0.3, 0.7, 0.5], decimal=12)
+        assert_array_almost_equal(data["delay"], [0.1, 0.3, 0.2], decimal=12)
+        # the saved connections can be used to recreate the projection
+        C2 = sim.ArrayConnector((data["i"], data["j"]),
+                                connection_parameters={"weight": data["weight"],
+                                                       "delay": data["delay"]})
+        prj2 = sim.Projection(self.p2, self.p3, C2, synapse_type=self.syn1)
+        assert_array_almost_equal(numpy.array(sorted(prj2.get(["weight", "delay"], format="list"))),
+                                  numpy.array(sorted(prj.get(["weight", "delay"], format="list"))))
+        data.close()
+        os.remove(filename)
+
+    def test_save_sparse_distributed(self, sim=sim):
+        sim.setup(num_processes=2, rank=1)
+        p2 = sim.Population(4, sim.IF_cond_exp())
+        p3 = sim.Population(5, sim.IF_cond_alpha())
+        C = sim.AllToAllConnector()
+        prj = sim.Projection(p2, p3, C, synapse_type=self.syn1)
+        prj.save("weight", "test_sparse_connections.npz", format="sparse", gather=False)
+        sim.setup()
+        filename = "test_sparse_connections.1.npz"
+        data = numpy.load(filename)
+        local_columns = numpy.arange(p3.size)[p3._mask_local]
+        assert_array_equal(numpy.unique(data["j"]), local_columns)
+        self.assertEqual(data["i"].size, p2.size * local_columns.size)
+        data.close()
+        os.remove(filename)
+        self.assertFalse(os.path.exists("test_sparse_connections.npz"))
+
     # def test_print_weights_as_list(self, sim=sim):
     #    filename = "test.weights"
     #    if os.path.exists(filename):
@@ -29,6 +29,107 @@ from pyNN.utility import assert_arrays_equal
 
 # def test_gather_no_MPI():
 
+class MockMPIComm(object):
+    """Fake communicator for rank 0 of two nodes, where node 1 holds `other_data`."""
+
+    def __init__(self, other_data):
+        self.other_data = other_data
+
+    def gather(self, obj, root=0):
+        return [obj, self.other_data.size]
+
+    allgather = gather
+
+    def Gatherv(self, send_buffer, receive_buffer, root=0):
+        data, (sizes, displacements) = receive_buffer[0], receive_buffer[1]
+        assert sizes == [send_buffer[1], self.other_data.size]
+        data[displacements[0]:displacements[0] + sizes[0]] = send_buffer[0]
+        data[displacements[1]:displacements[1] + sizes[1]] = self.other_data.flatten()
+
+    Allgatherv = Gatherv
+
+
+def test_gather_array():
+    orig_get_mpi_comm = recording.get_mpi_comm
+    local_data = numpy.arange(6.0).reshape((3, 2))
+    other_data = numpy.array([[10.0, 11.0]])
+    recording.get_mpi_comm = lambda: (MockMPIComm(other_data), {'DOUBLE': None, 'SUM': None})
+    try:
+        for all in (False, True):
+            assert_arrays_equal(recording.gather_array(local_data, all=all),
+                                numpy.vstack((local_data, other_data)))
+        assert_arrays_equal(recording.gather_array(numpy.arange(3.0)),
+                            numpy.array([0.0, 1.0, 2.0, 10.0, 11.0]))
+    finally:
+        recording.get_mpi_comm = orig_get_mpi_comm
+
+
+class MockSingleNodeMPIComm(object):
+    """Fake communicator for a distributed simulation with a single node."""
+    rank = 0
+
+    def gather(self, obj, root=0):
+        return [obj]
+
+    allgather = gather
+
+    def Gatherv(self, send_buffer, receive_buffer, root=0):
+        receive_buffer[0][:] = send_buffer[0]
+
+    Allgatherv = Gatherv
+
+
+def test_gather_blocks():
+    import neo
+    import quantities as pq
+    orig_get_mpi_comm = recording.get_mpi_comm
+    recording.get_mpi_comm = lambda: (MockSingleNodeMPIComm(), {'DOUBLE': None, 'SUM': None})
+    segment = neo.Segment(name="segment000")
+    segment.spiketrains = [
+        neo.SpikeTrain(times, t_start=0.0, t_stop=10.0, units='ms',
+                       source_population="pop", source_id=id, source_index=id - 42)
+        for id, times in ((44, [1.0, 2.5]), (42, []), (43, [7.0]))]
+    signal = neo.AnalogSignal(numpy.arange(8.0).reshape((4, 2)), units='mV',
+                              t_start=0.0 * pq.ms, sampling_period=0.1 * pq.ms,
+                              name="v", source_population="pop",
+                              source_ids=numpy.array([42, 44]))
+    signal.channel_index = neo.ChannelIndex(index=numpy.arange(2),
+                                            channel_ids=numpy.array([0, 2]))
+    segment.analogsignals = [signal]
+    segment.events = [neo.Event(numpy.array([1.0, 3.0]) * pq.ms, name="stimulus",
+                                labels=numpy.array(["on", "off"], dtype="S"))]
+    segment.epochs = [neo.Epoch(numpy.array([2.0]) * pq.ms, durations=numpy.array([1.0]) * pq.ms,
+                                name="pulse")]
+    segment.irregularlysampledsignals = [
+        neo.IrregularlySampledSignal(numpy.array([0.5, 1.7]) * pq.ms, numpy.array([1.0, 2.0]),
+                                     units='mV', name="w")]
+    block = neo.Block(name="pop")
+    block.segments = [segment]
+    try:
+        merged = recording.gather_blocks(block)
+    finally:
+        recording.get_mpi_comm = orig_get_mpi_comm
+    merged_segment = merged.segments[0]
+    assert_equal([st.annotations['source_id'] for st in merged_segment.spiketrains], [42, 43, 44])
+    assert_equal([st.annotations['source_index'] for st in merged_segment.spiketrains], [0, 1, 2])
+    assert_arrays_equal(merged_segment.spiketrains[2].magnitude, numpy.array([1.0, 2.5]))
+    assert_equal(merged_segment.spiketrains[0].size, 0)
+    assert_equal(merged_segment.spiketrains[0].t_stop, 10.0 * pq.ms)
+    merged_signal = merged_segment.analogsignals[0]
+    assert_equal(merged_signal.name, "v")
+    assert_equal(merged_signal.units, pq.mV)
+    assert_equal(merged_signal.sampling_period, 0.1 * pq.ms)
+    assert_arrays_equal(merged_signal.magnitude, signal.magnitude)
+    assert_arrays_equal(merged_signal.annotations['source_ids'], numpy.array([42, 44]))
+    assert_arrays_equal(merged_signal.channel_index.channel_ids, numpy.array([0, 2]))
+    assert_equal([ev.name for ev in merged_segment.events], ["stimulus"])
+    assert_arrays_equal(merged_segment.events[0].magnitude, numpy.array([1.0, 3.0]))
+    assert_equal([ep.name for ep in merged_segment.epochs], ["pulse"])
+    assert_equal([sig.name for sig in merged_segment.irregularlysampledsignals], ["w"])
+    assert_arrays_equal(merged_segment.irregularlysampledsignals[0].times.magnitude,
+                        numpy.array([0.5, 1.7]))
+
+
 # def test_gather_dict():
 
 # def test_mpi_sum():
@@ -95,6 +95,14 @@ class SpaceTest(unittest.TestCase):
                                          (sqrt(3), sqrt(12), 0.0, sqrt(50.0)),
                                          (sqrt(29), sqrt(14), sqrt(50.0), 0.0)]))
 
+    def test_generator_with_paired_indices(self):
+        s = space.Space()
+        def f(i): return self.ABCD[i]
+        def g(j): return self.ABCD[j]
+        self.assertArraysEqual(s.distance_generator(f, g)(numpy.array([0, 1, 2, 3]),
+                                                          numpy.array([1, 1, 3, 0])),
+                               numpy.array([sqrt(3), 0.0, sqrt(50.0), sqrt(29)]))
+
     def test_infinite_space_with_collapsed_axes(self):
         s_x = space.Space(axes='x')
         s_xy = space.Space(axes='xy')
@@ -128,6 +136,37 @@ class SpaceTest(unittest.TestCase):
         self.assertArraysEqual(s.distances(self.C, self.ABCD),
                                numpy.array([sqrt(3), sqrt(4 + 4 + 4), 0.0, sqrt(4 + 1 + 0)]))
 
+    def test_neighbours(self):
+        rng = numpy.random.RandomState(8923)
+        A = rng.uniform(-1.0, 4.0, size=(50, 3))
+        B = rng.uniform(-1.0, 4.0, size=(40, 3))
+        for s in (space.Space(),
+                  space.Space(axes='xy', scale_factor=0.5, offset=1.0),
+                  space.Space(periodic_boundaries=((-1.0, 4.0), None, (-1.0, 4.0)))):
+            expected = [numpy.nonzero(s.distances(A, b) <= 1.5)[0] for b in B]
+            for have_scipy in (space.have_scipy, False):
+                orig_have_scipy = space.have_scipy
+                space.have_scipy = have_scipy
+                neighbours = list(s.neighbours(A, B, 1.5, block_size=7))
+                space.have_scipy = orig_have_scipy
+                self.assertEqual(len(neighbours), B.shape[0])
+                for indices, expected_indices in zip(neighbours, expected):
+                    assert_arrays_equal(indices, expected_indices)
+
+    @unittest.skipUnless(space.have_scipy, "requires scipy")
+    def test_neighbours_builds_tree_once(self):
+        rng = numpy.random.RandomState(8923)
+        A = rng.uniform(-1.0, 4.0, size=(50, 3))
+        B = rng.uniform(-1.0, 4.0, size=(40, 3))
+        orig_cKDTree = space.cKDTree
+        space.cKDTree = Mock(side_effect=orig_cKDTree)
+        try:
+            neighbours = list(space.Space().neighbours(A, B, 1.5, block_size=7))
+        finally:
+            tree_constructor, space.cKDTree = space.cKDTree, orig_cKDTree
+        self.assertEqual(len(neighbours), B.shape[0])
+        self.assertEqual(tree_constructor.call_count, 1)
+
 
 class LineTest(unittest.TestCase):
 